@@ -0,0 +1,162 @@
+"""
+Keysight VNA SCPI API - Asyncio Front-End
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+
+Awaitable wrapper around pyvisaVNA for asyncio applications. Every VNA gets its own I/O thread,
+so blocking VISA calls never stall the event loop and one process can drive many instruments
+concurrently:
+
+    import asyncio
+    from async_vna import AsyncPyvisaVNA
+
+    async def main():
+        async with await AsyncPyvisaVNA.open('TCPIP0::192.168.1.10::hislip0::INSTR') as vna:
+            await vna.configure_sparam_stimulus(1e9, 2e9)
+            await vna.single_trigger()
+            freq, meas = await vna.get_trace_array('CH1_S11_1')
+
+    asyncio.run(main())
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import pyvisa
+
+from py_vna import pyvisaVNA
+
+
+class AsyncPyvisaVNA:
+    def __init__(self, vna, pollInterval=0.01):
+        """Wraps a connected pyvisaVNA so that its public methods can be awaited.
+
+        Any public pyvisaVNA method is available as a coroutine with the same arguments, e.g. await vna.get_trace('S21').
+        Calls run one at a time, in order, on a dedicated I/O thread for this VNA. wait_for_opc() and single_trigger()
+        poll the Standard Event Status Register instead of blocking on *OPC?, so long sweeps can be cancelled and
+        don't hold the I/O thread.
+
+        Args:
+            vna (pyvisaVNA): Connected VNA to be wrapped.
+            pollInterval (float): Time in seconds between status register polls while waiting for operations to complete. [default is 0.01]
+
+        Attributes:
+            vna (pyvisaVNA): The wrapped VNA. Do not call it directly while coroutines are using this object.
+            pollInterval (float): Time in seconds between status register polls.
+            executor (ThreadPoolExecutor): Single-thread executor that performs all I/O for this VNA.
+        """
+
+        self.vna = vna
+        self.pollInterval = pollInterval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vna-io')
+
+        # Keeps multi-step operations (like polling for OPC) from interleaving with other calls
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    async def open(cls, visaAddress, pollInterval=0.01, **kwargs):
+        """Connects to a VNA without blocking the event loop.
+
+        Args:
+            visaAddress (str): VISA resource address of the VNA.
+            pollInterval (float): Time in seconds between status register polls. [default is 0.01]
+            kwargs: Additional keyword arguments passed to pyvisaVNA, e.g. timeoutMs or resourceManager.
+
+        Returns:
+            (AsyncPyvisaVNA): Connected VNA.
+        """
+
+        vna = await asyncio.get_running_loop().run_in_executor(None, functools.partial(pyvisaVNA, visaAddress, **kwargs))
+        return cls(vna, pollInterval=pollInterval)
+
+    async def run(self, func, *args, **kwargs):
+        """Runs a blocking function on this VNA's I/O thread and returns its result.
+
+        Args:
+            func (function): Function to run, usually a pyvisaVNA method.
+            args: Positional arguments passed to func.
+            kwargs: Keyword arguments passed to func.
+        """
+
+        async with self.lock:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        if name == 'vna':
+            raise AttributeError(name)
+        attr = getattr(self.vna, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return method
+
+    async def poll_opc(self, tempTimeout=None):
+        """Sends *OPC and polls *ESR? until pending operations are complete. The caller must hold self.lock.
+
+        Args:
+            tempTimeout (int): Timeout in ms. [default is None, uses the VNA I/O timeout]
+        """
+
+        loop = asyncio.get_running_loop()
+        timeoutMs = tempTimeout if tempTimeout else self.vna.inst.timeout
+        deadline = loop.time() + timeoutMs / 1000 if timeoutMs is not None else None
+
+        # *OPC sets bit 0 of the ESR once all pending operations finish, *ESR? reads and clears the register
+        # Error bits read here are kept for the next err_check(), like in pyvisaVNA.arm_opc_event()
+        esr = await loop.run_in_executor(self.executor, self.vna.inst.query, '*opc;*esr?')
+        self.vna.pendingEsr |= int(esr) & 0b111100
+        while not int(esr) & 1:
+            if deadline is not None and loop.time() > deadline:
+                raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+            await asyncio.sleep(self.pollInterval)
+            esr = await loop.run_in_executor(self.executor, self.vna.inst.query, '*esr?')
+            self.vna.pendingEsr |= int(esr) & 0b111100
+
+    async def wait_for_opc(self, tempTimeout=None):
+        """Waits for the previous command to finish executing without blocking the event loop.
+
+        Args:
+            tempTimeout (int): Temporary timeout in ms to be used if non-standard timeout is desired. [default is None]
+        """
+
+        async with self.lock:
+            await self.poll_opc(tempTimeout)
+
+    async def single_trigger(self, tempTimeout=None, ch=1):
+        """Executes a single sweep and waits for the sweep to complete without blocking the event loop.
+
+        Args:
+            ch (int): Channel on which the acquisition will be performed. [default is 1]
+            tempTimeout (int): Temporary timeout in ms to be used if non-standard timeout is desired. [default is None]
+        """
+
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.vna.inst.write, 'trigger:source immediate')
+            await loop.run_in_executor(self.executor, self.vna.inst.write, f'sense{ch}:sweep:mode single')
+            await self.poll_opc(tempTimeout)
+
+    async def close(self):
+        """Closes the connection to the VNA and stops its I/O thread."""
+
+        try:
+            await self.run(self.vna.close)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
@@ -0,0 +1,104 @@
+"""
+Keysight VNA SCPI API - Pipelined Sweep Benchmark
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+NumPy 1.2x.x
+
+Compares sequential (single_trigger + get_traces per channel) and pipelined (sweep_channels)
+multi-channel acquisition on the simulated VNA. Run from the code directory:
+
+    python bench_pipeline.py --profile usb --channels 6 --traces 4 --points 1601
+
+By default the time reported is the simulator's modeled time, which only counts VISA I/O and
+sweeps. --real-time sleeps for the modeled latency, so host-side parsing is included as well.
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from py_vna import pyvisaVNA
+from sim_vna import SimulatedResourceManager
+
+
+def setup_vna(profile, realTime, numChannels, numTraces, numPoints, pointTime):
+    """Opens a simulated VNA with numChannels channels of numTraces S-parameter traces each.
+
+    Returns:
+        vna (pyvisaVNA): Configured VNA.
+        specs (list): (measName, ch) tuples for every trace.
+    """
+
+    vna = pyvisaVNA('SIM::BENCH::INSTR', resourceManager=SimulatedResourceManager(profile, realTime=realTime, pointTime=pointTime))
+    vna.preset()
+
+    params = ['S11', 'S21', 'S12', 'S22']
+    specs = []
+    for ch in range(1, numChannels + 1):
+        vna.configure_sparam_stimulus(1e9 * ch, 2e9 * ch, numPoints=numPoints, ch=ch)
+        for t in range(numTraces):
+            measName = f'CH{ch}_{params[t % 4]}_{t}'
+            vna.new_sparam_trace(measName, params[t % 4], win=ch, ch=ch)
+            specs.append((measName, ch))
+
+    return vna, specs
+
+
+def run_case(vna, specs, pipelined, iterations):
+    """Runs sweep_channels() iterations times and returns the results of the last run and the time per run in seconds."""
+
+    vna.inst.reset_stats()
+    startClock = vna.inst.clock
+    startTime = time.perf_counter()
+    for _ in range(iterations):
+        results = vna.sweep_channels(specs, pipelined=pipelined)
+    wallTime = time.perf_counter() - startTime
+    modeledTime = vna.inst.clock - startClock
+
+    elapsed = wallTime if vna.inst.realTime else modeledTime
+    return results, elapsed / iterations, vna.inst.transactions / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipelined multi-channel sweep benchmark on the simulated VNA.')
+    parser.add_argument('--profile', default='lan', help="Latency profile, one of 'ideal', 'lan', 'usb', 'pxi'. [default is 'lan']")
+    parser.add_argument('--channels', type=int, default=6, help='Number of channels. [default is 6]')
+    parser.add_argument('--traces', type=int, default=4, help='Number of traces per channel. [default is 4]')
+    parser.add_argument('--points', type=int, default=1601, help='Number of points per trace. [default is 1601]')
+    parser.add_argument('--point-time', type=float, default=20e-6, help='Modeled measurement time per point in seconds. [default is 20e-6]')
+    parser.add_argument('--iterations', type=int, default=10, help='Number of full acquisitions per case. [default is 10]')
+    parser.add_argument('--real-time', action='store_true', help='Sleep for modeled latency and report wall time.')
+    args = parser.parse_args()
+
+    vna, specs = setup_vna(args.profile, args.real_time, args.channels, args.traces, args.points, args.point_time)
+
+    # Warm the measurement number and x-axis caches so both cases measure steady state
+    vna.sweep_channels(specs, pipelined=0)
+
+    sequential, seqTime, seqTransactions = run_case(vna, specs, 0, args.iterations)
+    pipelined, pipeTime, pipeTransactions = run_case(vna, specs, 1, args.iterations)
+
+    # Trace noise changes from sweep to sweep, so compare the x-axes and sizes rather than the data itself
+    for measName, ch in specs:
+        if not np.array_equal(sequential[measName][0], pipelined[measName][0]) or sequential[measName][1].shape != pipelined[measName][1].shape:
+            raise RuntimeError(f'Pipelined data for {measName} does not match sequential data.')
+
+    sweepTime = sum(vna.inst.sweep_time(ch) for ch in range(1, args.channels + 1))
+    print(f'{args.channels} channels x {args.traces} traces x {args.points} points, {args.profile} profile, {"wall" if args.real_time else "modeled"} time')
+    print(f'Sweep time only:   {sweepTime * 1e3:8.2f} ms')
+    print(f'Sequential:        {seqTime * 1e3:8.2f} ms  ({seqTransactions:.0f} transactions)')
+    print(f'Pipelined:         {pipeTime * 1e3:8.2f} ms  ({pipeTransactions:.0f} transactions)')
+    print(f'Throughput gain:   {seqTime / pipeTime:8.2f}x')
+
+    vna.close()
+
+
+if __name__ == '__main__':
+    main()
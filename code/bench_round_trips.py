@@ -0,0 +1,320 @@
+"""
+Keysight VNA SCPI API - Round Trip Budget Benchmark
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+NumPy 1.2x.x
+
+Runs public pyvisaVNA methods against the simulated VNA and compares the number of VISA
+transactions, bytes transferred, and modeled time of each call under the LAN and USB latency
+profiles with the baselines stored in bench_round_trips_baseline.json. Exits with status 1 if
+any method needs more round trips than its baseline or takes longer than the allowed margin.
+It also exits with status 1 if a public method has neither a case in CASES nor an entry in
+EXCLUDED, so new methods can't be added without a budget.
+Run from the code directory:
+
+    python bench_round_trips.py                 # check against the baselines
+    python bench_round_trips.py --update        # accept the current numbers as the new baselines
+    python bench_round_trips.py --methods get_trace marker_get_y
+
+Modeled time only counts VISA I/O and instrument time, so it is repeatable from run to run. Host
+time (Python overhead) is reported for information and only checked with --check-host-time.
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+
+from py_vna import pyvisaVNA
+from sim_vna import SimulatedResourceManager
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_round_trips_baseline.json')
+
+# One call per benchmarked method, made on a VNA prepared by setup_vna(). Every public pyvisaVNA method needs an entry
+# here or in EXCLUDED, otherwise the benchmark fails
+CASES = {
+    'preset': lambda v: v.preset(),
+    'err_check': lambda v: v.err_check(),
+    'wait_for_opc': lambda v: v.wait_for_opc(),
+    'single_trigger': lambda v: v.single_trigger(),
+    'hold_trigger': lambda v: v.hold_trigger(),
+    'start_sweep': lambda v: v.start_sweep(useSrq=1).result(),
+    'restore_status_enables': lambda v: v.start_sweep(useSrq=1).result() and v.restore_status_enables(),
+    'select_channel': lambda v: v.select_channel(1),
+    'get_meas_names': lambda v: v.get_meas_names(includeParams=1),
+    'get_meas_number_from_name': lambda v: v.get_meas_number_from_name('S21'),
+    'set_data_format': lambda v: v.set_data_format('real,64'),
+    'get_trace': lambda v: v.get_trace('S21'),
+    'get_trace_array': lambda v: v.get_trace_array('S21'),
+    'get_x_axis': lambda v: v.get_x_axis(),
+    'get_traces': lambda v: v.get_traces([('S21', 1), ('S11', 1)]),
+    'sweep_channels': lambda v: v.sweep_channels([('S21', 1), ('S11', 1)]),
+    'get_file': lambda v: v.get_file('C:/bench/dut.s2p', io.BytesIO()),
+    'send_file': lambda v: v.send_file(io.BytesIO(b'! bench\n' * 4096), 'C:/bench/upload.s2p'),
+    'save_screenshot': lambda v: v.save_screenshot('C:/bench/screen.png'),
+    'save_csv': lambda v: v.save_csv('S21', 'C:/bench/s21.csv'),
+    'marker_activate': lambda v: v.marker_activate(2, 'S21'),
+    'marker_format': lambda v: v.marker_format(1, 'S21', 'phase'),
+    'marker_set_x': lambda v: v.marker_set_x(1, 'S21', 1.5e9),
+    'marker_get_x': lambda v: v.marker_get_x(1, 'S21'),
+    'marker_get_y': lambda v: v.marker_get_y(1, 'S21'),
+    'add_memory_to_all_traces': lambda v: v.add_memory_to_all_traces(),
+    'configure_limit_segment': lambda v: v.configure_limit_segment('S21', 1),
+    'configure_limit_test': lambda v: v.configure_limit_test('S21'),
+    'get_limit_status': lambda v: v.get_limit_status('S21'),
+    'set_frequency_reference': lambda v: v.set_frequency_reference(),
+    'configure_receiver_gain': lambda v: v.configure_receiver_gain(),
+    'configure_receiver_path': lambda v: v.configure_receiver_path(),
+    'configure_receiver_leveling': lambda v: v.configure_receiver_leveling(),
+    'configure_power_offset': lambda v: v.configure_power_offset(),
+    'list_cal_sets': lambda v: v.list_cal_sets(),
+    'load_cal_set': lambda v: v.load_cal_set('CalSet_1'),
+    'get_active_cal_set': lambda v: v.get_active_cal_set(),
+    'define_smart_cal': lambda v: v.define_smart_cal(),
+    'define_cal_all': lambda v: v.define_cal_all(),
+    'deembed_calset': lambda v: v.deembed_calset('MyCal_STD', 'Deembedded', 'C:/bench/left.s2p', 'C:/bench/right.s2p'),
+    'deembed_s2p_file': lambda v: v.deembed_s2p_file(1, 'C:/bench/left.s2p'),
+    'get_ecal_module_nums': lambda v: v.get_ecal_module_nums(),
+    'get_all_ecal_model_serial': lambda v: v.get_all_ecal_model_serial(),
+    'get_all_ecal_info': lambda v: v.get_all_ecal_info(),
+    'new_sparam_trace': lambda v: v.new_sparam_trace('Bench', 'S12'),
+    'new_traces': lambda v: v.new_traces([('sparam', 'Bench12', 'S12', 1, 1), ('sparam', 'Bench22', 'S22', 2, 1), ('gca', 'BenchComp', 'CompIn21', 3, 2)]),
+    'configure_sparam_stimulus': lambda v: v.configure_sparam_stimulus(2e9, 3e9, numPoints=401),
+    'save_s2p': lambda v: v.save_s2p('S21', 'C:/bench/save.s2p'),
+    'set_snp_format': lambda v: v.set_snp_format('ri'),
+    'get_snp_data': lambda v: v.get_snp_data('S21'),
+    'new_mod_trace': lambda v: v.new_mod_trace(ch=2),
+    'configure_mod_sweep': lambda v: v.configure_mod_sweep(ch=2),
+    'get_mod_data': lambda v: v.get_mod_data(),
+    'new_modx_trace': lambda v: v.new_modx_trace(ch=2),
+    'new_gca_trace': lambda v: v.new_gca_trace(ch=2),
+    'configure_gca_frequency_stimulus': lambda v: v.configure_gca_frequency_stimulus(ch=2),
+    'new_gcax_trace': lambda v: v.new_gcax_trace(ch=2),
+    'new_sa_trace': lambda v: v.new_sa_trace(ch=2),
+    'configure_sa_sweep': lambda v: v.configure_sa_sweep(ch=2),
+    'new_smc_trace': lambda v: v.new_smc_trace(ch=2),
+    'new_nf_trace': lambda v: v.new_nf_trace(ch=2),
+    'configure_nf_frequency': lambda v: v.configure_nf_frequency(ch=2),
+    'new_nfx_trace': lambda v: v.new_nfx_trace(ch=2),
+    'add_mod_source': lambda v: v.add_mod_source(ch=1),
+    'add_mod_table_parameter': lambda v: v.add_mod_table_parameter(ch=1),
+    'arm_opc_event': lambda v: v.arm_opc_event(useSrq=1).result(),
+    'check_deferred_errors': lambda v: v.check_deferred_errors(),
+    'configure_embedded_lo': lambda v: v.configure_embedded_lo(ch=2),
+    'configure_gca_compression_analysis': lambda v: v.configure_gca_compression_analysis('S21', 1.5e9),
+    'configure_gca_power_stimulus': lambda v: v.configure_gca_power_stimulus(ch=2),
+    'configure_gca_safe_mode_stimulus': lambda v: v.configure_gca_safe_mode_stimulus(ch=2),
+    'configure_gcax_frequency_stimulus': lambda v: v.configure_gcax_frequency_stimulus(ch=2),
+    'configure_gcax_power_stimulus': lambda v: v.configure_gcax_power_stimulus(ch=2),
+    'configure_gcax_safe_mode_stimulus': lambda v: v.configure_gcax_safe_mode_stimulus(ch=2),
+    'configure_mixer_frequency': lambda v: v.configure_mixer_frequency(ch=2),
+    'configure_mod_acpevm_meas': lambda v: v.configure_mod_acpevm_meas(ch=2),
+    'configure_mod_create_compact_mdx': lambda v: v.configure_mod_create_compact_mdx(ch=2),
+    'configure_mod_create_mtone_mdx': lambda v: v.configure_mod_create_mtone_mdx(ch=2),
+    'configure_mod_evm_meas': lambda v: v.configure_mod_evm_meas(ch=2),
+    'configure_mod_meas_details': lambda v: v.configure_mod_meas_details(ch=2),
+    'configure_mod_modulate': lambda v: v.configure_mod_modulate(ch=2),
+    'configure_mod_rfpath': lambda v: v.configure_mod_rfpath(ch=2),
+    'configure_mod_source_cal': lambda v: v.configure_mod_source_cal(ch=2),
+    'configure_mod_source_cal_details': lambda v: v.configure_mod_source_cal_details(ch=2),
+    'configure_modx_embedded_lo': lambda v: v.configure_modx_embedded_lo(ch=2),
+    'configure_modx_mixer': lambda v: v.configure_modx_mixer(ch=2),
+    'configure_modx_rfpath': lambda v: v.configure_modx_rfpath(ch=2),
+    'configure_nf_noise_figure': lambda v: v.configure_nf_noise_figure(ch=2),
+    'configure_nf_power': lambda v: v.configure_nf_power(ch=2),
+    'configure_sa_band_power_marker': lambda v: v.configure_sa_band_power_marker(1, 'S21'),
+    'configure_sa_source': lambda v: v.configure_sa_source(ch=2),
+    'configure_smc_stimulus': lambda v: v.configure_smc_stimulus(ch=2),
+    'delete_mod_table_parameter': lambda v: v.delete_mod_table_parameter(ch=1),
+    'enable_source_correction': lambda v: v.enable_source_correction(ch=2),
+    'feed_trace': lambda v: v.feed_trace('S21', 2),
+    'get_cw_freq': lambda v: v.get_cw_freq('S21'),
+    'get_ecal_module_states': lambda v: v.get_ecal_module_states(),
+    'get_individual_ecal_info': lambda v: v.get_individual_ecal_info(),
+    'get_individual_ecal_model_serial': lambda v: v.get_individual_ecal_model_serial(),
+    'get_lo_frequency_delta': lambda v: v.get_lo_frequency_delta(),
+    'get_sa_marker_band_power': lambda v: v.get_sa_marker_band_power(1, 'S21'),
+    'initiate_source_correction_cal': lambda v: v.initiate_source_correction_cal(retry=0),
+    'load_capability': lambda v: v.load_capability('numPorts'),
+    'load_meas_num_cache': lambda v: v.load_meas_num_cache(),
+    'load_s2p': lambda v: v.load_s2p('C:/bench/dut.s2p'),
+    'load_window_layout': lambda v: v.load_window_layout(),
+    'measure_cal_standard': lambda v: v.measure_cal_standard(1),
+    'print_capabilities': lambda v: v.print_capabilities(),
+    'query_binary_array': lambda v: v.set_data_format('real,64', byteOrder='swapped') or v.query_binary_array('calculate1:measure1:data? fdata'),
+    'query_binary_arrays': lambda v: v.set_data_format('real,64', byteOrder='swapped') or v.query_binary_arrays(['calculate1:measure1:data? fdata', 'calculate1:measure2:data? fdata']),
+    'recall_state_file': lambda v: v.recall_state_file('C:/bench/state.csa'),
+    'refresh_capabilities': lambda v: v.refresh_capabilities(),
+    'run_cal': lambda v: v.run_cal(promptUser=0),
+    'save_mod_distortion_table': lambda v: v.save_mod_distortion_table(ch=2),
+    'set_ecal_path': lambda v: v.set_ecal_path(),
+    'show_distortion_table': lambda v: v.show_distortion_table(),
+    'source_unleveled_check': lambda v: v.source_unleveled_check(),
+    'sp6t_close_connection': lambda v: v.sp6t_close_connection(),
+    'sp6t_connection_status': lambda v: v.sp6t_connection_status(),
+    'sp6t_enable': lambda v: v.sp6t_enable(),
+    'spdt_close_connection': lambda v: v.spdt_close_connection(),
+    'spdt_connection_status': lambda v: v.spdt_connection_status(),
+    'spdt_enable': lambda v: v.spdt_enable(),
+    'spdt_get_path_catalog': lambda v: v.spdt_get_path_catalog(),
+}
+
+# Public methods without a budget, with the reason. These don't talk to the instrument, or can't run on the simulator
+EXCLUDED = {
+    'batch': 'context manager, its writes are budgeted by the methods called inside it',
+    'deferred_errors': 'context manager, its checks are budgeted by check_deferred_errors',
+    'clear_format_state': 'host-side cache only',
+    'clear_freq_cache': 'host-side cache only',
+    'clear_meas_num_cache': 'host-side cache only',
+    'clear_window_layout': 'host-side cache only',
+    'find_error_command': 'host-side lookup only',
+    'read_capability_cache': 'capability cache file only',
+    'write_capability_cache': 'capability cache file only',
+    'remove_resource_wrapper': 'host-side resource wrapper only',
+    'set_error_policy': 'host-side setting only',
+    'enable_profiling': 'host-side instrumentation only',
+    'disable_profiling': 'host-side instrumentation only',
+    'close': 'closes the session that run_case() measures',
+    'get_ecal_sparam_data': 'experimental, ECal path data is not modeled by the simulator',
+    'stream_traces': 'the producer thread sweeps until the consumer stops it, so the count depends on thread scheduling',
+}
+
+
+def uncovered_methods():
+    """Returns the public pyvisaVNA methods that are neither in CASES nor in EXCLUDED, and the entries of either that aren't public methods."""
+
+    methods = {name for name, func in inspect.getmembers(pyvisaVNA, inspect.isfunction) if not name.startswith('_')}
+    missing = sorted(methods - set(CASES) - set(EXCLUDED))
+    stale = sorted((set(CASES) | set(EXCLUDED)) - methods)
+    return missing, stale
+
+
+def setup_vna(profile):
+    """Opens a simulated VNA with S21 and S11 traces on channel 1, a marker on S21, and a saved s2p file, so every case starts from the same state."""
+
+    vna = pyvisaVNA('SIM::BENCH::INSTR', resourceManager=SimulatedResourceManager(profile))
+    vna.preset()
+    vna.configure_sparam_stimulus(1e9, 2e9, numPoints=201)
+    vna.new_sparam_trace('S21', 'S21')
+    vna.new_sparam_trace('S11', 'S11')
+    vna.single_trigger()
+    vna.marker_activate(1, 'S21')
+    vna.save_s2p('S21', 'C:/bench/dut.s2p')
+    vna.err_check()
+    return vna
+
+
+def run_case(profile, call):
+    """Runs one case on a freshly prepared VNA and returns its transactions, bytes, modeled time, and host time."""
+
+    vna = setup_vna(profile)
+    vna.inst.reset_stats()
+    startClock = vna.inst.clock
+    startTime = time.perf_counter()
+    # Some methods print progress (e.g. run_cal()), which would break up the results table
+    with contextlib.redirect_stdout(io.StringIO()):
+        call(vna)
+    hostTime = time.perf_counter() - startTime
+    stats = vna.inst.stats
+    result = {
+        'transactions': vna.inst.transactions,
+        'bytes': stats['bytesWritten'] + stats['bytesRead'],
+        'modeledTime': round(vna.inst.clock - startClock, 9),
+        'hostTime': round(hostTime, 6),
+    }
+    vna.close()
+    return result
+
+
+def compare(name, profile, result, baseline, threshold, checkHostTime):
+    """Returns a list of regression messages for one case, empty if it is within budget."""
+
+    problems = []
+    if result['transactions'] > baseline['transactions']:
+        problems.append(f"{name} [{profile}]: {result['transactions']} transactions, budget is {baseline['transactions']}")
+    if result['modeledTime'] > baseline['modeledTime'] * (1 + threshold) + 1e-9:
+        problems.append(f"{name} [{profile}]: modeled time {result['modeledTime'] * 1e3:.3f} ms, budget is {baseline['modeledTime'] * 1e3:.3f} ms + {threshold:.0%}")
+    if checkHostTime and result['hostTime'] > baseline['hostTime'] * (1 + threshold):
+        problems.append(f"{name} [{profile}]: host time {result['hostTime'] * 1e3:.3f} ms, budget is {baseline['hostTime'] * 1e3:.3f} ms + {threshold:.0%}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round trip and time budgets of pyvisaVNA methods on the simulated VNA.')
+    parser.add_argument('--profiles', nargs='+', default=['lan', 'usb'], help="Latency profiles to run. [default is 'lan usb']")
+    parser.add_argument('--methods', nargs='+', default=None, help='Only run these methods. [default is all cases]')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed relative increase in time before a case fails. [default is 0.10]')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Path of the baseline file. [default is bench_round_trips_baseline.json]')
+    parser.add_argument('--update', action='store_true', help='Write the current results to the baseline file instead of checking them.')
+    parser.add_argument('--check-host-time', action='store_true', help='Also fail on host time regressions, only meaningful on a quiet, consistent machine.')
+    args = parser.parse_args()
+
+    missing, stale = uncovered_methods()
+    if missing or stale:
+        for name in missing:
+            print(f'{name} has no benchmark case, add one to CASES or list it in EXCLUDED with a reason.')
+        for name in stale:
+            print(f'{name} is in CASES or EXCLUDED but is not a public pyvisaVNA method.')
+        return 1
+
+    names = args.methods or list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        parser.error(f'No benchmark case for {", ".join(unknown)}.')
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        baselines = {}
+
+    results = {}
+    problems = []
+    print(f'{"method":36s} {"profile":8s} {"trans":>6s} {"bytes":>9s} {"modeled ms":>11s} {"host ms":>9s}  status')
+    for profile in args.profiles:
+        for name in names:
+            result = run_case(profile, CASES[name])
+            results.setdefault(profile, {})[name] = result
+
+            baseline = baselines.get(profile, {}).get(name)
+            if args.update:
+                status = 'updated'
+            elif baseline is None:
+                status = 'no baseline'
+            else:
+                caseProblems = compare(name, profile, result, baseline, args.threshold, args.check_host_time)
+                problems += caseProblems
+                status = 'REGRESSION' if caseProblems else 'ok'
+                if not caseProblems and result['transactions'] < baseline['transactions']:
+                    status = f'ok, {baseline["transactions"] - result["transactions"]} fewer transactions, consider --update'
+            print(f'{name:36s} {profile:8s} {result["transactions"]:6d} {result["bytes"]:9d} {result["modeledTime"] * 1e3:11.3f} {result["hostTime"] * 1e3:9.3f}  {status}')
+
+    if args.update:
+        for profile, profileResults in results.items():
+            baselines.setdefault(profile, {}).update(profileResults)
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f'Baselines written to {args.baseline}')
+        return 0
+
+    if problems:
+        print('\nRound trip budget exceeded:')
+        for problem in problems:
+            print(f'  {problem}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Keysight VNA SCPI API - Host-Side De-embedding
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+NumPy 1.2x.x
+
+Vectorized 2-port S-parameter de-embedding on the host, using the same options as the fixture
+simulator in pyvisaVNA.deembed_s2p_file() (reverseS2p, snnZero, enableExtrapolation). Fixture
+data is interpolated onto the measurement frequencies and removed with T-parameters, and every
+function broadcasts over leading batch dimensions, so thousands of stored sweeps can be
+de-embedded in one call without touching the instrument:
+
+    import deembed
+    import touchstone
+
+    freq, measured, z0 = touchstone.read_touchstone('C:/data/dut_with_fixtures.s2p')
+    dut = deembed.deembed_s2p(freq, measured, portOneS2p='C:/data/left.s2p', portTwoS2p='C:/data/right.s2p', snnZero=1)
+
+Fixture files follow the instrument's convention: port 1 of each fixture faces the VNA port and
+port 2 faces the DUT unless reverseS2p is set.
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import numpy as np
+
+import touchstone
+
+
+def check_two_port(sParams, name='sParams'):
+    """Returns sParams as a complex array, raising ValueError unless its last two dimensions are 2x2."""
+
+    sParams = np.asarray(sParams, dtype=complex)
+    if sParams.ndim < 2 or sParams.shape[-2:] != (2, 2):
+        raise ValueError(f'{name} must have shape (..., points, 2, 2).')
+    return sParams
+
+
+def inverse_2x2(m):
+    """Returns the inverse of every 2x2 matrix in m, computed in closed form."""
+
+    det = m[..., 0, 0] * m[..., 1, 1] - m[..., 0, 1] * m[..., 1, 0]
+    inv = np.empty_like(m)
+    inv[..., 0, 0] = m[..., 1, 1] / det
+    inv[..., 0, 1] = -m[..., 0, 1] / det
+    inv[..., 1, 0] = -m[..., 1, 0] / det
+    inv[..., 1, 1] = m[..., 0, 0] / det
+    return inv
+
+
+def s_to_t(sParams):
+    """Converts 2-port S-parameters with shape (..., 2, 2) to T-parameters.
+
+    T-parameters map the waves at port 2 to the waves at port 1, [b1, a1] = T [a2, b2], so networks in series cascade by matrix multiplication.
+    """
+
+    s = check_two_port(sParams)
+    s11, s12, s21, s22 = s[..., 0, 0], s[..., 0, 1], s[..., 1, 0], s[..., 1, 1]
+
+    t = np.empty_like(s)
+    t[..., 0, 0] = (s12 * s21 - s11 * s22) / s21
+    t[..., 0, 1] = s11 / s21
+    t[..., 1, 0] = -s22 / s21
+    t[..., 1, 1] = 1 / s21
+    return t
+
+
+def t_to_s(tParams):
+    """Converts 2-port T-parameters with shape (..., 2, 2) to S-parameters. Inverse of s_to_t()."""
+
+    t = check_two_port(tParams, 'tParams')
+    t11, t12, t21, t22 = t[..., 0, 0], t[..., 0, 1], t[..., 1, 0], t[..., 1, 1]
+
+    s = np.empty_like(t)
+    s[..., 0, 0] = t12 / t22
+    s[..., 0, 1] = (t11 * t22 - t12 * t21) / t22
+    s[..., 1, 0] = 1 / t22
+    s[..., 1, 1] = -t21 / t22
+    return s
+
+
+def cascade(*networks):
+    """Returns the S-parameters of 2-port networks connected in series, port 2 of each to port 1 of the next.
+
+    Args:
+        networks (NumPy ndArray): S-parameters with shape (..., points, 2, 2). Leading dimensions are broadcast against each other.
+    """
+
+    if not networks:
+        raise ValueError('cascade() requires at least one network.')
+
+    t = s_to_t(networks[0])
+    for network in networks[1:]:
+        t = t @ s_to_t(network)
+    return t_to_s(t)
+
+
+def reverse_ports(sParams):
+    """Swaps ports 1 and 2 of 2-port S-parameters, the host-side equivalent of reverseS2p in pyvisaVNA.deembed_s2p_file()."""
+
+    return check_two_port(sParams)[..., ::-1, ::-1]
+
+
+def zero_reflections(sParams, ports=[2]):
+    """Sets the reflection terms of 2-port S-parameters to 0 (a perfect match), the host-side equivalent of NREFLect.
+
+    Args:
+        sParams (NumPy ndArray): S-parameters with shape (..., points, 2, 2).
+        ports (list): Ports whose reflection is zeroed. With fixtures oriented VNA port first, port 2 is the DUT side, as with snnZero. [default is [2]]
+
+    Returns:
+        (NumPy ndArray): Modified copy of sParams.
+    """
+
+    s = check_two_port(sParams).copy()
+    for port in ports:
+        if port not in [1, 2]:
+            raise ValueError("Invalid 'ports', must contain only 1 or 2.")
+        s[..., port - 1, port - 1] = 0
+    return s
+
+
+def interpolate_sparams(freq, sParams, newFreq, enableExtrapolation=0, method='polar'):
+    """Interpolates S-parameters onto a new set of frequencies.
+
+    Args:
+        freq (list or NumPy ndArray): Increasing frequencies of sParams in Hz.
+        sParams (NumPy ndArray): Complex S-parameters with shape (..., points, N, N).
+        newFreq (list or NumPy ndArray): Frequencies to interpolate onto in Hz.
+        enableExtrapolation (int): 0 raises ValueError if newFreq extends beyond freq, as the instrument does, 1 holds the first and last values outside the range. [default is 0]
+        method (str): 'polar' interpolates magnitude and unwrapped phase, which tracks electrical length better, 'ri' interpolates real and imaginary parts. ['polar', 'ri', default is 'polar']
+
+    Returns:
+        (NumPy ndArray): Complex S-parameters with shape (..., len(newFreq), N, N).
+    """
+
+    freq = np.asarray(freq, dtype=float)
+    newFreq = np.asarray(newFreq, dtype=float)
+    sParams = np.asarray(sParams, dtype=complex)
+    if method not in ['polar', 'ri']:
+        raise ValueError("Invalid 'method', must be 'polar' or 'ri'.")
+    if sParams.ndim < 3 or sParams.shape[-3] != freq.size:
+        raise ValueError('sParams must have shape (..., points, N, N) with one point per frequency.')
+    if freq.size > 1 and np.any(np.diff(freq) <= 0):
+        raise ValueError('freq must be strictly increasing.')
+
+    if freq.shape == newFreq.shape and np.array_equal(freq, newFreq):
+        return sParams
+    if not enableExtrapolation and (newFreq.min() < freq[0] or newFreq.max() > freq[-1]):
+        raise ValueError(f'Frequencies {newFreq.min():g} Hz to {newFreq.max():g} Hz extend beyond the data ({freq[0]:g} Hz to {freq[-1]:g} Hz), set enableExtrapolation to 1 to allow this.')
+
+    # Move the frequency axis last so every trace is interpolated with the same weights
+    moved = np.moveaxis(sParams, -3, -1)
+    if method == 'polar':
+        parts = [np.abs(moved), np.unwrap(np.angle(moved), axis=-1)]
+    else:
+        parts = [moved.real, moved.imag]
+
+    # Linear interpolation weights, computed once and applied to every trace. Points outside the range clamp to the edges
+    clipped = np.clip(newFreq, freq[0], freq[-1])
+    upper = np.clip(np.searchsorted(freq, clipped, side='right'), 1, max(freq.size - 1, 1))
+    lower = upper - 1
+    if freq.size > 1:
+        weight = (clipped - freq[lower]) / (freq[upper] - freq[lower])
+    else:
+        lower = upper = np.zeros(newFreq.size, dtype=int)
+        weight = np.zeros(newFreq.size)
+    a, b = [part[..., lower] * (1 - weight) + part[..., upper] * weight for part in parts]
+
+    result = a * np.exp(1j * b) if method == 'polar' else a + 1j * b
+    return np.moveaxis(result, -1, -3)
+
+
+def load_fixture(fixture, freq, reverseS2p=0, snnZero=0, enableExtrapolation=0):
+    """Loads a fixture and prepares it the way the instrument's fixture simulator does.
+
+    The fixture is interpolated onto freq, reversed if reverseS2p is set, and then, if snnZero is set, the reflection at its DUT side (port 2) is zeroed.
+
+    Args:
+        fixture (str, bytes, or tuple): Path or contents of an s2p file, or a (freq, sParams) tuple, e.g. from touchstone.read_touchstone().
+        freq (list or NumPy ndArray): Measurement frequencies in Hz.
+        reverseS2p (int): 0 leaves the fixture as is, 1 reverses its ports. [default is 0]
+        snnZero (int): 0 does not modify the fixture, 1 sets the match at the DUT port to 0 (linear). [default is 0]
+        enableExtrapolation (int): 0 raises ValueError if freq extends beyond the fixture data, 1 enables extrapolation. [default is 0]
+
+    Returns:
+        (NumPy ndArray): Fixture S-parameters with shape (..., len(freq), 2, 2), port 1 facing the VNA.
+    """
+
+    if isinstance(fixture, tuple):
+        fixtureFreq, sParams = fixture[0], fixture[1]
+    else:
+        fixtureFreq, sParams, _ = touchstone.read_touchstone(fixture, numPorts=2 if isinstance(fixture, (bytes, bytearray, memoryview)) else None)
+    sParams = check_two_port(sParams, 'fixture')
+
+    sParams = interpolate_sparams(fixtureFreq, sParams, freq, enableExtrapolation=enableExtrapolation)
+    if reverseS2p:
+        sParams = reverse_ports(sParams)
+    if snnZero:
+        sParams = zero_reflections(sParams, ports=[2])
+    return sParams
+
+
+def deembed(measured, portOneFixture=None, portTwoFixture=None):
+    """Removes fixtures from measured 2-port S-parameters with T-parameters.
+
+    Both fixtures are oriented with port 1 facing the VNA, as returned by load_fixture(), so the port 2 fixture is reversed before it is removed.
+
+    Args:
+        measured (NumPy ndArray): Measured S-parameters with shape (..., points, 2, 2).
+        portOneFixture (NumPy ndArray): Fixture at VNA port 1 with shape (..., points, 2, 2). [default is None, nothing is removed at port 1]
+        portTwoFixture (NumPy ndArray): Fixture at VNA port 2 with shape (..., points, 2, 2). [default is None, nothing is removed at port 2]
+
+    Returns:
+        (NumPy ndArray): De-embedded S-parameters, broadcast over the leading dimensions of all inputs.
+    """
+
+    t = s_to_t(measured)
+    if portOneFixture is not None:
+        t = inverse_2x2(s_to_t(portOneFixture)) @ t
+    if portTwoFixture is not None:
+        t = t @ inverse_2x2(s_to_t(reverse_ports(portTwoFixture)))
+    return t_to_s(t)
+
+
+def deembed_one_port(measured, fixture):
+    """Removes a fixture from a 1-port (reflection) measurement.
+
+    Args:
+        measured (NumPy ndArray): Measured reflection coefficients with shape (..., points).
+        fixture (NumPy ndArray): Fixture S-parameters with shape (..., points, 2, 2), port 1 facing the VNA.
+
+    Returns:
+        (NumPy ndArray): Reflection coefficient at the DUT side of the fixture.
+    """
+
+    fixture = check_two_port(fixture, 'fixture')
+    measured = np.asarray(measured, dtype=complex)
+    s11, s12, s21, s22 = fixture[..., 0, 0], fixture[..., 0, 1], fixture[..., 1, 0], fixture[..., 1, 1]
+    difference = measured - s11
+    return difference / (s12 * s21 + s22 * difference)
+
+
+def deembed_s2p(freq, measured, portOneS2p=None, portTwoS2p=None, reverseS2p=0, snnZero=0, enableExtrapolation=0):
+    """De-embeds fixture files from measured 2-port data on the host, the same way pyvisaVNA.deembed_s2p_file() does on the instrument.
+
+    Args:
+        freq (list or NumPy ndArray): Measurement frequencies in Hz.
+        measured (NumPy ndArray): Measured S-parameters with shape (..., points, 2, 2), e.g. a batch of sweeps from pyvisaVNA.get_snp_data().
+        portOneS2p (str, bytes, or tuple): s2p file at VNA port 1, see load_fixture(). [default is None]
+        portTwoS2p (str, bytes, or tuple): s2p file at VNA port 2, see load_fixture(). [default is None]
+        reverseS2p (int): 0 leaves the fixture files as they are, 1 reverses the ports of both. [default is 0]
+        snnZero (int): 0 does not modify the fixture files, 1 sets the match at their DUT ports to 0 (linear). [default is 0]
+        enableExtrapolation (int): 0 does not enable extrapolation, 1 enables extrapolation. [default is 0]
+
+    Returns:
+        (NumPy ndArray): De-embedded S-parameters with the shape of measured.
+    """
+
+    fixtures = [None if s2p is None else load_fixture(s2p, freq, reverseS2p, snnZero, enableExtrapolation) for s2p in [portOneS2p, portTwoS2p]]
+    return deembed(measured, *fixtures)
@@ -0,0 +1,156 @@
+"""
+Keysight VNA SCPI API - Multi-Instrument Fleet
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+
+Drives many VNAs in parallel from one process. All instruments share one ResourceManager, are
+opened concurrently, and run the same sequence of pyvisaVNA calls on a thread pool:
+
+    from fleet_vna import VNAFleet
+
+    with VNAFleet(['TCPIP0::10.0.0.11::hislip0::INSTR', 'TCPIP0::10.0.0.12::hislip0::INSTR']) as fleet:
+        results = fleet.run([
+            ('configure_sparam_stimulus', (1e9, 2e9)),
+            ('single_trigger',),
+            ('get_trace', ('CH1_S11_1',)),
+        ])
+
+    for address, result in results.items():
+        print(address, result['timings'], result['error'])
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyvisa
+
+from py_vna import pyvisaVNA
+
+
+class VNAFleet:
+    def __init__(self, visaAddresses, resourceManager=None, maxWorkers=None, timeoutMs=10000, openTimeoutMs=100, capabilityCache=None):
+        """Opens a group of VNAs in parallel using one shared resource manager.
+
+        Instruments that fail to open are left out of vnas and their exceptions are stored in openErrors.
+
+        Args:
+            visaAddresses (list): VISA addresses of the VNAs to be controlled.
+            resourceManager (ResourceManager): Resource manager shared by all instruments. [default is None, creates one pyvisa.ResourceManager]
+            maxWorkers (int): Maximum number of instruments accessed at the same time. [default is None, one thread per instrument]
+            timeoutMs (int): Timeout value in milliseconds for VISA commands. [default is 10000]
+            openTimeoutMs (int): Timeout value in milliseconds when connecting to each resource. [default is 100]
+            capabilityCache (str): Path of a capability cache file shared by all instruments, see pyvisaVNA. [default is None, no cache file]
+
+        Attributes:
+            resourceManager (ResourceManager): The shared resource manager.
+            vnas (dict): Connected pyvisaVNA objects keyed by VISA address, in the order given in visaAddresses.
+            openErrors (dict): Exceptions raised while connecting, keyed by VISA address.
+            openTimes (dict): Time in seconds taken to connect to each VNA, keyed by VISA address.
+            executor (ThreadPoolExecutor): Thread pool used for all instrument access.
+        """
+
+        self.ownsResourceManager = resourceManager is None
+        self.resourceManager = pyvisa.ResourceManager() if resourceManager is None else resourceManager
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers or max(len(visaAddresses), 1), thread_name_prefix='vna-fleet')
+
+        def connect(address):
+            startTime = time.perf_counter()
+            vna = pyvisaVNA(address, timeoutMs=timeoutMs, openTimeoutMs=openTimeoutMs, resourceManager=self.resourceManager, capabilityCache=capabilityCache)
+            return vna, time.perf_counter() - startTime
+
+        futures = {address: self.executor.submit(connect, address) for address in visaAddresses}
+
+        self.vnas = {}
+        self.openErrors = {}
+        self.openTimes = {}
+        for address, future in futures.items():
+            try:
+                self.vnas[address], self.openTimes[address] = future.result()
+            except Exception as e:
+                self.openErrors[address] = e
+
+    def map(self, func, *args, **kwargs):
+        """Calls func(vna, *args, **kwargs) for every connected VNA in parallel.
+
+        Args:
+            func (function): Function that takes a pyvisaVNA as its first argument.
+            args: Additional positional arguments passed to func.
+            kwargs: Additional keyword arguments passed to func.
+
+        Returns:
+            (dict): {address: {'result': return value, 'seconds': elapsed time, 'error': exception or None}}
+        """
+
+        def call(vna):
+            startTime = time.perf_counter()
+            try:
+                return {'result': func(vna, *args, **kwargs), 'seconds': time.perf_counter() - startTime, 'error': None}
+            except Exception as e:
+                return {'result': None, 'seconds': time.perf_counter() - startTime, 'error': e}
+
+        futures = {address: self.executor.submit(call, vna) for address, vna in self.vnas.items()}
+        return {address: future.result() for address, future in futures.items()}
+
+    def run(self, steps):
+        """Runs the same sequence of pyvisaVNA method calls on every connected VNA in parallel.
+
+        Each VNA runs its steps in order. If a step raises an exception, the remaining steps for that VNA are skipped
+        and the exception is stored in its result, the other VNAs carry on.
+
+        Args:
+            steps (list): Method calls as (methodName,), (methodName, args), or (methodName, args, kwargs) tuples, e.g. ('get_trace', ('S21',), {'ch': 1}).
+
+        Returns:
+            (dict): {address: {'results': [return value per step], 'timings': [seconds per step], 'seconds': total time, 'error': exception or None}}
+        """
+
+        calls = []
+        for step in steps:
+            methodName = step[0]
+            args = step[1] if len(step) > 1 else ()
+            kwargs = step[2] if len(step) > 2 else {}
+            if not hasattr(pyvisaVNA, methodName) or methodName.startswith('_'):
+                raise ValueError(f"Invalid step '{methodName}', must be the name of a public pyvisaVNA method.")
+            calls.append((methodName, args, kwargs))
+
+        def sequence(vna):
+            result = {'results': [], 'timings': [], 'seconds': 0.0, 'error': None}
+            for methodName, args, kwargs in calls:
+                startTime = time.perf_counter()
+                try:
+                    result['results'].append(getattr(vna, methodName)(*args, **kwargs))
+                except Exception as e:
+                    result['error'] = e
+                    break
+                finally:
+                    result['timings'].append(time.perf_counter() - startTime)
+            result['seconds'] = sum(result['timings'])
+            return result
+
+        futures = {address: self.executor.submit(sequence, vna) for address, vna in self.vnas.items()}
+        return {address: future.result() for address, future in futures.items()}
+
+    def close(self):
+        """Closes all instrument connections, the thread pool, and the resource manager if the fleet created it."""
+
+        for vna in self.vnas.values():
+            try:
+                vna.close()
+            except Exception:
+                pass
+        self.vnas = {}
+        self.executor.shutdown(wait=True)
+        if self.ownsResourceManager:
+            self.resourceManager.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -41,48 +41,470 @@ THESE TERMS AND CONDITIONS, DO NOT COPY OR DISTRIBUTE THE SOURCE FILES.
     solely with respect to the Source Files.
 """
 
+import json
 import matplotlib.pyplot as plt
+import numbers
 import numpy as np
+import os
 import pyvisa
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timezone, timedelta
 import time
 
+
+def read_until(inst, raw, size):
+    """Reads from a PyVISA resource until at least size bytes have been received, counting the bytes already in raw.
+
+    Partial reads are copied into one buffer allocated for the whole block instead of being concatenated, so a block that
+    arrives in many reads is only copied once. Bytes received past size (e.g. the termination character) are kept at the end.
+
+    Args:
+        inst (base class for the connected resource): PyVISA resource to read from.
+        raw (bytes or bytearray): Bytes received so far.
+        size (int): Number of bytes needed.
+
+    Returns:
+        (bytes or bytearray): raw itself if it already holds size bytes, otherwise a new buffer with at least size bytes.
+    """
+
+    if len(raw) >= size:
+        return raw
+
+    buffer = bytearray(size)
+    buffer[:len(raw)] = raw
+    received = len(raw)
+    excess = []
+    while received < size:
+        chunk = inst.read_raw()
+        count = min(len(chunk), size - received)
+        buffer[received:received + count] = chunk[:count]
+        received += count
+        if count < len(chunk):
+            excess.append(chunk[count:])
+    if excess:
+        buffer += b''.join(excess)
+
+    return buffer
+
+
+def read_ieee_block(inst, raw):
+    """Reads the rest of the first IEEE 488.2 definite-length block in a response, see read_until().
+
+    Args:
+        inst (base class for the connected resource): PyVISA resource to read from.
+        raw (bytes or bytearray): Bytes of the response received so far.
+
+    Returns:
+        raw (bytes or bytearray): Buffer that holds the whole block.
+        start (int): Position of the first data byte of the block in raw.
+        length (int): Number of data bytes in the block.
+    """
+
+    # The header itself can be split over reads
+    start = raw.find(b'#')
+    while start < 0 or len(raw) < start + 2 or len(raw) < start + 2 + int(raw[start + 1:start + 2]):
+        raw = read_until(inst, raw, len(raw) + 1)
+        start = raw.find(b'#')
+    offset, length = pyvisa.util.parse_ieee_block_header(raw[start:start + 2 + int(raw[start + 1:start + 2])], length_before_block=0)
+
+    # If a termination character is enabled, the read can stop early when the data contains that byte
+    raw = read_until(inst, raw, start + offset + length)
+    return raw, start + offset, length
+
+
+class BatchedResource:
+    def __init__(self, inst, maxMessageSize=4096):
+        """Wraps a PyVISA resource and coalesces writes into semicolon-joined compound SCPI messages.
+
+        Writes are buffered until the next message would exceed maxMessageSize or until anything other than
+        a plain write is requested from the resource (query, binary transfer, read, timeout, etc.), at which
+        point the buffered commands are sent first so the instrument sees them in their original order.
+
+        Args:
+            inst (base class for the connected resource): PyVISA resource to be wrapped.
+            maxMessageSize (int): Maximum length in bytes of a single compound message. [default is 4096]
+        """
+
+        self.__dict__['inst'] = inst
+        self.__dict__['maxMessageSize'] = maxMessageSize
+        self.__dict__['pending'] = []
+        self.__dict__['pendingSize'] = 0
+
+    def write(self, message, termination=None, encoding=None):
+        """Buffers a SCPI command instead of sending it immediately."""
+
+        command = message.strip()
+
+        # Each command in a compound message is interpreted relative to the previous header unless it starts with a colon
+        if not command.startswith(('*', ':')):
+            command = f':{command}'
+
+        size = len(command) + 1
+        if self.pending and self.pendingSize + size > self.maxMessageSize:
+            self.flush()
+
+        self.pending.append(command)
+        self.__dict__['pendingSize'] += size
+
+        return len(message)
+
+    def query(self, message, delay=None):
+        """Sends the buffered commands and a query as one compound message, e.g. a configuration followed by err_check(), and returns the response."""
+
+        command = message.strip()
+        if not command.startswith(('*', ':')):
+            command = f':{command}'
+
+        if self.pending and self.pendingSize + len(command) + 1 <= self.maxMessageSize:
+            message = ';'.join(self.pending + [command])
+            self.__dict__['pending'] = []
+            self.__dict__['pendingSize'] = 0
+        else:
+            self.flush()
+        return self.inst.query(message, delay)
+
+    def flush(self):
+        """Sends all buffered commands as one or more compound messages."""
+
+        if self.pending:
+            message = ';'.join(self.pending)
+            self.__dict__['pending'] = []
+            self.__dict__['pendingSize'] = 0
+            self.inst.write(message)
+
+    def __getattr__(self, name):
+        # Queries and transfers may depend on the buffered commands, so send them first
+        self.flush()
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        self.flush()
+        setattr(self.inst, name, value)
+
+class CommandHistory:
+    def __init__(self, inst, historySize=256):
+        """Wraps a PyVISA resource and keeps a numbered record of the most recent SCPI messages sent to it.
+
+        Used by err_check() to report which commands were sent since the last error check. Everything other than
+        writes and queries is passed through to the resource unchanged.
+
+        Args:
+            inst (base class for the connected resource): PyVISA resource to be wrapped.
+            historySize (int): Number of messages kept. [default is 256]
+        """
+
+        self.__dict__['inst'] = inst
+        self.__dict__['history'] = deque(maxlen=historySize)
+        self.__dict__['count'] = 0
+
+    def record(self, message):
+        """Adds a message to the history and returns its sequence number."""
+
+        self.__dict__['count'] += 1
+        self.history.append((self.count, message.strip()))
+        return self.count
+
+    def since(self, sequence):
+        """Returns the messages sent after the given sequence number as a list of (sequence, message) tuples."""
+
+        return [entry for entry in self.history if entry[0] > sequence]
+
+    def write(self, message, *args, **kwargs):
+        self.record(message)
+        return self.inst.write(message, *args, **kwargs)
+
+    def query(self, message, *args, **kwargs):
+        self.record(message)
+        return self.inst.query(message, *args, **kwargs)
+
+    def query_binary_values(self, message, *args, **kwargs):
+        self.record(message)
+        return self.inst.query_binary_values(message, *args, **kwargs)
+
+    def query_ascii_values(self, message, *args, **kwargs):
+        self.record(message)
+        return self.inst.query_ascii_values(message, *args, **kwargs)
+
+    def write_raw(self, message):
+        # Only the header of binary transfers is kept
+        self.record(bytes(message[:80]).decode('ascii', errors='replace'))
+        return self.inst.write_raw(message)
+
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.inst, name, value)
+
+class VNAError(Exception):
+    def __init__(self, errors):
+        """Raised by err_check() when the VNA reports errors.
+
+        args[0] is a list of the error strings as reported by previous versions of err_check(), so existing handlers keep working.
+
+        Args:
+            errors (list): One dict per error, {'code': int, 'message': str, 'command': str or None, 'commands': list}. 'command' is the
+                SCPI message most likely to have caused the error, 'commands' holds all messages sent since the previous check.
+        """
+
+        super().__init__([f'{e["code"]},"{e["message"]}"'.replace('+', '').replace('-', '') for e in errors])
+        self.errors = errors
+
+    @property
+    def codes(self):
+        """List of error codes, e.g. [-113, -222]."""
+
+        return [e['code'] for e in self.errors]
+
+    def __str__(self):
+        return '; '.join(f'{e["code"]} "{e["message"]}"' + (f' after "{e["command"]}"' if e['command'] else '') for e in self.errors)
+
+# Queries for the capabilities that pyvisaVNA reads lazily, and how each response is parsed
+CAPABILITY_QUERIES = {
+    'instOptions': ('*opt?', lambda r: r),
+    'numPorts': ('system:capability:hardware:ports:count?', lambda r: int(r)),
+    'portCatalog': ('system:capability:hardware:ports:catalog?', lambda r: r.rstrip().strip('"').split(',')),
+    'numSources': ('system:capability:hardware:ports:source:count?', lambda r: int(r)),
+    'sourceCatalog': ('system:capability:hardware:ports:source:catalog?', lambda r: r.rstrip().strip('"').split(',')),
+}
+
+# Measurement classes created by the new_*_trace methods and new_traces(): the class name used by calc:custom:define (None for
+# standard S-parameter channels) and the measurement parameters each one accepts (None if not checked)
+MEASUREMENT_CLASSES = {
+    'sparam': {'className': None, 'validParams': None},
+    'mod': {'className': 'Modulation Distortion', 'validParams': ['PIn1', 'POut2', 'PModFile', 'MSig2', 'MDist2', 'MDistIR2', 'MGain21',
+        'PGain21', 'MComp21', 'PGain21', 'LMatch2', 'CarrIn1', 'CarrOut2', 'NPRIn1', 'NPROut2',
+        'NPRDist21', 'NPRPwrOut2', 'ACPIn1', 'ACPOut2', 'ACPDist21', 'ACPPwrIn1', 'ACPPwrOut2',
+        'EVMDistEq21', 'EVMDistUn21', 'EVMPwrIn1', 'EVMPwrOut2', 'ModFilter',
+        'A', 'b1', 'B', 'C', 'b3', 'D', 'b4', 'R1', 'a1', 'R2', 'a2', 'R3', 'a3', 'R4', 'a4',
+        'S11', 'S21', 'LPIn1', 'LPOut1', 'LPOut2',
+        'PIn2', 'POut1', 'MSig1', 'MDist1', 'MDistIR1', 'MGain12',
+        'PGain12', 'MComp12', 'PGain12', 'LMatch1', 'CarrIn2', 'CarrOut1', 'NPRIn2', 'NPROut1',
+        'NPRDist12', 'NPRPwrOut1', 'ACPIn2', 'ACPOut1', 'ACPDist12', 'ACPPwrIn2', 'ACPPwrOut1',
+        'EVMDistEq12', 'EVMDistUn12', 'EVMPwrIn2', 'EVMPwrOut1']},
+    'modx': {'className': 'Modulation Distortion Converters', 'validParams': ['PIn1', 'POut1', 'POut2', 'PModFile', 'MSig2', 'MDist2', 'MDistIR2', 'MGain21',
+        'PGain21', 'MComp21', 'PGain21', 'LMatch2', 'CarrIn1', 'CarrOut2', 'NPRIn1', 'NPROut2',
+        'NPRDist21', 'NPRPwrOut2', 'ACPIn1', 'ACPOut2', 'ACPDist21', 'ACPPwrIn1', 'ACPPwrOut2',
+        'EVMDistEq21', 'EVMDistUn21', 'EVMPwrIn1', 'EVMPwrOut2', 'ModFilter',
+        'A', 'b1', 'B', 'C', 'b3', 'D', 'b4', 'R1', 'a1', 'R2', 'a2', 'R3', 'a3', 'R4', 'a4',
+        'S11', 'S21', 'LPIn1', 'LPOut1', 'LPOut2',
+        'PIn2', 'POut2', 'POut1', 'MSig1', 'MDist1', 'MDistIR1', 'MGain12',
+        'PGain12', 'MComp12', 'PGain12', 'LMatch1', 'CarrIn2', 'CarrOut1', 'NPRIn2', 'NPROut1',
+        'NPRDist12', 'NPRPwrOut1', 'ACPIn2', 'ACPOut1', 'ACPDist12', 'ACPPwrIn2', 'ACPPwrOut1',
+        'EVMDistEq12', 'EVMDistUn12', 'EVMPwrIn2', 'EVMPwrOut1']},
+    'gca': {'className': 'Gain Compression', 'validParams': ['S21', 'S11', 'S12', 'S22', 'CompIn21', 'CompOut21', 'DeltaGain21', 'CompGain21', 'CompS11', 'RefS21', 'CompIn12', 'CompOut12', 'DeltaGain12', 'CompGain12', 'CompS22', 'RefS12']},
+    'gcax': {'className': 'Gain Compression Converters', 'validParams': ['S21', 'S11', 'S12', 'S22', 'CompIn21', 'CompOut21', 'DeltaGain21', 'CompGain21', 'CompS11', 'RefS21',
+        'SC21', 'SC12', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']},
+    'sa': {'className': 'Spectrum Analyzer', 'validParams': ['B', 'A', 'R1', 'R2', 'b1', 'b2', 'a1', 'a2']},
+    'smc': {'className': 'Scalar Mixer/Converter', 'validParams': ['SC21', 'SC12', 'S11', 'S22', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']},
+    'nf': {'className': 'Noise Figure Cold Source', 'validParams': ['NF', 'ENR', 'T-Eff', 'DUTRNP', 'DUTRNPI', 'SYSRNP', 'SYSRNPI', 'DUTNPD', 'DUTNPDI', 'SYSNPD', 'SYSNPDI', 'OvrRng', 'T-Rcvr', 'S11', 'S21', 'S12', 'S22', 'GammaOpt', 'Rn', 'NFMin']},
+    'nfx': {'className': 'Noise Figure Converters', 'validParams': ['NF', 'ENR', 'T-Eff', 'DUTRNP', 'DUTRNPI', 'SYSRNP', 'SYSRNPI', 'DUTNPD', 'DUTNPDI', 'SYSNPD', 'SYSNPDI', 'OvrRng', 'T-Rcvr', 'S11', 'SC21', 'SC12', 'S22', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']},
+}
+
+# Serializes reads and writes of capability cache files between threads, e.g. VNAFleet connecting to many VNAs at once
+capabilityCacheLock = threading.Lock()
+
+def capability_property(name):
+    """Returns a property that reads a capability from pyvisaVNA.capabilities, querying the VNA the first time it is needed."""
+
+    def getter(self):
+        if name not in self.capabilities:
+            self.load_capability(name)
+        return self.capabilities[name]
+
+    def setter(self, value):
+        self.capabilities[name] = value
+
+    return property(getter, setter)
+
 class pyvisaVNA:
-    def __init__(self, visaAddress, timeoutMs=10000, openTimeoutMs=100):
+    instOptions = capability_property('instOptions')
+    numPorts = capability_property('numPorts')
+    portCatalog = capability_property('portCatalog')
+    numSources = capability_property('numSources')
+    sourceCatalog = capability_property('sourceCatalog')
+
+    def __init__(self, visaAddress, timeoutMs=10000, openTimeoutMs=100, resourceManager=None, capabilityCache=None):
         """Class for controlling Keysight VNAs.
 
         Args:
             visaAddress (str): Visa address of the instrument to be controlled, typically found in Keysight Conection Expert when the instrument is connected
             timeoutMs (int): Timeout value in milliseconds for VISA commands. [default is 10000]
             openTimeoutMs (int): Timeout value in milliseconds when connecting to the resource. [default is 10000]
+            resourceManager (ResourceManager): Resource manager used to open the instrument, e.g. sim_vna.SimulatedResourceManager for offline use. [default is None, creates a new pyvisa.ResourceManager]
+            capabilityCache (str): Path of a JSON file in which instrument capabilities are kept between sessions, keyed by VISA address and instrument ID. Reconnecting to a known VNA then only costs an *idn? query. [default is None, no cache file]
 
         Attributes:
             inst (base class for the connected resource): A PyVISA object to be used for communication with the VNA
             instID (str): Instrument information: <company name>, <model number>, <serial number>, <firmware revision>
-            instOptions (list): List of all of the instrument options currently installed on the VNA
-            numPorts (int): The number of test ports including external testset ports on the VNA
-            portCatalog (list): The list of internal test port names on the VNA
-            numSources (int): The number of internal sources
-            sourceCatalog (list): The list of internal source port names
+            instOptions (list): List of all of the instrument options currently installed on the VNA, queried when first used
+            numPorts (int): The number of test ports including external testset ports on the VNA, queried when first used
+            portCatalog (list): The list of internal test port names on the VNA, queried when first used
+            numSources (int): The number of internal sources, queried when first used
+            sourceCatalog (list): The list of internal source port names, queried when first used
+            capabilities (dict): Capabilities read so far, from the VNA or the capability cache, see refresh_capabilities()
+            capabilitiesChanged (int): 1 if capabilities has entries that aren't in the capability cache file yet
+            measNumCache (dict): Measurement numbers keyed by (channel, measurement name), see get_meas_number_from_name()
+            dataFormat (str): Last data transfer format sent to the VNA, None if unknown, see set_data_format()
+            byteOrder (str): Last binary byte order sent to the VNA, None if unknown, see set_data_format()
+            snpFormat (str): Last SNP data format sent to the VNA, None if unknown, see set_snp_format()
+            tracePool (dict): Preallocated NumPy arrays reused by get_trace_array(pooled=1), keyed by (channel, measurement name)
+            useFreqCache (int): 1 reuses the x-axis of a channel between trace transfers, 0 queries it every time. Set to 0 if stimulus settings are changed outside of this class, e.g. from the front panel. [default is 1]
+            freqCache (dict): Cached x-axis NumPy arrays keyed by channel, see get_x_axis()
+            streamStats (dict): Number of sweeps acquired, dropped, and yielded by the last stream_traces() call
+            errorPolicy (str): How err_check() looks for errors, see set_error_policy(). [default is 'immediate']
+            commandHistory (CommandHistory): Record of recent SCPI messages used to correlate errors with commands, None until enabled by set_error_policy()
+            errorStats (dict): Number of error checks performed, skipped by the 'deferred' policy, and VISA transactions they used
+            profiler (VNAProfiler): Latency profiler, None unless enabled by enable_profiling()
+            windowLayout (dict): Trace numbers in use keyed by window number, loaded from the VNA when first needed, None if unknown. See feed_trace()
         """
 
-        # Query alll settings from the VNA and store them as class attributes
-        self.inst = pyvisa.ResourceManager().open_resource(visaAddress, open_timeout=openTimeoutMs)
+        if resourceManager is None:
+            resourceManager = pyvisa.ResourceManager()
+
+        self.inst = resourceManager.open_resource(visaAddress, open_timeout=openTimeoutMs)
         self.inst.timeout = timeoutMs
         self.instID = self.inst.query('*idn?').rstrip()
-        self.instOptions = self.inst.query('*opt?')
-        self.numPorts = int(self.inst.query('system:capability:hardware:ports:count?'))
-        self.portCatalog = self.inst.query('system:capability:hardware:ports:catalog?').rstrip().strip('"').split(',')
-        self.numSources = int(self.inst.query('system:capability:hardware:ports:source:count?'))
-        self.sourceCatalog = self.inst.query('system:capability:hardware:ports:source:catalog?').rstrip().strip('"').split(',')
+
+        # Other capabilities are read from the cache file, or queried from the VNA the first time they are used
+        self.visaAddress = visaAddress
+        self.capabilityCache = capabilityCache
+        self.capabilityKey = f'{visaAddress}|{self.instID}'
+        self.capabilities = self.read_capability_cache().get(self.capabilityKey, {})
+        self.capabilitiesChanged = 0
+
+        # Measurement numbers are looked up once per channel and reused, see get_meas_number_from_name()
+        self.measNumCache = {}
+
+        # Data format state is unknown until this class sets it, see set_data_format() and set_snp_format()
+        self.dataFormat = None
+        self.byteOrder = None
+        self.snpFormat = None
+
+        # Receive arrays reused across sweeps by get_trace_array(pooled=1)
+        self.tracePool = {}
+
+        # X-axis values are reused until this class changes the channel stimulus, see get_x_axis()
+        self.useFreqCache = 1
+        self.freqCache = {}
+        self.noFreqCacheChannels = set()
+
+        self.streamStats = {'acquired': 0, 'dropped': 0, 'yielded': 0}
+
+        # Error checking policy and the state needed to screen for and correlate errors, see set_error_policy()
+        self.errorPolicy = 'immediate'
+        self.commandHistory = None
+        self.lastCheckedCommand = 0
+        self.pendingEsr = 0
+        self.opcArmed = 0
+        # *ESE and *SRE masks to put back after arm_opc_event(), see restore_status_enables()
+        self.savedStatusEnables = None
+        self.errorStats = {'checks': 0, 'deferred': 0, 'transactions': 0}
+
+        self.profiler = None
+
+        # Windows and their trace slots are read once and then kept up to date by feed_trace()
+        self.windowLayout = None
 
     def close(self):
         """Gracefully closes PyVISA instrument connection."""
         
+        if self.capabilitiesChanged:
+            self.write_capability_cache()
         self.inst.close()
         del self.inst
 
+    @contextmanager
+    def batch(self, maxMessageSize=4096):
+        """Context manager that coalesces writes into compound SCPI messages to reduce the number of VISA transactions.
+
+        Buffered writes are flushed automatically before any query, binary transfer, or timeout change, and when the
+        context exits. Errors are still reported through the error queue, so err_check() works as usual.
+
+        Example:
+            with vna.batch():
+                vna.configure_sparam_stimulus(startFreq=1e9, stopFreq=2e9, ch=1)
+                vna.configure_receiver_leveling(port=1, ch=1)
+
+        Args:
+            maxMessageSize (int): Maximum length in bytes of a single compound message. [default is 4096]
+        """
+
+        # Nested batches share the outermost buffer
+        if isinstance(self.inst, BatchedResource):
+            yield
+            return
+
+        batched = BatchedResource(self.inst, maxMessageSize)
+        self.inst = batched
+        try:
+            yield
+        finally:
+            self.inst = batched.inst
+            batched.flush()
+
     # region Helper Functions
+    def read_capability_cache(self):
+        """Returns the contents of the capability cache file, or an empty dict if there is no cache or it can't be read."""
+
+        if not self.capabilityCache:
+            return {}
+        with capabilityCacheLock:
+            try:
+                with open(self.capabilityCache, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+
+    def write_capability_cache(self):
+        """Stores the capabilities read so far in the capability cache file, keeping the entries of other VNAs."""
+
+        if not self.capabilityCache:
+            return
+        with capabilityCacheLock:
+            try:
+                with open(self.capabilityCache, 'r') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+            entries[self.capabilityKey] = self.capabilities
+
+            # Written to a temporary file first so a reader never sees a partial file
+            directory = os.path.dirname(os.path.abspath(self.capabilityCache))
+            os.makedirs(directory, exist_ok=True)
+            tempPath = f'{self.capabilityCache}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tempPath, 'w') as f:
+                json.dump(entries, f, indent=1)
+            os.replace(tempPath, self.capabilityCache)
+        self.capabilitiesChanged = 0
+
+    def load_capability(self, name):
+        """Queries one capability from the VNA and adds it to capabilities and the capability cache.
+
+        Args:
+            name (str): Capability name. ['instOptions', 'numPorts', 'portCatalog', 'numSources', 'sourceCatalog']
+        """
+
+        query, parse = CAPABILITY_QUERIES[name]
+        self.capabilities[name] = parse(self.inst.query(query))
+        self.capabilitiesChanged = 1
+
+        # The cache file is written once all capabilities are known rather than after each one, and by close() otherwise
+        if all(n in self.capabilities for n in CAPABILITY_QUERIES):
+            self.write_capability_cache()
+
+    def refresh_capabilities(self):
+        """Queries all capabilities from the VNA again and updates the capability cache, e.g. after installing an option or connecting a test set."""
+
+        self.capabilities = {}
+        for name, (query, parse) in CAPABILITY_QUERIES.items():
+            self.capabilities[name] = parse(self.inst.query(query))
+        self.write_capability_cache()
+
     def print_capabilities(self):
         """Prints instrument information to the console."""
 
@@ -93,21 +515,212 @@ class pyvisaVNA:
         print(f'Source Catalog: {self.sourceCatalog}')
         print(f'Options: {self.instOptions}')
 
-    def err_check(self):
-        """Prints out all errors and clears error queue. Raises an Exception with the info of the errors encountered."""
+    def set_error_policy(self, policy='esr', trackCommands=1, historySize=256):
+        """Selects how err_check() looks for errors.
 
-        err = []
+        'immediate' reads the error queue with syst:err? on every check, which costs at least one query even when nothing failed.
+        'esr' reads the error bits of the standard event status register with *ESR? and only reads the error queue when one is set.
+        'stb' does the same with a serial poll of the error queue bit of the status byte, which doesn't use the message queue.
+        'deferred' skips checks until check_deferred_errors() is called, see also deferred_errors().
 
-        # Query errors and remove extra characters
-        temp = self.inst.query('syst:err?').strip().replace('+', '').replace('-', '')
+        Args:
+            policy (str): Error checking policy. ['immediate', 'esr', 'stb', 'deferred', default is 'esr']
+            trackCommands (int): 1 records recent SCPI messages so errors can be correlated with the command that caused them, 0 stops recording. [default is 1]
+            historySize (int): Number of recent messages recorded. [default is 256]
+        """
+
+        if policy not in ['immediate', 'esr', 'stb', 'deferred']:
+            raise ValueError("Invalid 'policy', must be 'immediate', 'esr', 'stb', or 'deferred'.")
+        self.errorPolicy = policy
+
+        # The history wraps the raw resource, so it sits under any active batch() and sees the compound messages it sends
+        batched = self.inst if isinstance(self.inst, BatchedResource) else None
+        raw = batched.inst if batched else self.inst
+        if trackCommands and self.commandHistory is None:
+            self.commandHistory = CommandHistory(raw, historySize)
+            raw = self.commandHistory
+            self.lastCheckedCommand = 0
+        elif not trackCommands and self.commandHistory is not None:
+            self.remove_resource_wrapper(CommandHistory)
+            self.commandHistory = None
+            return
+        if batched:
+            batched.__dict__['inst'] = raw
+        else:
+            self.inst = raw
+
+    def remove_resource_wrapper(self, wrapperClass):
+        """Removes a resource wrapper such as CommandHistory or ProfiledResource from the chain of wrappers around the PyVISA resource.
+
+        Args:
+            wrapperClass (class): Class of the wrapper to be removed.
+        """
+
+        parent = None
+        node = self.inst
+        while not isinstance(node, wrapperClass):
+            if 'inst' not in getattr(node, '__dict__', {}):
+                return
+            parent = node
+            node = node.__dict__['inst']
+
+        if parent is None:
+            self.inst = node.inst
+        else:
+            parent.__dict__['inst'] = node.inst
 
-        # Read all errors until none are left
-        while temp != '0,"No error"':
-            # Build list of errors
-            err.append(temp)
-            temp = self.inst.query('syst:err?').strip().replace('+', '').replace('-', '')
-        if err:
-            raise Exception(err)
+    def enable_profiling(self, profiler=None):
+        """Starts timing every VISA transaction and every public method call, see vna_profiler.VNAProfiler.
+
+        Transactions are grouped by SCPI command header and attributed to the innermost public method that made them,
+        e.g. the new_sparam_trace() calls inside deembed_calset(). Profiling adds a few microseconds per call.
+
+        Args:
+            profiler (VNAProfiler): Profiler to report to, e.g. one shared by several VNAs. [default is None, creates a new VNAProfiler]
+
+        Returns:
+            (VNAProfiler): The profiler, use snapshot(), reset(), export_json(), or export_chrome_trace() on it.
+        """
+
+        # Imported here so the profiler is only loaded by scripts that use it
+        from vna_profiler import ProfiledResource, VNAProfiler, profiled_method_names
+
+        if self.profiler is not None:
+            self.disable_profiling()
+        self.profiler = profiler if profiler is not None else VNAProfiler()
+
+        # The profiler sits under any active batch() so it times the compound messages that are actually sent
+        batched = self.inst if isinstance(self.inst, BatchedResource) else None
+        profiled = ProfiledResource(batched.inst if batched else self.inst, self.profiler)
+        if batched:
+            batched.__dict__['inst'] = profiled
+        else:
+            self.inst = profiled
+
+        # Instance attributes shadow the class methods, so calls between methods are timed too
+        for name in profiled_method_names(type(self)):
+            setattr(self, name, self.profiler.wrap_method(name, getattr(self, name)))
+
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stops timing transactions and method calls. The profiler keeps the statistics collected so far.
+
+        Returns:
+            (VNAProfiler): The profiler that was in use, None if profiling wasn't enabled.
+        """
+
+        profiler = self.profiler
+        if profiler is None:
+            return None
+
+        from vna_profiler import ProfiledResource, profiled_method_names
+        self.remove_resource_wrapper(ProfiledResource)
+        for name in profiled_method_names(type(self)):
+            self.__dict__.pop(name, None)
+        self.profiler = None
+
+        return profiler
+
+    @contextmanager
+    def deferred_errors(self):
+        """Context manager that defers error checks to the end of a block, so a sequence of configuration calls costs one error check.
+
+        Errors are correlated with the commands sent inside the block, up to the size of the command history.
+
+        Example:
+            with vna.deferred_errors():
+                vna.configure_sparam_stimulus(startFreq=1e9, stopFreq=2e9, ch=1)
+                vna.new_sparam_trace('S21', 'S21', ch=1)
+        """
+
+        if self.errorPolicy == 'deferred':
+            yield
+            return
+
+        previousPolicy = self.errorPolicy
+        self.errorPolicy = 'deferred'
+        try:
+            yield
+        finally:
+            self.errorPolicy = previousPolicy
+        self.check_deferred_errors()
+
+    def check_deferred_errors(self):
+        """Runs the error check skipped by the 'deferred' policy. Raises VNAError if the VNA reported errors."""
+
+        self.err_check(force=1)
+
+    def err_check(self, force=0):
+        """Reads and clears the error queue according to errorPolicy. Raises a VNAError with the info of the errors encountered.
+
+        Args:
+            force (int): 1 checks for errors even if errorPolicy is 'deferred'. [default is 0]
+        """
+
+        self.restore_status_enables()
+        if self.errorPolicy == 'deferred' and not force:
+            self.errorStats['deferred'] += 1
+            return
+        self.errorStats['checks'] += 1
+
+        # Messages sent since the last check, taken before the checks below add their own queries
+        commands = []
+        if self.commandHistory is not None:
+            commands = [message for sequence, message in self.commandHistory.since(self.lastCheckedCommand)]
+
+        try:
+            if self.errorPolicy != 'immediate':
+                # Command, execution, device-dependent, and query error bits. *ESR? clears the OPC bit that arm_opc_event() waits for, so poll the status byte then
+                if self.errorPolicy == 'stb' or self.opcArmed:
+                    errorBit = self.inst.read_stb() & (1 << 2)
+                else:
+                    errorBit = (int(self.inst.query('*esr?')) | self.pendingEsr) & 0b111100
+                    self.pendingEsr = 0
+                self.errorStats['transactions'] += 1
+                if not errorBit:
+                    return
+
+            errors = []
+            while True:
+                response = self.inst.query('syst:err?').strip()
+                self.errorStats['transactions'] += 1
+                code, _, message = response.partition(',')
+                code = int(float(code))
+                if code == 0:
+                    break
+                message = message.strip().strip('"')
+                errors.append({'code': code, 'message': message, 'command': self.find_error_command(message, commands), 'commands': commands})
+        finally:
+            if self.commandHistory is not None:
+                self.lastCheckedCommand = self.commandHistory.count
+
+        if errors:
+            # Any failed command could have been a window or trace change, so the local window layout can't be trusted anymore
+            self.clear_window_layout()
+            raise VNAError(errors)
+
+    def find_error_command(self, message, commands):
+        """Returns the SCPI command most likely to have caused an error, or None if it can't be determined.
+
+        The VNA usually appends the offending header to the error message after a semicolon. If it doesn't and only one command was sent since the last check, that command is returned.
+
+        Args:
+            message (str): Error message from syst:err?.
+            commands (list): Messages sent since the last error check, oldest first.
+        """
+
+        # Compound messages from batch() are split back into their commands
+        parts = [part.strip().lstrip(':') for command in commands for part in command.split(';') if part.strip()]
+        detail = message.partition(';')[2].strip().strip('"').lower()
+        if detail:
+            for part in reversed(parts):
+                header = part.split()[0].lower()
+                if detail in part.lower() or header in detail:
+                    return part
+        if len(parts) == 1:
+            return parts[0]
+        return None
 
     def source_unleveled_check(self):
         """Checks if a VNA source is unleveled and raises an exception if it is."""
@@ -125,6 +738,8 @@ class pyvisaVNA:
             tempTimeout (int): Temporary timeout in ms to be used if non-standard timeout is desired. [default is None]
         """
         
+        self.restore_status_enables()
+
         if tempTimeout:
             # If a specified timeout value is entered, temporarily stores the original timeout with the variable originalTimeout, then sets the new specified timeout. After querying opc, the timeout value is set back to the original
             originalTimeout = self.inst.timeout
@@ -135,6 +750,104 @@ class pyvisaVNA:
             # If NO specified timeout value is entered, the original timeout values will be used for querying opc
             self.inst.query('*opc?')
 
+    def arm_opc_event(self, callback=None, useSrq=0, pollInterval=0.01, stallTimeoutMs=None):
+        """Sends *OPC and returns a future that completes when all pending operations finish, without blocking the VISA session.
+
+        Completion is detected from the ESB bit of the status byte, either with a service request (SRQ) or by polling
+        the status byte with serial polls, which don't use the message queue. Other commands can be sent while waiting.
+        The event status enable (*ESE) and service request enable (*SRE) masks are restored by the first wait_for_opc(),
+        err_check(), or arm_opc_event() after the operation completes, from the calling thread.
+
+        Args:
+            callback (function): Optional function called with the future when it completes. [default is None]
+            useSrq (int): 1 waits for a service request, 0 polls the status byte. Use 0 if the interface doesn't support SRQ. [0, 1, default is 0]
+            pollInterval (float): Time in seconds between status byte polls. [default is 0.01]
+            stallTimeoutMs (int): Time in ms after which the operation is considered stalled and the future fails with TimeoutError. [default is None, uses the VISA timeout]
+
+        Returns:
+            (Future): Resolves to the time in seconds spent waiting for completion.
+        """
+
+        stallTimeoutMs = stallTimeoutMs if stallTimeoutMs is not None else self.inst.timeout
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        if useSrq:
+            self.inst.enable_event(pyvisa.constants.EventType.service_request, pyvisa.constants.EventMechanism.queue)
+
+        # Only the OPC bit of the ESR sets ESB in the status byte, and the *ESR? read clears any completion left over from a previous *OPC
+        # The current enable masks are read in the same message so they can be restored afterwards. Error bits read here are kept for the next err_check()
+        self.restore_status_enables()
+        oldEse, oldSre, esr = self.inst.query(f'*ese?;*sre?;*ese 1;*sre {32 if useSrq else 0};*esr?;*opc').strip().split(';')
+        self.pendingEsr |= int(esr) & 0b111100
+        # If the previous operation is still pending its masks haven't been restored yet, so the ones saved then are kept
+        if self.savedStatusEnables is None:
+            self.savedStatusEnables = (int(oldEse), int(oldSre))
+        self.opcArmed = 1
+        startTime = time.perf_counter()
+
+        # The monitor thread uses the resource under any active batch() so its polls don't flush writes buffered by the main thread
+        inst = self.inst.inst if isinstance(self.inst, BatchedResource) else self.inst
+
+        def monitor():
+            try:
+                if useSrq:
+                    try:
+                        inst.wait_on_event(pyvisa.constants.EventType.service_request, stallTimeoutMs)
+                    except pyvisa.errors.VisaIOError as e:
+                        if e.error_code != pyvisa.constants.StatusCode.error_timeout:
+                            raise
+                        raise TimeoutError(f'Operation did not complete within {stallTimeoutMs} ms.')
+                    finally:
+                        inst.disable_event(pyvisa.constants.EventType.service_request, pyvisa.constants.EventMechanism.queue)
+                else:
+                    while not inst.read_stb() & 32:
+                        if stallTimeoutMs is not None and time.perf_counter() - startTime > stallTimeoutMs / 1000:
+                            raise TimeoutError(f'Operation did not complete within {stallTimeoutMs} ms.')
+                        time.sleep(pollInterval)
+                self.opcArmed = 0
+                future.set_result(time.perf_counter() - startTime)
+            except Exception as e:
+                self.opcArmed = 0
+                future.set_exception(e)
+
+        threading.Thread(target=monitor, daemon=True).start()
+
+        return future
+
+    def restore_status_enables(self):
+        """Puts back the *ESE and *SRE masks that arm_opc_event() replaced, once the operation it waits for is complete.
+
+        This sends a message, so it is only done from the thread that uses the session and never from the arm_opc_event()
+        monitor thread: a new message makes the VNA discard any response the other thread hasn't read yet.
+        """
+
+        if self.savedStatusEnables is None or self.opcArmed:
+            return
+        ese, sre = self.savedStatusEnables
+        self.savedStatusEnables = None
+        self.inst.write(f'*ese {ese};*sre {sre}')
+
+    def start_sweep(self, ch=1, callback=None, useSrq=0, pollInterval=0.01, stallTimeoutMs=None):
+        """Starts a single sweep and returns immediately with a future that completes when the sweep is finished. See arm_opc_event().
+
+        Args:
+            ch (int): Channel on which the acquisition will be performed. [default is 1]
+            callback (function): Optional function called with the future when the sweep completes. [default is None]
+            useSrq (int): 1 waits for a service request, 0 polls the status byte. [0, 1, default is 0]
+            pollInterval (float): Time in seconds between status byte polls. [default is 0.01]
+            stallTimeoutMs (int): Time in ms after which the sweep is considered stalled. [default is None, uses the VISA timeout]
+
+        Returns:
+            (Future): Resolves to the time in seconds spent waiting for the sweep.
+        """
+
+        self.inst.write('trigger:source immediate')
+        self.inst.write(f'sense{ch}:sweep:mode single')
+
+        return self.arm_opc_event(callback=callback, useSrq=useSrq, pollInterval=pollInterval, stallTimeoutMs=stallTimeoutMs)
+
     def preset(self, clearAll=1):
         """Presets the VNA, and optionally clears all traces and windows.
 
@@ -153,10 +866,56 @@ class pyvisaVNA:
             self.inst.write('*rst')
         
         self.wait_for_opc()
+        self.clear_meas_num_cache()
+        self.clear_freq_cache()
+        self.clear_format_state()
+        self.clear_window_layout()
+
+    def set_data_format(self, dataFormat='real,64', byteOrder=None):
+        """Sets the data transfer format and byte order, only sending the commands that change the known state.
+
+        Any method that changes the format should use this method (or call clear_format_state()) so the tracked state stays accurate.
+
+        Args:
+            dataFormat (str): Data transfer format. ['real,64', 'real,32', 'ascii', default is 'real,64']
+            byteOrder (str): Byte order for binary formats. 'swapped' is little-endian, which is what PyVISA expects by default. ['swapped', 'normal', default is None, leaves byte order unchanged]
+        """
+
+        validFormats = ['real,64', 'real,32', 'ascii']
+        dataFormat = dataFormat.replace(' ', '').lower()
+        if dataFormat == 'ascii,0':
+            dataFormat = 'ascii'
+        if dataFormat not in validFormats:
+            raise ValueError("Invalid 'dataFormat', must be 'real,64', 'real,32', or 'ascii'.")
+
+        if byteOrder is not None:
+            validByteOrders = ['swapped', 'normal']
+            byteOrder = 'swapped' if byteOrder.lower() == 'swap' else byteOrder.lower()
+            if byteOrder not in validByteOrders:
+                raise ValueError("Invalid 'byteOrder', must be 'swapped' or 'normal'.")
+
+            if byteOrder != self.byteOrder:
+                self.inst.write(f'format:border {byteOrder}')
+                self.byteOrder = byteOrder
+
+        if dataFormat != self.dataFormat:
+            self.inst.write(f'format {dataFormat}')
+            self.dataFormat = dataFormat
+
+    def clear_format_state(self):
+        """Forgets the tracked data format and byte order so the next set_data_format() call resends them. Use this if the format is changed outside of this class."""
+
+        self.dataFormat = None
+        self.byteOrder = None
+        self.snpFormat = None
 
     def get_meas_number_from_name(self, measName, ch=1):
         """Gets measurement number from measurement name. This is a helper function used in other class methods and is not intended to be used on its own.
 
+        Measurement numbers are cached per channel, so only the first lookup in a channel talks to the VNA.
+        The cache is cleared by the new_*_trace methods, preset(), and recall_state_file(). If measurements are
+        added or deleted outside of this class (e.g. from the front panel), call clear_meas_num_cache().
+
         Args:
             measName (string): Name of the measurement from which to get the corresponding measurement number
             ch (int): Channel to which the measurement belongs. [default is 1]
@@ -165,12 +924,107 @@ class pyvisaVNA:
             int: The measuremnt number of the specified measurement name
         """
 
+        if (ch, measName) not in self.measNumCache:
+            self.load_meas_num_cache(ch)
+
+        if (ch, measName) in self.measNumCache:
+            return self.measNumCache[(ch, measName)]
+
+        # Not found in the channel catalog, fall back to asking the VNA directly so it can report the error
         # Select trace
         self.inst.write(f'calculate{ch}:parameter:select "{measName}"')
         
         # Get measurement number of the selected trace
         return int(self.inst.query(f'calculate{ch}:parameter:mnumber?'))
 
+    def load_meas_num_cache(self, ch=1):
+        """Reads all measurement numbers and names in a channel from the VNA and stores them in measNumCache.
+
+        Args:
+            ch (int): Channel from which measurement numbers are loaded. [default is 1]
+        """
+
+        # Discard stale entries for this channel
+        for key in [k for k in self.measNumCache if k[0] == ch]:
+            del self.measNumCache[key]
+
+        rawNums = self.inst.query(f'system:measure:catalog? {ch}').strip('"\n')
+        if not rawNums or 'empty' in rawNums.lower():
+            return
+        measNums = [int(n) for n in rawNums.split(',')]
+
+        # Ask for every name in one compound query: "name1";"name2";...
+        rawNames = self.inst.query(';:'.join(f'system:measure{n}:name?' for n in measNums))
+        measNames = re.findall(r'"([^"]*)"', rawNames)
+
+        if len(measNames) == len(measNums):
+            for n, name in zip(measNums, measNames):
+                self.measNumCache[(ch, name)] = n
+
+    def clear_meas_num_cache(self, ch=None):
+        """Clears cached measurement numbers.
+
+        Args:
+            ch (int): Channel for which the cache is cleared. [default is None, clears all channels]
+        """
+
+        if ch is None:
+            self.measNumCache.clear()
+        else:
+            for key in [k for k in self.measNumCache if k[0] == ch]:
+                del self.measNumCache[key]
+
+    def load_window_layout(self):
+        """Reads the windows and the trace numbers used in each of them from the VNA into windowLayout."""
+
+        self.windowLayout = {}
+        windows = self.inst.query('display:catalog?').strip().strip('"')
+        if 'empty' in windows.lower():
+            return
+        for w in windows.split(','):
+            # VNA returns the string 'EMPTY' if a window has no traces defined in it
+            traces = self.inst.query(f'display:window{w}:catalog?').strip().strip('"')
+            self.windowLayout[int(w)] = [] if 'empty' in traces.lower() else [int(t) for t in traces.split(',')]
+
+    def clear_window_layout(self):
+        """Forgets windowLayout so it is read from the VNA again. Call this if windows or traces are changed outside of this class, e.g. from the front panel."""
+
+        self.windowLayout = None
+
+    def feed_trace(self, measName, win=1):
+        """Displays a measurement in the next free trace slot of a window, creating the window if it doesn't exist.
+
+        The window layout is read from the VNA the first time it is needed and then kept up to date locally, so adding traces doesn't need any queries.
+        The local layout is best-effort: it assumes the feed succeeds, and is discarded (and read again on the next call) when the write fails or
+        err_check() reports any error. Call clear_window_layout() after changing windows or traces any other way.
+
+        Args:
+            measName (str): Name of the measurement to be displayed.
+            win (int): Window in which the measurement will be displayed. [default is 1]
+
+        Returns:
+            (int): Trace number of the measurement in the window.
+        """
+
+        if self.windowLayout is None:
+            self.load_window_layout()
+
+        # If the specified window doesn't exist, create it by turning it on
+        if win not in self.windowLayout:
+            self.inst.write(f'display:window{win}:state on')
+            self.windowLayout[win] = []
+
+        traces = self.windowLayout[win]
+        nextTrace = max(traces) + 1 if traces else 1
+        try:
+            self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        except Exception:
+            self.clear_window_layout()
+            raise
+        traces.append(nextTrace)
+
+        return nextTrace
+
     def get_meas_names(self, ch=1, includeParams=0):
         """Gets all measurement names for a given channel.
 
@@ -237,52 +1091,555 @@ class pyvisaVNA:
         self.inst.write(f'calculate{ch}:parameter:select "{measName}"')
 
         # Format data for transfer.
-        self.inst.write('format:border swap')
-        self.inst.write('format real,64')  # Data type is double/float64, not int64.
+        self.set_data_format('real,64', byteOrder='swapped')  # Data type is double/float64, not int64.
 
         # Acquire measurement data.
         meas = self.inst.query_binary_values(f'calculate{ch}:data? fdata', datatype='d')
         self.wait_for_opc()
 
         # Acquire frequency data.
-        freq = self.inst.query_binary_values(f'calculate{ch}:x?', datatype='d')
+        freq = self.get_x_axis(ch).tolist()
+
+        return freq, meas
+
+    def get_x_axis(self, ch=1):
+        """Gets the x-axis (usually frequency) values of the selected measurement in a channel, reusing the cached values when possible.
+
+        Args:
+            ch (int): Channel from which the x-axis is queried. [default is 1]
+
+        Returns:
+            (NumPy ndArray): Read-only x-axis values.
+        """
+
+        if self.useFreqCache and ch in self.freqCache:
+            return self.freqCache[ch]
+
+        self.set_data_format('real,64', byteOrder='swapped')
+        freq = self.query_binary_array(f'calculate{ch}:x?')
+        self.wait_for_opc()
+
+        if self.useFreqCache and ch not in self.noFreqCacheChannels:
+            self.freqCache[ch] = freq
+
+        return freq
+
+    def clear_freq_cache(self, ch=None):
+        """Clears cached x-axis values.
+
+        Args:
+            ch (int): Channel for which the cache is cleared. [default is None, clears all channels]
+        """
+
+        if ch is None:
+            self.freqCache.clear()
+            self.noFreqCacheChannels.clear()
+        else:
+            self.freqCache.pop(ch, None)
+
+    def query_binary_array(self, message, out=None):
+        """Sends a query and returns the IEEE 488.2 definite-length block response as a NumPy array without converting through Python floats.
+
+        The data format must be real,64 or real,32 (see set_data_format()). The byte order is taken from the tracked format state.
+
+        Args:
+            message (str): SCPI query that returns a binary block, e.g. 'calculate1:data? fdata'.
+            out (NumPy ndArray): Optional preallocated float64 array that receives the data. Must have at least as many elements as the response. [default is None]
+
+        Returns:
+            (NumPy ndArray): The response data. If out is None this is a read-only view of the received bytes, otherwise it is a view of out.
+        """
+
+        if self.dataFormat not in ['real,64', 'real,32']:
+            raise ValueError("query_binary_array requires a binary data format, use set_data_format('real,64').")
+
+        dtype = np.dtype('f8' if self.dataFormat == 'real,64' else 'f4').newbyteorder('<' if self.byteOrder == 'swapped' else '>')
+
+        self.inst.write(message)
+        raw, offset, length = read_ieee_block(self.inst, self.inst.read_raw())
+
+        data = np.frombuffer(raw, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+        data.flags.writeable = False
+        if out is None:
+            return data
+
+        if out.size < data.size:
+            raise ValueError(f'Output buffer too small: {out.size} elements provided, {data.size} required.')
+        out[:data.size] = data
+        return out[:data.size]
+
+    def get_trace_array(self, measName, ch=1, freqOut=None, measOut=None, pooled=0):
+        """Acquires frequency and measurement data as NumPy arrays. Faster than get_trace() for large traces and continuous acquisition loops.
+
+        Args:
+            measName (str): Measurement from which data will be taken.
+            ch (int): Channel to which the measurement belongs. [default is 1]
+            freqOut (NumPy ndArray): Optional preallocated float64 array that receives the frequency data. [default is None]
+            measOut (NumPy ndArray): Optional preallocated float64 array that receives the measurement data. [default is None]
+            pooled (int): 1 reuses arrays from tracePool for this measurement instead of allocating new ones. Returned arrays are overwritten by the next pooled call for the same measurement. [0, 1, default is 0]
+
+        Returns:
+            freq (NumPy ndArray): Measurement frequency (x-axis) values.
+            meas (NumPy ndArray): Measurment data (y-axis) values.
+        """
+
+        if not isinstance(measName, str):
+            raise TypeError('measName must be a string.')
+
+        # Select measurement to be transferred.
+        self.inst.write(f'calculate{ch}:parameter:select "{measName}"')
+
+        # Format data for transfer.
+        self.set_data_format('real,64', byteOrder='swapped')
+
+        # Acquire measurement data.
+        meas = self.query_binary_array(f'calculate{ch}:data? fdata')
         self.wait_for_opc()
 
+        # Acquire frequency data.
+        freq = self.get_x_axis(ch)
+
+        if pooled and freqOut is None and measOut is None:
+            # Grow the pooled arrays only when the number of points increases
+            freqOut, measOut = self.tracePool.get((ch, measName), (np.empty(0), np.empty(0)))
+            if freqOut.size < freq.size:
+                freqOut = np.empty(freq.size)
+            if measOut.size < meas.size:
+                measOut = np.empty(meas.size)
+            self.tracePool[(ch, measName)] = (freqOut, measOut)
+
+        if freqOut is not None:
+            freqOut[:freq.size] = freq
+            freq = freqOut[:freq.size]
+        if measOut is not None:
+            measOut[:meas.size] = meas
+            meas = measOut[:meas.size]
+
         return freq, meas
 
-    def get_file(self, vnaPath, remotePath):
+    def query_binary_arrays(self, messages, maxMessageSize=4096):
+        """Sends several binary block queries as compound messages and returns each response as a NumPy array.
+
+        The data format must be real,64 or real,32 (see set_data_format()). Queries are joined into as few messages
+        as maxMessageSize allows, so the number of round trips does not grow with the number of queries.
+
+        Args:
+            messages (list): SCPI queries that each return a binary block, e.g. ['calculate1:measure1:data? fdata', 'calculate1:measure1:x?'].
+            maxMessageSize (int): Maximum length in bytes of a single compound query. [default is 4096]
+
+        Returns:
+            (list): Read-only NumPy arrays, one per query in the same order as messages.
+        """
+
+        if self.dataFormat not in ['real,64', 'real,32']:
+            raise ValueError("query_binary_arrays requires a binary data format, use set_data_format('real,64').")
+
+        dtype = np.dtype('f8' if self.dataFormat == 'real,64' else 'f4').newbyteorder('<' if self.byteOrder == 'swapped' else '>')
+
+        # Split the queries into groups that fit in one compound message each
+        groups = [[]]
+        groupSize = 0
+        for message in messages:
+            message = message.strip().lstrip(':')
+            if groups[-1] and groupSize + len(message) + 2 > maxMessageSize:
+                groups.append([])
+                groupSize = 0
+            groups[-1].append(message)
+            groupSize += len(message) + 2
+
+        arrays = []
+        for group in groups:
+            if not group:
+                continue
+            self.inst.write(';:'.join(group))
+
+            # Responses arrive as one message with the blocks separated by semicolons
+            raw = self.inst.read_raw()
+            for _ in group:
+                raw, offset, length = read_ieee_block(self.inst, raw)
+                array = np.frombuffer(raw, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+                array.flags.writeable = False
+                arrays.append(array)
+
+                # Only the bytes after this block are carried over, so each block's data is copied at most once
+                raw = raw[offset + length:]
+
+        return arrays
+
+    def new_traces(self, specs, maxMessageSize=4096):
+        """Creates all traces of a measurement setup at once, e.g. every trace of a multi-channel test plan.
+
+        Every spec is checked against MEASUREMENT_CLASSES and the measurement names already on the VNA before any trace
+        is created, so an invalid spec leaves the VNA untouched. The define and feed commands are then sent in compound messages with a single *OPC? and one
+        err_check() for the whole set, instead of one of each per trace as in the new_*_trace methods.
+
+        Example:
+            measNums = vna.new_traces([
+                ('sparam', 'S21', 'S21', 1, 1),
+                ('sparam', 'S11', 'S11', 2, 1),
+                ('gca', 'CompIn', 'CompIn21', 3, 2),
+            ])
+
+        Args:
+            specs (list): Traces to create as (measurementClass, measName, measParam, win, ch) tuples, where measurementClass
+                is a key of MEASUREMENT_CLASSES, e.g. 'sparam', 'mod', or 'gca'. win and ch can be left off and default to 1.
+            maxMessageSize (int): Maximum length in bytes of a single compound message. [default is 4096]
+
+        Returns:
+            (list): Measurement number of each new trace, in the order of specs. The numbers are also stored in measNumCache.
+        """
+
+        traces = []
+        for spec in specs:
+            if not 3 <= len(spec) <= 5:
+                raise ValueError(f'Invalid trace spec {spec}, must be (measurementClass, measName, measParam, win, ch).')
+            measClass, measName, measParam, win, ch = tuple(spec) + (1, 1)[len(spec) - 3:]
+
+            if measClass not in MEASUREMENT_CLASSES:
+                raise ValueError(f"Invalid measurementClass: {measClass}, must be one of {', '.join(MEASUREMENT_CLASSES)}.")
+            if not isinstance(measName, str) or not isinstance(measParam, str):
+                raise TypeError('measName and measParam must be strings.')
+            validParams = MEASUREMENT_CLASSES[measClass]['validParams']
+            if validParams is not None and measParam not in validParams:
+                raise ValueError(f"Invalid 'measParam': {measParam} for measurementClass {measClass}, check measurement parameter argument.")
+            for name, value in [('win', win), ('ch', ch)]:
+                if not isinstance(value, numbers.Integral) or isinstance(value, bool) or value < 1:
+                    raise ValueError(f"Invalid '{name}': {value}, must be a positive integer.")
+            # Measurement names are global on the VNA, not per channel
+            if any(measName == t[1] for t in traces):
+                raise ValueError(f'Duplicate measurement name {measName}, names must be unique across all channels.')
+            traces.append((measClass, measName, measParam, int(win), int(ch)))
+
+        # Names already in use in any channel, read with one catalog query and one compound name query
+        rawNums = self.inst.query('system:measure:catalog?').strip('"\n')
+        if rawNums and 'empty' not in rawNums.lower():
+            rawNames = self.inst.query(';:'.join(f'system:measure{n}:name?' for n in rawNums.split(',')))
+            usedNames = set(re.findall(r'"([^"]*)"', rawNames))
+            clashes = [t[1] for t in traces if t[1] in usedNames]
+            if clashes:
+                raise ValueError(f"Measurement names already in use on the VNA: {', '.join(clashes)}.")
+
+        channels = list(dict.fromkeys(t[4] for t in traces))
+        for ch in channels:
+            self.clear_meas_num_cache(ch)
+            self.clear_freq_cache(ch)
+
+        # The *OPC? goes out compounded with the last buffered commands, see BatchedResource.query()
+        with self.batch(maxMessageSize):
+            for measClass, measName, measParam, win, ch in traces:
+                className = MEASUREMENT_CLASSES[measClass]['className']
+                if className is None:
+                    self.inst.write(f'calc{ch}:parameter:define:extended "{measName}", "{measParam}"')
+                else:
+                    self.inst.write(f'calc{ch}:custom:define "{measName}", "{className}", "{measParam}"')
+                self.feed_trace(measName, win)
+            self.wait_for_opc()
+        self.err_check()
+
+        for ch in channels:
+            self.load_meas_num_cache(ch)
+        return [self.get_meas_number_from_name(measName, ch) for measClass, measName, measParam, win, ch in traces]
+
+    def get_traces(self, specs, maxMessageSize=4096):
+        """Acquires frequency and measurement data for many measurements across channels with as few transactions as possible.
+
+        Measurements are addressed by number (see get_meas_number_from_name()) so nothing is selected, data and any
+        uncached x-axes are requested in compound queries, and a single *OPC? is sent for the whole set.
+
+        Args:
+            specs (list): Measurements to acquire as (measName, ch) tuples. A plain measurement name is assumed to be in channel 1.
+            maxMessageSize (int): Maximum length in bytes of a single compound query. [default is 4096]
+
+        Returns:
+            (dict): {measName: (freq, meas)} as NumPy arrays. Measurements in the same channel share one freq array.
+        """
+
+        traces = []
+        for spec in specs:
+            measName, ch = (spec, 1) if isinstance(spec, str) else spec
+            if not isinstance(measName, str):
+                raise TypeError('measName must be a string.')
+            traces.append((measName, ch, self.get_meas_number_from_name(measName, ch)))
+
+        self.set_data_format('real,64', byteOrder='swapped')
+
+        # X-axes are shared per channel, except in channels where measurements can have different x-axes
+        queries = [f'calculate{ch}:measure{measNum}:data? fdata' for measName, ch, measNum in traces]
+        xKeys = []
+        for measName, ch, measNum in traces:
+            xKey = (ch, measNum) if ch in self.noFreqCacheChannels else (ch, None)
+            if xKey in xKeys or (xKey[1] is None and self.useFreqCache and ch in self.freqCache):
+                continue
+            xKeys.append(xKey)
+            queries.append(f'calculate{ch}:measure{measNum}:x?')
+
+        arrays = self.query_binary_arrays(queries, maxMessageSize=maxMessageSize)
+        self.wait_for_opc()
+
+        freqs = dict(zip(xKeys, arrays[len(traces):]))
+        for (ch, measNum), freq in freqs.items():
+            if measNum is None and self.useFreqCache:
+                self.freqCache[ch] = freq
+
+        results = {}
+        for (measName, ch, measNum), meas in zip(traces, arrays):
+            xKey = (ch, measNum) if ch in self.noFreqCacheChannels else (ch, None)
+            results[measName] = (freqs.get(xKey, self.freqCache.get(ch)), meas)
+
+        return results
+
+    def stream_traces(self, measNames, ch=1, n=None, bufferSize=16, policy='block', tempTimeout=None):
+        """Continuously sweeps a channel and yields the data of each sweep from a preallocated ring buffer.
+
+        Sweeps run on a background thread that owns the VISA session until the generator is exhausted or closed,
+        so don't use this object for anything else while streaming. Memory use is fixed by bufferSize.
+
+        Args:
+            measNames (list): Measurements in the channel to acquire on every sweep.
+            ch (int): Channel to sweep. [default is 1]
+            n (int): Number of frames to yield. [default is None, streams until the generator is closed]
+            bufferSize (int): Number of frames that can wait in the ring buffer for the consumer. [default is 16]
+            policy (str): What happens when the buffer is full. 'block' pauses sweeping until a frame is consumed, 'drop_oldest' overwrites the oldest waiting frame, 'drop_newest' discards the new sweep. ['block', 'drop_oldest', 'drop_newest', default is 'block']
+            tempTimeout (int): Temporary timeout in ms for each sweep. [default is None]
+
+        Yields:
+            timestamp (float): Time the sweep finished in seconds since the epoch.
+            freq (NumPy ndArray): Measurement frequency (x-axis) values.
+            data (NumPy ndArray): Measurement data with shape (len(measNames), points), rows in the order of measNames. This is a view into the ring buffer that is only valid until the next frame is requested, copy it to keep it.
+        """
+
+        validPolicies = ['block', 'drop_oldest', 'drop_newest']
+        if policy not in validPolicies:
+            raise ValueError("Invalid 'policy', must be 'block', 'drop_oldest', or 'drop_newest'.")
+        if isinstance(measNames, str):
+            measNames = [measNames]
+        specs = [(measName, ch) for measName in measNames]
+
+        # Get the first sweep up front so the buffer can be sized before streaming starts
+        self.single_trigger(tempTimeout, ch)
+        traces = self.get_traces(specs)
+        freq = traces[measNames[0]][0]
+        numPoints = freq.size
+
+        # One slot more than bufferSize, the extra one is held by the consumer while it works on a frame
+        slots = np.empty((bufferSize + 1, len(measNames), numPoints))
+        free = deque(range(1, bufferSize + 1))
+        ready = deque()
+        condition = threading.Condition()
+        stop = threading.Event()
+        failure = []
+
+        for i, measName in enumerate(measNames):
+            slots[0, i] = traces[measName][1]
+        ready.append((0, time.time()))
+        self.streamStats = {'acquired': 1, 'dropped': 0, 'yielded': 0}
+
+        def produce():
+            try:
+                while not stop.is_set():
+                    self.single_trigger(tempTimeout, ch)
+                    timestamp = time.time()
+                    self.streamStats['acquired'] += 1
+
+                    with condition:
+                        while policy == 'block' and not free and not stop.is_set():
+                            condition.wait()
+                        if stop.is_set():
+                            return
+                        if free:
+                            slot = free.popleft()
+                        elif policy == 'drop_oldest':
+                            slot = ready.popleft()[0]
+                            self.streamStats['dropped'] += 1
+                        else:
+                            self.streamStats['dropped'] += 1
+                            continue
+
+                    traces = self.get_traces(specs)
+                    for i, measName in enumerate(measNames):
+                        if traces[measName][1].size != numPoints:
+                            raise ValueError('Number of points changed while streaming.')
+                        slots[slot, i] = traces[measName][1]
+
+                    with condition:
+                        ready.append((slot, timestamp))
+                        condition.notify_all()
+            except Exception as e:
+                failure.append(e)
+            finally:
+                with condition:
+                    stop.set()
+                    condition.notify_all()
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        held = None
+        try:
+            while n is None or self.streamStats['yielded'] < n:
+                with condition:
+                    # Hand the slot of the previous frame back to the producer
+                    if held is not None:
+                        free.append(held)
+                        held = None
+                        condition.notify_all()
+                    while not ready and not stop.is_set():
+                        condition.wait()
+                    if not ready:
+                        break
+                    held, timestamp = ready.popleft()
+
+                self.streamStats['yielded'] += 1
+                yield timestamp, freq, slots[held]
+
+            if failure:
+                raise failure[0]
+        finally:
+            with condition:
+                stop.set()
+                condition.notify_all()
+            producer.join()
+
+    def sweep_channels(self, specs, pipelined=1, tempTimeout=None, maxMessageSize=4096):
+        """Sweeps several channels once each and acquires their data, overlapping data transfer with the next channel's sweep.
+
+        Channels are swept in order of first appearance in specs. With pipelined=1, the sweep of channel N+1 is started as
+        soon as channel N is complete, and channel N's data is transferred while N+1 sweeps. Data is only read from a channel
+        after its own sweep has finished, so every trace comes from a complete sweep.
+
+        Args:
+            specs (list): Measurements to acquire as (measName, ch) tuples. A plain measurement name is assumed to be in channel 1.
+            pipelined (int): 1 overlaps transfers with sweeps, 0 sweeps and transfers each channel in turn like single_trigger() and get_trace(). [0, 1, default is 1]
+            tempTimeout (int): Temporary timeout in ms for each sweep. [default is None]
+            maxMessageSize (int): Maximum length in bytes of a single compound query, see get_traces(). [default is 4096]
+
+        Returns:
+            (dict): {measName: (freq, meas)} as NumPy arrays, see get_traces().
+        """
+
+        channels = {}
+        for spec in specs:
+            measName, ch = (spec, 1) if isinstance(spec, str) else spec
+            channels.setdefault(ch, []).append((measName, ch))
+        order = list(channels)
+
+        results = {}
+        if not pipelined:
+            for ch in order:
+                self.single_trigger(tempTimeout, ch)
+                results.update(self.get_traces(channels[ch], maxMessageSize=maxMessageSize))
+            return results
+
+        self.single_trigger(tempTimeout, order[0])
+        for i, ch in enumerate(order):
+            if i + 1 < len(order):
+                self.inst.write(f'sense{order[i + 1]}:sweep:mode single')
+
+            # The *OPC? at the end of get_traces() also waits for the sweep started above, so the next channel is complete when this returns
+            if tempTimeout:
+                originalTimeout = self.inst.timeout
+                self.inst.timeout = tempTimeout
+            try:
+                results.update(self.get_traces(channels[ch], maxMessageSize=maxMessageSize))
+            finally:
+                if tempTimeout:
+                    self.inst.timeout = originalTimeout
+
+        return results
+
+    def get_file(self, vnaPath, remotePath, chunkSize=1048576, progressCallback=None):
         """Transfers a file from "vnaPath" on the VNA to "remotePath" on the remote PC.
 
+        The file is streamed to disk in chunks, so host memory use does not depend on the file size.
+
         Args:
             vnaPath (str): Full absolute path of the file to be transferred from the VNA to the remote PC.
-            remotePath (str): Full absolute path of the destination file location on the remote PC.
+            remotePath (str or file object): Full absolute path of the destination file location on the remote PC, or a binary file object such as io.BytesIO to keep the file in memory.
+            chunkSize (int): Number of bytes read from the VNA at a time. [default is 1048576]
+            progressCallback (function): Optional function called after each chunk as progressCallback(bytesTransferred, totalBytes). [default is None]
+
+        Returns:
+            (dict): Transfer statistics. {'bytes': totalBytes, 'seconds': elapsedTime, 'bytesPerSecond': throughput}
         """
-        
-        # Transfer raw bytes from file on VNA hard drive to remote PC
-        dataBytes = self.inst.query_binary_values(f'mmemory:transfer? "{vnaPath}"', datatype='s', container=bytes)
+
+        startTime = time.perf_counter()
+
+        # Response is an IEEE 488.2 definite length block: '#', number of length digits, length, then the file contents
+        self.inst.write(f'mmemory:transfer? "{vnaPath}"')
+        header = self.inst.read_bytes(2)
+        if header[:1] != b'#':
+            raise ValueError(f'Unexpected response to file transfer query: {header}')
+        numDigits = int(header[1:2])
+        totalBytes = int(self.inst.read_bytes(numDigits)) if numDigits else 0
+
+        # Write file to remote PC file location as the data arrives
+        transferred = 0
+        with open(remotePath, mode='wb') if not hasattr(remotePath, 'write') else nullcontext(remotePath) as f:
+            while transferred < totalBytes:
+                chunk = self.inst.read_bytes(min(chunkSize, totalBytes - transferred))
+                f.write(chunk)
+                transferred += len(chunk)
+                if progressCallback is not None:
+                    progressCallback(transferred, totalBytes)
+
+        # Discard the termination character that follows the block
+        self.inst.read_bytes(1)
+
+        elapsed = time.perf_counter() - startTime
         self.err_check()
 
-        # Write file to remote PC file location
-        with open(remotePath, mode='wb') as f:
-                    f.write(dataBytes)
+        return {'bytes': totalBytes, 'seconds': elapsed, 'bytesPerSecond': totalBytes / elapsed if elapsed > 0 else 0.0}
 
-    def send_file(self, remotePath, vnaPath):
+    def send_file(self, remotePath, vnaPath, chunkSize=1048576, progressCallback=None):
         """Transfers file from "sourcePath" on the remote PC to "vnaPath" on the VNA.
 
+        The file is streamed from disk in chunks that are sent as one message, so host memory use does not depend on the file size.
+
         Args:
-            remotePath (str): Full absolute path of the file on the remote PC that will be transferred to the VNA.
+            remotePath (str or file object): Full absolute path of the file on the remote PC that will be transferred to the VNA, or a binary file object such as io.BytesIO. A file object is sent from its current position to its end.
             vnaPath (str): Full absolute path of the destination file location on the VNA.
+            chunkSize (int): Number of bytes written to the VNA at a time. [default is 1048576]
+            progressCallback (function): Optional function called after each chunk as progressCallback(bytesTransferred, totalBytes). [default is None]
+
+        Returns:
+            (dict): Transfer statistics. {'bytes': totalBytes, 'seconds': elapsedTime, 'bytesPerSecond': throughput}
         """
-        
-        with open(remotePath, mode='rb') as f:
-            rawBytes = f.read()
 
-        # self.inst.write('format:border swapped')
+        startTime = time.perf_counter()
+
+        if hasattr(remotePath, 'read'):
+            position = remotePath.tell()
+            totalBytes = remotePath.seek(0, os.SEEK_END) - position
+            remotePath.seek(position)
+        else:
+            totalBytes = os.path.getsize(remotePath)
+        lengthString = str(totalBytes)
+
         # Transfer raw bytes from file on remote PC to VNA hard drive
-        self.inst.write_binary_values(f'mmemory:transfer "{vnaPath}",', rawBytes, datatype='s')
-        
+        # END is held off until the final termination character so the VNA treats all chunks as a single message
+        transferred = 0
+        self.inst.send_end = False
+        try:
+            self.inst.write_raw(f'mmemory:transfer "{vnaPath}",#{len(lengthString)}{lengthString}'.encode('ascii'))
+            with open(remotePath, mode='rb') if not hasattr(remotePath, 'read') else nullcontext(remotePath) as f:
+                while transferred < totalBytes:
+                    chunk = f.read(min(chunkSize, totalBytes - transferred))
+                    if not chunk:
+                        raise IOError(f'{remotePath} changed size during transfer.')
+                    self.inst.write_raw(chunk)
+                    transferred += len(chunk)
+                    if progressCallback is not None:
+                        progressCallback(transferred, totalBytes)
+            self.inst.send_end = True
+            self.inst.write_raw(b'\n')
+        finally:
+            self.inst.send_end = True
+
+        elapsed = time.perf_counter() - startTime
         self.err_check()
 
+        return {'bytes': totalBytes, 'seconds': elapsed, 'bytesPerSecond': totalBytes / elapsed if elapsed > 0 else 0.0}
+
     def save_screenshot(self, filePath):
         """Saves a screenshot (MUST BE IN .bmp FORMAT) at destPath on the VNA.
         
@@ -536,6 +1893,10 @@ class pyvisaVNA:
 
         self.inst.write(f'mmemory:load:csarchive "{fileName}"')
         self.wait_for_opc()
+        self.clear_meas_num_cache()
+        self.clear_freq_cache()
+        self.clear_format_state()
+        self.clear_window_layout()
     
     def set_frequency_reference(self, isExtReference=1, refFreq=100e6):
         """Configures the VNA for external reference.
@@ -709,6 +2070,9 @@ class pyvisaVNA:
             ch (int): Channel to which calibration is applied. Default is 1.
         """
 
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
+
         availableCalSets = self.list_cal_sets()
         if calSet not in availableCalSets:
             raise ValueError('Selected cal set does not exist.')
@@ -717,6 +2081,21 @@ class pyvisaVNA:
         self.wait_for_opc()
         self.err_check()
 
+    def get_active_cal_set(self, ch=1):
+        """Gets the name of the cal set applied to a channel.
+
+        Args:
+            ch (int): Channel from which the cal set name is queried. [default is 1]
+
+        Returns:
+            (str): Name of the active cal set, None if no cal set is applied.
+        """
+
+        calSet = self.inst.query(f'sense{ch}:correction:cset:activate? name').strip().strip('"')
+        if not calSet or calSet.lower() == 'no calset selected':
+            return None
+        return calSet
+
     def define_smart_cal(self, numPorts=2, connectors=['APC 3.5 female', 'APC 3.5 female'], calKits=['N4691D User 1 ECal MY57450056', 'N4691D User 1 ECal MY57450056'], ch=1):
         """Defines the DUT connectors and cal kit for Smart Cal.
         
@@ -1002,6 +2381,9 @@ class pyvisaVNA:
             self.inst.write(f'SENSe{deembedChannel}:CORRection:CSET:FLATten "{finalCalset}"')
 
             self.inst.write(f'system:channels:delete {deembedChannel}')
+            self.clear_meas_num_cache(deembedChannel)
+            self.clear_freq_cache(deembedChannel)
+            self.clear_window_layout()
         else:
             self.inst.write(f'cset:fixture:deembed "{baseCalset}","intermediate","{portOneS2p}",1,1,0')
             self.wait_for_opc()
@@ -1229,8 +2611,7 @@ class pyvisaVNA:
         infoDict = self.get_individual_ecal_info(ecalNum)
         
         # Set formatting for s-param data
-        self.inst.write('format:border swap')
-        self.inst.write('format real,64')
+        self.set_data_format('real,64', byteOrder='swapped')
         # self.inst.write('format ascii,0')
 
         numPoints = int(infoDict[f'Char{char}']['NumberOfPoints'])
@@ -1317,29 +2698,11 @@ class pyvisaVNA:
 
         # Create new trace with name, parameter, and channel
         self.inst.write(f'calc{ch}:parameter:define:extended "{measName}", "{measParam}"')
+        self.clear_meas_num_cache(ch)
+        self.clear_freq_cache(ch)
         
-        # Check for windows
-        windows = self.inst.query('display:catalog?').split(',')
-        
-        # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-        # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-        
-        # If the specified window doesn't exist, create it by turning it on
-        if str(win) not in windows:
-            self.inst.write(f'display:window{win}:state on')
-
-        # See how many traces are in the window
-        traces = self.inst.query(f"display:window{win}:catalog?").strip()
-
-        # Determine the number of the 'next' trace in the window
-        # VNA returns the string 'EMPTY' if a window has no traces defined in it
-        if 'empty' in traces.lower():
-            nextTrace = 1
-        else:
-            nextTrace = len(traces.split(',')) + 1
-
-        # Feed the new trace into a window and check for errors
-        self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+        self.feed_trace(measName, win)
         
         self.wait_for_opc()
         self.err_check()
@@ -1356,6 +2719,9 @@ class pyvisaVNA:
             ch (int): Channel for which stimulus is configured. [default is 1]
         """
 
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
+
         self.inst.write(f'sense{ch}:frequency:start {startFreq}')
         self.inst.write(f'sense{ch}:frequency:stop {stopFreq}')
         self.inst.write(f'source{ch}:power {portPower}')
@@ -1384,6 +2750,71 @@ class pyvisaVNA:
 
         self.inst.write(f'calculate{ch}:measure{measNum}:data:snp:ports:save "{portString}","{fileName}"')
 
+    def set_snp_format(self, snpFormat='ri'):
+        """Sets the data format used for SNP files and SNP queries, only sending the command if it changes the known state.
+
+        Args:
+            snpFormat (str): SNP data format. 'ri' is real/imaginary, 'ma' is linear magnitude/degrees, 'db' is log magnitude/degrees. ['ri', 'ma', 'db', 'auto', default is 'ri']
+        """
+
+        validFormats = ['ri', 'ma', 'db', 'auto']
+        snpFormat = snpFormat.lower()
+        if snpFormat not in validFormats:
+            raise ValueError("Invalid 'snpFormat', must be 'ri', 'ma', 'db', or 'auto'.")
+
+        if snpFormat != self.snpFormat:
+            self.inst.write(f'mmemory:store:trace:format:snp {snpFormat}')
+            self.snpFormat = snpFormat
+
+    def get_snp_data(self, measName, ports=[1,2], ch=1):
+        """Acquires N-port S-parameter data directly as a binary block, without saving an snp file on the VNA.
+
+        The data is decoded from whichever SNP format was last set with set_snp_format(). If the format is unknown or 'auto', it is set to 'ri'.
+
+        Args:
+            measName (str): Name of a measurement in the channel, e.g. "MyVeryCoolS21Measurement".
+            ports (list): VNA ports from which data will be acquired, any number of ports from 1 to numPorts, including external test set ports. [default is [1,2]]
+            ch (int): Channel from which data will be acquired. [default is 1]
+
+        Returns:
+            freq (NumPy ndArray): Measurement frequency values.
+            sParams (NumPy ndArray): Complex S-parameters with shape (points, N, N), where sParams[:, i, j] is S(ports[i], ports[j]).
+        """
+
+        # numPorts is the instrument's port count, which includes the ports of an external test set
+        numPorts = len(ports)
+        if numPorts == 0 or len(set(ports)) != numPorts or not all(1 <= p <= self.numPorts for p in ports):
+            raise ValueError(f"Invalid 'ports', must be unique port numbers from 1 to {self.numPorts}.")
+
+        measNum = self.get_meas_number_from_name(measName, ch)
+
+        if self.snpFormat not in ['ri', 'ma', 'db']:
+            self.set_snp_format('ri')
+        self.set_data_format('real,64', byteOrder='swapped')
+
+        portString = ','.join(map(str, ports))
+        data = self.query_binary_array(f'calculate{ch}:measure{measNum}:data:snp:ports? "{portString}"')
+        self.wait_for_opc()
+
+        # Response is the frequency array followed by two arrays (e.g. real and imaginary) per S-parameter
+        numPoints = data.size // (1 + 2 * numPorts ** 2)
+        freq = data[:numPoints]
+        blocks = data[numPoints:numPoints * (1 + 2 * numPorts ** 2)].reshape(numPorts ** 2, 2, numPoints)
+
+        if self.snpFormat == 'ri':
+            values = blocks[:, 0] + 1j * blocks[:, 1]
+        elif self.snpFormat == 'ma':
+            values = blocks[:, 0] * np.exp(1j * np.deg2rad(blocks[:, 1]))
+        else:
+            values = 10 ** (blocks[:, 0] / 20) * np.exp(1j * np.deg2rad(blocks[:, 1]))
+
+        values = values.reshape(numPorts, numPorts, numPoints)
+        if numPorts == 2:
+            # 2-port data follows the Touchstone convention of S11, S21, S12, S22
+            values = values.transpose(1, 0, 2)
+
+        return freq, np.ascontiguousarray(np.moveaxis(values, 2, 0))
+
     def load_s2p(self, fileName):
         """Loads s2p data into a new channel in the VNA from an external file.
         
@@ -1393,6 +2824,9 @@ class pyvisaVNA:
         
         self.inst.write(f'mmemory:load "{fileName}"')
         self.wait_for_opc()
+        self.clear_meas_num_cache()
+        self.clear_freq_cache()
+        self.clear_window_layout()
 
     # endregion
 
@@ -1407,45 +2841,18 @@ class pyvisaVNA:
             ch (int): Channel to which trace will be added. [default is 1]
         """
         
-        validParams = ['PIn1', 'POut2', 'PModFile', 'MSig2', 'MDist2', 'MDistIR2', 'MGain21', 
-                        'PGain21', 'MComp21', 'PGain21', 'LMatch2', 'CarrIn1', 'CarrOut2', 'NPRIn1', 'NPROut2', 
-                        'NPRDist21', 'NPRPwrOut2', 'ACPIn1', 'ACPOut2', 'ACPDist21', 'ACPPwrIn1', 'ACPPwrOut2', 
-                        'EVMDistEq21', 'EVMDistUn21', 'EVMPwrIn1', 'EVMPwrOut2', 'ModFilter', 
-                        'A', 'b1', 'B', 'C', 'b3', 'D', 'b4', 'R1', 'a1', 'R2', 'a2', 'R3', 'a3', 'R4', 'a4',
-                        'S11', 'S21', 'LPIn1', 'LPOut1', 'LPOut2',
-                        'PIn2', 'POut1', 'MSig1', 'MDist1', 'MDistIR1', 'MGain12', 
-                        'PGain12', 'MComp12', 'PGain12', 'LMatch1', 'CarrIn2', 'CarrOut1', 'NPRIn2', 'NPROut1', 
-                        'NPRDist12', 'NPRPwrOut1', 'ACPIn2', 'ACPOut1', 'ACPDist12', 'ACPPwrIn2', 'ACPPwrOut1', 
-                        'EVMDistEq12', 'EVMDistUn12', 'EVMPwrIn2', 'EVMPwrOut1']
+        validParams = MEASUREMENT_CLASSES['mod']['validParams']
         
         if measParam not in validParams:
             raise ValueError(f"Invalid 'measParam': {measParam}, check measurement parameter argument.")
 
         # Create new trace with name, parameter, and channel
         self.inst.write(f'calc{ch}:custom:define "{measName}", "Modulation Distortion", "{measParam}"')
+        self.clear_meas_num_cache(ch)
+        self.clear_freq_cache(ch)
         
-        # Check for windows
-        windows = self.inst.query('display:catalog?').split(',')
-        
-        # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-        # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-        
-        # If the specified window doesn't exist, create it by turning it on
-        if str(win) not in windows:
-            self.inst.write(f'display:window{win}:state on')
-
-        # See how many traces are in the window
-        traces = self.inst.query(f"display:window{win}:catalog?").strip()
-
-        # Determine the number of the 'next' trace in the window
-        # VNA returns the string 'EMPTY' if a window has no traces defined in it
-        if 'empty' in traces.lower():
-            nextTrace = 1
-        else:
-            nextTrace = len(traces.split(',')) + 1
-
-        # Feed the new trace into a window and check for errors
-        self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+        self.feed_trace(measName, win)
         
         self.wait_for_opc()
         self.err_check()
@@ -1466,6 +2873,9 @@ class pyvisaVNA:
             ch (int): Channel for which settings are configured. [default is 1]
         """
 
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
+
         validSweepTypes = ['fixed', 'power']
         if sweepType.lower() not in validSweepTypes:
             raise ValueError("Invalid 'sweepType', must be 'fixed' or 'power'.")
@@ -2038,7 +3448,7 @@ class pyvisaVNA:
         # This should always be 1 since there will only ever be one measurement band specified at a time
         bandNumber = 1
         
-        self.inst.write('format ascii') 
+        self.set_data_format('ascii')
         raw = self.inst.query(f'sense{ch}:distortion:table:data:value? {bandNumber},"{modTableParam}"')
         return float(raw.rstrip())
         # return raw.rstrip()
@@ -2084,16 +3494,7 @@ class pyvisaVNA:
             ch (int): Channel to which trace will be added. [default is 1]
         """
         
-        validParams = ['PIn1', 'POut1', 'POut2', 'PModFile', 'MSig2', 'MDist2', 'MDistIR2', 'MGain21', 
-                        'PGain21', 'MComp21', 'PGain21', 'LMatch2', 'CarrIn1', 'CarrOut2', 'NPRIn1', 'NPROut2', 
-                        'NPRDist21', 'NPRPwrOut2', 'ACPIn1', 'ACPOut2', 'ACPDist21', 'ACPPwrIn1', 'ACPPwrOut2', 
-                        'EVMDistEq21', 'EVMDistUn21', 'EVMPwrIn1', 'EVMPwrOut2', 'ModFilter', 
-                        'A', 'b1', 'B', 'C', 'b3', 'D', 'b4', 'R1', 'a1', 'R2', 'a2', 'R3', 'a3', 'R4', 'a4',
-                        'S11', 'S21', 'LPIn1', 'LPOut1', 'LPOut2',
-                        'PIn2', 'POut2', 'POut1', 'MSig1', 'MDist1', 'MDistIR1', 'MGain12', 
-                        'PGain12', 'MComp12', 'PGain12', 'LMatch1', 'CarrIn2', 'CarrOut1', 'NPRIn2', 'NPROut1', 
-                        'NPRDist12', 'NPRPwrOut1', 'ACPIn2', 'ACPOut1', 'ACPDist12', 'ACPPwrIn2', 'ACPPwrOut1', 
-                        'EVMDistEq12', 'EVMDistUn12', 'EVMPwrIn2', 'EVMPwrOut1']
+        validParams = MEASUREMENT_CLASSES['modx']['validParams']
         
         if measParam not in validParams:
             raise ValueError("Invalid 'measParam', check measurement parameter argument.")
@@ -2106,30 +3507,12 @@ class pyvisaVNA:
         else:
             # Create new trace with name, parameter, and channel
             self.inst.write(f'calc{ch}:custom:define "{measName}", "Modulation Distortion Converters", "{measParam}"')
+            self.clear_meas_num_cache(ch)
+            self.clear_freq_cache(ch)
             self.err_check()
             
-            # Check for windows
-            windows = self.inst.query('display:catalog?').split(',')
-            
-            # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-            # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-            
-            # If the specified window doesn't exist, create it by turning it on
-            if str(win) not in windows:
-                self.inst.write(f'display:window{win}:state on')
-
-            # See how many traces are in the window
-            traces = self.inst.query(f"display:window{win}:catalog?").strip()
-
-            # Determine the number of the 'next' trace in the window
-            # VNA returns the string 'EMPTY' if a window has no traces defined in it
-            if 'empty' in traces.lower():
-                nextTrace = 1
-            else:
-                nextTrace = len(traces.split(',')) + 1
-
-            # Feed the new trace into a window and check for errors
-            self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+            # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+            self.feed_trace(measName, win)
         
         self.wait_for_opc()
         self.err_check()
@@ -2142,6 +3525,9 @@ class pyvisaVNA:
             sideband (str): Selects which mixer sideband the VNA will use for measurement. ['low', 'high', default is 'low']
             ch (int): Channel for which settings are configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         inputFreq = self.inst.query(f'sense{ch}:distortion:sweep:carrier:frequency?')
 
@@ -2201,7 +3587,7 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
 
-        validParams = ['S21', 'S11', 'S12', 'S22', 'CompIn21', 'CompOut21', 'DeltaGain21', 'CompGain21', 'CompS11', 'RefS21', 'CompIn12', 'CompOut12', 'DeltaGain12', 'CompGain12', 'CompS22', 'RefS12']
+        validParams = MEASUREMENT_CLASSES['gca']['validParams']
         if measParam not in validParams:
             raise ValueError(f"Invalid 'measParam' {measParam}, check measurement parameter argument.")
         
@@ -2213,29 +3599,11 @@ class pyvisaVNA:
         else:
             # Create new trace with name, parameter, and channel
             self.inst.write(f'calc{ch}:custom:define "{measName}", "Gain Compression", "{measParam}"')
+            self.clear_meas_num_cache(ch)
+            self.clear_freq_cache(ch)
             
-            # Check for windows
-            windows = self.inst.query('display:catalog?').split(',')
-            
-            # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-            # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-            
-            # If the specified window doesn't exist, create it by turning it on
-            if str(win) not in windows:
-                self.inst.write(f'display:window{win}:state on')
-            
-            # See how many traces are in the window
-            traces = self.inst.query(f"display:window{win}:catalog?").strip()
-            
-            # Determine the number of the 'next' trace in the window
-            # VNA returns the string 'EMPTY' if a window has no traces defined in it
-            if 'empty' in traces.lower():
-                nextTrace = 1
-            else:
-                nextTrace = len(traces.split(',')) + 1
-            
-            # Feed the new trace into a window and check for errors
-            self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+            # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+            self.feed_trace(measName, win)
             self.wait_for_opc()
     
     def configure_gca_frequency_stimulus(self, sweepType='linear', acqMode='smartsweep', numPoints=201, startFreq=1e9, stopFreq=2e9, ifBw=100e3, ch=1):
@@ -2250,6 +3618,9 @@ class pyvisaVNA:
             ifBw (float): IF bandwidth in Hz. [default is x]
             ch (int): Channel for which settings are configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         # Error checking
         validSweepTypes = ['linear', 'logarithmic', 'power', 'cw', 'phase']
@@ -2283,6 +3654,9 @@ class pyvisaVNA:
             ch (int): Channel for which settings are configured. [default is 1]
         """
 
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
+
         validPorts = [1, 2]
         if inputPort not in validPorts or outputPort not in validPorts:
             raise ValueError("Invalid 'inputPort' or 'outputPort', must be 1 or 2.")
@@ -2328,6 +3702,10 @@ class pyvisaVNA:
             cwFreq (float): Specifies cw frequency.
             ch (int): Specifies the channel of the measurement. [default is 1]
         """
+
+        # Compression analysis traces use power as their x-axis, so other traces in this channel can't share a cached x-axis
+        self.clear_freq_cache(ch)
+        self.noFreqCacheChannels.add(ch)
         
         # Select trace and get trace number
         self.inst.write(f'calculate{ch}:parameter:select "{measName}"')
@@ -2387,36 +3765,17 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
         
-        validParams = ['S21', 'S11', 'S12', 'S22', 'CompIn21', 'CompOut21', 'DeltaGain21', 'CompGain21', 'CompS11', 'RefS21',
-                       'SC21', 'SC12', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']
+        validParams = MEASUREMENT_CLASSES['gcax']['validParams']
         if measParam not in validParams:
             raise ValueError("Invalid 'measParam', check measurement parameter argument.")
         
         # Create new trace with name, parameter, and channel
         self.inst.write(f'calc{ch}:custom:define "{measName}", "Gain Compression Converters", "{measParam}"')
+        self.clear_meas_num_cache(ch)
+        self.clear_freq_cache(ch)
         
-        # Check for windows
-        windows = self.inst.query('display:catalog?').split(',')
-        
-        # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-        # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-        
-        # If the specified window doesn't exist, create it by turning it on
-        if str(win) not in windows:
-            self.inst.write(f'display:window{win}:state on')
-        
-        # See how many traces are in the window
-        traces = self.inst.query(f"display:window{win}:catalog?").strip()
-        
-        # Determine the number of the 'next' trace in the window
-        # VNA returns the string 'EMPTY' if a window has no traces defined in it
-        if 'empty' in traces.lower():
-            nextTrace = 1
-        else:
-            nextTrace = len(traces.split(',')) + 1
-        
-        # Feed the new trace into a window and check for errors
-        self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+        self.feed_trace(measName, win)
         self.wait_for_opc()
     
     def configure_gcax_frequency_stimulus(self, sweepType='linear', acqMode='smartsweep', numPoints=201, startFreq=1e9, stopFreq=2e9, ifBw=100e3, ch=1):
@@ -2450,6 +3809,9 @@ class pyvisaVNA:
             inputGreater (int): Tells VNA if DUT is a downconverter (input freq greater than LO) or an upconverter (input freq less than LO). [0, 1, default is 1]
             ch (int): Channel for which settings are configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         self.inst.write(f'sense{ch}:mixer:input:frequency:start {startFreq}')
         self.inst.write(f'sense{ch}:mixer:input:frequency:stop {stopFreq}')
@@ -2515,35 +3877,17 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
         
-        validParams = ['B', 'A', 'R1', 'R2', 'b1', 'b2', 'a1', 'a2']
+        validParams = MEASUREMENT_CLASSES['sa']['validParams']
         if measParam not in validParams:
             raise ValueError("Invalid 'measParam', check measurement parameter argument.")
 
         # Create new trace with name, parameter, and channel
         self.inst.write(f'calc{ch}:custom:define "{measName}", "Spectrum Analyzer", "{measParam}"')
+        self.clear_meas_num_cache(ch)
+        self.clear_freq_cache(ch)
         
-        # Check for windows
-        windows = self.inst.query('display:catalog?').split(',')
-        
-        # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-        # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-        
-        # If the specified window doesn't exist, create it by turning it on
-        if str(win) not in windows:
-            self.inst.write(f'display:window{win}:state on')
-
-        # See how many traces are in the window
-        traces = self.inst.query(f"display:window{win}:catalog?").strip()
-
-        # Determine the number of the 'next' trace in the window
-        # VNA returns the string 'EMPTY' if a window has no traces defined in it
-        if 'empty' in traces.lower():
-            nextTrace = 1
-        else:
-            nextTrace = len(traces.split(',')) + 1
-
-        # Feed the new trace into a window and check for errors
-        self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+        self.feed_trace(measName, win)
         
         self.wait_for_opc()
         self.err_check()
@@ -2567,6 +3911,9 @@ class pyvisaVNA:
             detectorBypass (int): Determines whether to bypass detector and use all FFT points. [0, 1, default is 0]
             ch (int): Channel for which settings are configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         if useStartStop:
             self.inst.write(f'sense{ch}:frequency:start {startFreq}')
@@ -2667,35 +4014,17 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
         
-        validParams = ['SC21', 'SC12', 'S11', 'S22', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']
+        validParams = MEASUREMENT_CLASSES['smc']['validParams']
         if measParam not in validParams:
             raise ValueError("Invalid 'measParam', check measurement parameter argument.")
         
         # Create new trace with name, parameter, and channel
         self.inst.write(f'calc{ch}:custom:define "{measName}", "Scalar Mixer/Converter", "{measParam}"')
+        self.clear_meas_num_cache(ch)
+        self.clear_freq_cache(ch)
         
-        # Check for windows
-        windows = self.inst.query('display:catalog?').split(',')
-        
-        # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-        # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-        
-        # If the specified window doesn't exist, create it by turning it on
-        if str(win) not in windows:
-            self.inst.write(f'display:window{win}:state on')
-        
-        # See how many traces are in the window
-        traces = self.inst.query(f"display:window{win}:catalog?").strip()
-        
-        # Determine the number of the 'next' trace in the window
-        # VNA returns the string 'EMPTY' if a window has no traces defined in it
-        if 'empty' in traces.lower():
-            nextTrace = 1
-        else:
-            nextTrace = len(traces.split(',')) + 1
-        
-        # Feed the new trace into a window and check for errors
-        self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+        # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+        self.feed_trace(measName, win)
         self.wait_for_opc()
     
     def configure_smc_stimulus(self, inputPort=1, outputPort=2, portPower=-15, numPoints=201, ifBw=10e3, ch=1):
@@ -2709,6 +4038,9 @@ class pyvisaVNA:
             ifBw (int): IF Bandwidth in Hz. [default is x]
             ch (int): Channel for which stimulus is configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         self.inst.write(f'sense{ch}:mixer:pmap {inputPort},{outputPort}')
         self.inst.write(f'source{ch}:power {portPower}')
@@ -2733,7 +4065,7 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
 
-        validParams = ['NF', 'ENR', 'T-Eff', 'DUTRNP', 'DUTRNPI', 'SYSRNP', 'SYSRNPI', 'DUTNPD', 'DUTNPDI', 'SYSNPD', 'SYSNPDI', 'OvrRng', 'T-Rcvr', 'S11', 'S21', 'S12', 'S22', 'GammaOpt', 'Rn', 'NFMin']
+        validParams = MEASUREMENT_CLASSES['nf']['validParams']
         if measParam not in validParams:
             raise ValueError(f"Invalid 'measParam' {measParam}, check measurement parameter argument.")
         
@@ -2745,29 +4077,11 @@ class pyvisaVNA:
         else:
             # Create new trace with name, parameter, and channel
             self.inst.write(f'calc{ch}:custom:define "{measName}", "Noise Figure Cold Source", "{measParam}"')
+            self.clear_meas_num_cache(ch)
+            self.clear_freq_cache(ch)
             
-            # Check for windows
-            windows = self.inst.query('display:catalog?').split(',')
-            
-            # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-            # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-            
-            # If the specified window doesn't exist, create it by turning it on
-            if str(win) not in windows:
-                self.inst.write(f'display:window{win}:state on')
-            
-            # See how many traces are in the window
-            traces = self.inst.query(f"display:window{win}:catalog?").strip()
-            
-            # Determine the number of the 'next' trace in the window
-            # VNA returns the string 'EMPTY' if a window has no traces defined in it
-            if 'empty' in traces.lower():
-                nextTrace = 1
-            else:
-                nextTrace = len(traces.split(',')) + 1
-            
-            # Feed the new trace into a window and check for errors
-            self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+            # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+            self.feed_trace(measName, win)
             self.wait_for_opc()
         self.err_check()
 
@@ -2782,6 +4096,9 @@ class pyvisaVNA:
             ifBw (float): IF bandwidth in Hz. [default is 1e3]
             ch (int): Channel for which settings are configured. [default is 1]
         """
+
+        # The stimulus is about to change, so the cached x-axis for this channel is no longer valid
+        self.clear_freq_cache(ch)
         
         validSweepTypes = ['linear', 'logarithmic', 'power', 'cw', 'phase']
         if sweepType.lower() not in validSweepTypes:
@@ -2854,7 +4171,7 @@ class pyvisaVNA:
             ch (int): Channel to which the trace/measurement will be assigned. [default is 1]
         """
 
-        validParams = ['NF', 'ENR', 'T-Eff', 'DUTRNP', 'DUTRNPI', 'SYSRNP', 'SYSRNPI', 'DUTNPD', 'DUTNPDI', 'SYSNPD', 'SYSNPDI', 'OvrRng', 'T-Rcvr', 'S11', 'SC21', 'SC12', 'S22', 'Ipwr', 'RevIPwr', 'Opwr', 'RevOPwr']
+        validParams = MEASUREMENT_CLASSES['nfx']['validParams']
         if measParam not in validParams:
             raise ValueError(f"Invalid 'measParam' {measParam}, check measurement parameter argument.")
         
@@ -2866,29 +4183,11 @@ class pyvisaVNA:
         else:
             # Create new trace with name, parameter, and channel
             self.inst.write(f'calc{ch}:custom:define "{measName}", "Noise Figure Converters", "{measParam}"')
+            self.clear_meas_num_cache(ch)
+            self.clear_freq_cache(ch)
             
-            # Check for windows
-            windows = self.inst.query('display:catalog?').split(',')
-            
-            # The VNA returns *everything* as a string, so to compare the desired window to the available windows in the VNA, we have to convert the 'win' argument to a string
-            # 1 in ['1', '2'] would return False, but '1' in ['1', '2'] will return True, which is what we want.
-            
-            # If the specified window doesn't exist, create it by turning it on
-            if str(win) not in windows:
-                self.inst.write(f'display:window{win}:state on')
-            
-            # See how many traces are in the window
-            traces = self.inst.query(f"display:window{win}:catalog?").strip()
-            
-            # Determine the number of the 'next' trace in the window
-            # VNA returns the string 'EMPTY' if a window has no traces defined in it
-            if 'empty' in traces.lower():
-                nextTrace = 1
-            else:
-                nextTrace = len(traces.split(',')) + 1
-            
-            # Feed the new trace into a window and check for errors
-            self.inst.write(f'display:window{win}:trace{nextTrace}:feed "{measName}"')
+            # Feed the new trace into the next free slot of the window without querying the display, see feed_trace()
+            self.feed_trace(measName, win)
             self.wait_for_opc()
         self.err_check()
     # endregion
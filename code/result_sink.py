@@ -0,0 +1,255 @@
+"""
+Keysight VNA SCPI API - Columnar Result Sink
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+NumPy 1.2x.x
+PyArrow 14.x or newer (optional, only needed for this module)
+
+Writes trace, marker, and scalar results to Parquet as Arrow record batches. Rows are collected
+in memory and handed to a background thread in bounded batches, so logging doesn't stall the
+measurement loop:
+
+    from result_sink import ParquetResultSink
+
+    with ParquetResultSink('C:/logs/burn_in.parquet') as sink:
+        vna.single_trigger()
+        sink.record_trace(vna, 'S21')
+        sink.add_marker(vna.instID, 'S21', 1, vna.marker_get_x(1, 'S21'), vna.marker_get_y(1, 'S21'))
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import queue
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def result_schema():
+    """Returns the Arrow schema of the rows written by ParquetResultSink."""
+
+    return pa.schema([
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('kind', pa.string()),
+        ('instID', pa.string()),
+        ('channel', pa.int32()),
+        ('measName', pa.string()),
+        ('marker', pa.int32()),
+        ('calset', pa.string()),
+        ('startFreq', pa.float64()),
+        ('stopFreq', pa.float64()),
+        ('numPoints', pa.int32()),
+        ('freq', pa.list_(pa.float64())),
+        ('data', pa.list_(pa.float64())),
+        ('value', pa.float64()),
+    ])
+
+
+class ParquetResultSink:
+    def __init__(self, filePath, batchRows=1024, maxPendingBatches=4, compression='zstd'):
+        """Collects measurement results and writes them to a Parquet file on a background thread.
+
+        Every row has a kind: 'trace' rows hold freq and data arrays, 'marker' rows hold a marker position in freq[0] and
+        its value, and 'scalar' rows hold a single value such as a modulation distortion result.
+
+        Args:
+            filePath (str): Path of the Parquet file to be written. An existing file is overwritten.
+            batchRows (int): Number of rows collected in memory before they are sent to the writer as one record batch. [default is 1024]
+            maxPendingBatches (int): Number of batches that can wait for the writer. Adding rows blocks when this is reached, which bounds memory use. [default is 4]
+            compression (str): Parquet compression codec, e.g. 'zstd', 'snappy', or 'none'. [default is 'zstd']
+
+        Attributes:
+            filePath (str): Path of the Parquet file.
+            rowsWritten (int): Number of rows written to the file so far.
+        """
+
+        if pa is None:
+            raise ImportError('ParquetResultSink requires pyarrow, install it with "pip install pyarrow".')
+
+        self.filePath = filePath
+        self.batchRows = batchRows
+        self.schema = result_schema()
+        self.rowsWritten = 0
+
+        self.rows = {name: [] for name in self.schema.names}
+        self.numRows = 0
+        self.batches = queue.Queue(maxsize=maxPendingBatches)
+        self.failure = None
+        self.closed = False
+
+        self.writer = pq.ParquetWriter(filePath, self.schema, compression=compression)
+        self.thread = threading.Thread(target=self.write_batches, daemon=True)
+        self.thread.start()
+
+    def write_batches(self):
+        """Background thread, writes queued record batches to the file until it receives None."""
+
+        while True:
+            batch = self.batches.get()
+            if batch is None:
+                return
+            try:
+                if self.failure is None:
+                    self.writer.write_batch(batch)
+                    self.rowsWritten += batch.num_rows
+            except Exception as e:
+                self.failure = e
+
+    def add_row(self, kind, instID, measName, channel=None, marker=None, calset=None, freq=None, data=None, value=None, timestamp=None):
+        """Adds one row to the current batch. Use add_trace(), add_marker(), or add_scalar() rather than calling this directly."""
+
+        if self.closed:
+            raise ValueError('Result sink is closed.')
+        if self.failure is not None:
+            raise self.failure
+
+        # Copied, since rows are only converted at flush() and callers may reuse their buffers (e.g. get_trace_array(pooled=1) or stream_traces())
+        freq = None if freq is None else np.array(freq, dtype=float, copy=True)
+        data = None if data is None else np.array(data, dtype=float, copy=True)
+
+        row = {
+            'timestamp': timestamp if timestamp is not None else datetime.now(timezone.utc),
+            'kind': kind,
+            'instID': instID,
+            'channel': channel,
+            'measName': measName,
+            'marker': marker,
+            'calset': calset,
+            'startFreq': float(freq[0]) if freq is not None and freq.size else None,
+            'stopFreq': float(freq[-1]) if freq is not None and freq.size else None,
+            'numPoints': int(freq.size) if freq is not None else None,
+            'freq': freq,
+            'data': data,
+            'value': value,
+        }
+        for name, v in row.items():
+            self.rows[name].append(v)
+        self.numRows += 1
+
+        if self.numRows >= self.batchRows:
+            self.flush()
+
+    def add_trace(self, instID, measName, freq, data, channel=1, calset=None, timestamp=None):
+        """Adds a trace row.
+
+        Args:
+            instID (str): Instrument identification, e.g. pyvisaVNA.instID.
+            measName (str): Measurement name.
+            freq (list or NumPy ndArray): Frequency (x-axis) values.
+            data (list or NumPy ndArray): Measurement (y-axis) values.
+            channel (int): Channel of the measurement. [default is 1]
+            calset (str): Name of the cal set applied to the channel. [default is None]
+            timestamp (datetime): Time of the measurement. [default is None, uses the current time]
+        """
+
+        self.add_row('trace', instID, measName, channel=channel, calset=calset, freq=freq, data=data, timestamp=timestamp)
+
+    def add_marker(self, instID, measName, mkrNum, mkrX, mkrY, channel=1, calset=None, timestamp=None):
+        """Adds a marker row, e.g. from pyvisaVNA.marker_get_x() and marker_get_y().
+
+        Args:
+            instID (str): Instrument identification, e.g. pyvisaVNA.instID.
+            measName (str): Measurement name.
+            mkrNum (int): Marker number.
+            mkrX (float): Marker x-axis position.
+            mkrY (float): Marker y-axis value.
+            channel (int): Channel of the measurement. [default is 1]
+            calset (str): Name of the cal set applied to the channel. [default is None]
+            timestamp (datetime): Time of the measurement. [default is None, uses the current time]
+        """
+
+        self.add_row('marker', instID, measName, channel=channel, marker=mkrNum, calset=calset, freq=[mkrX], value=float(mkrY), timestamp=timestamp)
+
+    def add_scalar(self, instID, name, value, channel=1, calset=None, timestamp=None):
+        """Adds a scalar row, e.g. a result of pyvisaVNA.get_mod_data().
+
+        Args:
+            instID (str): Instrument identification, e.g. pyvisaVNA.instID.
+            name (str): Name of the result, stored as measName.
+            value (float): Result value.
+            channel (int): Channel of the measurement. [default is 1]
+            calset (str): Name of the cal set applied to the channel. [default is None]
+            timestamp (datetime): Time of the measurement. [default is None, uses the current time]
+        """
+
+        self.add_row('scalar', instID, name, channel=channel, calset=calset, value=float(value), timestamp=timestamp)
+
+    def record_trace(self, vna, measName, ch=1):
+        """Acquires a trace and the active cal set name from a VNA and adds them as a trace row.
+
+        Args:
+            vna (pyvisaVNA): VNA from which the trace is acquired.
+            measName (str): Measurement from which data will be taken.
+            ch (int): Channel to which the measurement belongs. [default is 1]
+        """
+
+        freq, meas = vna.get_trace_array(measName, ch)
+        calset = vna.get_active_cal_set(ch)
+
+        self.add_trace(vna.instID, measName, freq, meas, channel=ch, calset=calset)
+
+    def flush(self):
+        """Sends the rows collected so far to the writer thread as one record batch. Blocks if maxPendingBatches are already waiting."""
+
+        if self.numRows == 0:
+            return
+
+        columns = []
+        for field in self.schema:
+            if pa.types.is_list(field.type):
+                columns.append(list_column(self.rows[field.name], field.type))
+            else:
+                columns.append(pa.array(self.rows[field.name], type=field.type))
+        batch = pa.RecordBatch.from_arrays(columns, schema=self.schema)
+
+        self.rows = {name: [] for name in self.schema.names}
+        self.numRows = 0
+        self.batches.put(batch)
+
+    def close(self):
+        """Writes any remaining rows, waits for the writer thread, and closes the file."""
+
+        if self.closed:
+            return
+        try:
+            if self.failure is None:
+                self.flush()
+        finally:
+            self.closed = True
+            self.batches.put(None)
+            self.thread.join()
+            self.writer.close()
+
+        if self.failure is not None:
+            raise self.failure
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+
+def list_column(arrays, listType):
+    """Builds an Arrow list array from NumPy arrays (or None for null rows) without converting values to Python floats."""
+
+    lengths = [0 if a is None else a.size for a in arrays]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+
+    present = [a for a in arrays if a is not None]
+    values = np.concatenate(present) if present else np.empty(0)
+    mask = pa.array([a is None for a in arrays], type=pa.bool_())
+
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values, type=listType.value_type), type=listType, mask=mask)
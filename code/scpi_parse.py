@@ -0,0 +1,76 @@
+"""
+Keysight VNA SCPI API - SCPI Parsing Helpers
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+
+Small, dependency-free helpers for taking SCPI messages apart, shared by the simulated VNA
+(sim_vna.py) and the latency profiler (vna_profiler.py).
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import re
+
+
+def normalize_header(header):
+    """Converts a SCPI command header to its short form and separates out numeric suffixes.
+
+    'CALCulate2:MEASure5:MARKer1:Y?' and 'calc2:meas5:mark1:y?' both become ('calc:meas:mark:y', (2, 5, 1)).
+    Nodes without a suffix are given a suffix of None.
+
+    Args:
+        header (str): SCPI command header, with or without the trailing '?'.
+
+    Returns:
+        (tuple): Normalized header string and tuple of numeric suffixes.
+    """
+
+    nodes = header.strip().lstrip(':').rstrip('?').lower().split(':')
+    shortNodes = []
+    suffixes = []
+    for n in nodes:
+        match = re.fullmatch(r'(\*?[a-z_]+)(\d*)', n)
+        if not match:
+            shortNodes.append(n)
+            suffixes.append(None)
+            continue
+        name, suffix = match.groups()
+
+        # SCPI short form is the first four letters, or the first three if the fourth is a vowel
+        if not name.startswith('*') and len(name) > 4:
+            name = name[:3] if name[3] in 'aeiou' else name[:4]
+        shortNodes.append(name)
+        suffixes.append(int(suffix) if suffix else None)
+
+    return ':'.join(shortNodes), tuple(suffixes)
+
+
+def split_compound(message, separator=';'):
+    """Splits a compound SCPI message on separators that are not inside quoted strings."""
+
+    commands = []
+    current = []
+    quote = None
+    for c in message:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c == separator:
+            commands.append(''.join(current))
+            current = []
+            continue
+        current.append(c)
+    commands.append(''.join(current))
+
+    return [c.strip() for c in commands if c.strip()]
+
+
+def split_arguments(params):
+    """Splits a SCPI parameter string on commas that are not inside quoted strings and removes the quotes."""
+
+    return [a.strip('"\'') for a in split_compound(params, separator=',')]
@@ -0,0 +1,395 @@
+"""
+Keysight VNA SCPI API - SCPI Session Recorder and Replayer
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+NumPy 1.2x.x
+
+Records every call pyvisaVNA makes on its VISA resource (writes, queries, binary transfers,
+status byte polls, attribute changes, and errors) with timestamps and responses to a compact
+binary log, and replays the log in place of the instrument:
+
+    from py_vna import pyvisaVNA
+    from scpi_recorder import RecordingResourceManager, ReplayResourceManager
+
+    # Record a production sequence
+    vna = pyvisaVNA('TCPIP0::10.0.0.11::hislip0::INSTR', resourceManager=RecordingResourceManager('C:/logs/dut42.scpilog'))
+    run_sequence(vna)
+    vna.close()
+
+    # Replay it offline, at recorded instrument speed or as fast as possible
+    vna = pyvisaVNA('TCPIP0::10.0.0.11::hislip0::INSTR', resourceManager=ReplayResourceManager('C:/logs/dut42.scpilog', realTime=0))
+    run_sequence(vna)
+
+Replay is strict: every call must match the recorded one, otherwise ReplayMismatchError is
+raised. Calls from several threads (e.g. the status byte polling of arm_opc_event()) are
+replayed in their recorded order.
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import json
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+import pyvisa
+
+LOG_MAGIC = b'VNASCPI\x01'
+
+# Operation codes stored in the log
+OPS = {'write': 1, 'write_raw': 2, 'query': 3, 'read': 4, 'read_raw': 5, 'read_bytes': 6, 'query_binary_values': 7, 'query_ascii_values': 8,
+       'read_stb': 9, 'set': 10, 'enable_event': 11, 'disable_event': 12, 'wait_on_event': 13, 'clear': 14, 'close': 15}
+OP_NAMES = {code: name for name, code in OPS.items()}
+
+# Record header: operation, flags, start time and duration in seconds, request and response lengths in bytes
+RECORD_HEADER = struct.Struct('<BBddII')
+FLAG_ERROR = 1
+FLAG_VISA_ERROR = 2
+
+
+class ReplayMismatchError(Exception):
+    """Raised when a call made during replay doesn't match the recorded session."""
+
+    pass
+
+
+def encode_array(values):
+    """Encodes an array of values returned by query_binary_values() or query_ascii_values() as its dtype followed by its raw bytes."""
+
+    values = np.asarray(values)
+    return values.dtype.str.encode('ascii') + b'\0' + values.tobytes()
+
+
+def decode_array(payload, container=list):
+    """Decodes an array encoded by encode_array() into the requested container type."""
+
+    dtype, _, data = payload.partition(b'\0')
+    values = np.frombuffer(data, dtype=dtype.decode('ascii')).copy()
+    if container is list:
+        return values.tolist()
+    if container is np.ndarray:
+        return values
+    return container(values)
+
+
+def read_log(logPath):
+    """Reads a session log.
+
+    Args:
+        logPath (str): Path of a log written by RecordingResource.
+
+    Returns:
+        metadata (dict): Resource name, initial timeout, and time the recording started.
+        records (list): One dict per call, {'op', 'error', 'visaError', 'start', 'duration', 'request', 'response'}, in recorded order.
+    """
+
+    with open(logPath, 'rb') as f:
+        data = f.read()
+
+    if not data.startswith(LOG_MAGIC):
+        raise ValueError(f'{logPath} is not a SCPI session log.')
+    position = len(LOG_MAGIC)
+    metadataSize, = struct.unpack_from('<I', data, position)
+    position += 4
+    metadata = json.loads(data[position:position + metadataSize].decode('utf-8'))
+    position += metadataSize
+
+    records = []
+    view = memoryview(data)
+    while position + RECORD_HEADER.size <= len(data):
+        op, flags, start, duration, requestSize, responseSize = RECORD_HEADER.unpack_from(data, position)
+        position += RECORD_HEADER.size
+        request = bytes(view[position:position + requestSize])
+        position += requestSize
+        response = bytes(view[position:position + responseSize])
+        position += responseSize
+        records.append({'op': OP_NAMES[op], 'error': bool(flags & FLAG_ERROR), 'visaError': bool(flags & FLAG_VISA_ERROR),
+                        'start': start, 'duration': duration, 'request': request, 'response': response})
+
+    return metadata, records
+
+
+class RecordingResource:
+    def __init__(self, inst, logPath):
+        """Wraps a PyVISA resource and records every call made on it to a binary session log.
+
+        Args:
+            inst (base class for the connected resource): PyVISA resource to be recorded.
+            logPath (str): Path of the log file. An existing file is overwritten.
+        """
+
+        self.__dict__['inst'] = inst
+        self.__dict__['logPath'] = logPath
+        self.__dict__['lock'] = threading.Lock()
+        self.__dict__['startTime'] = time.perf_counter()
+        self.__dict__['log'] = open(logPath, 'wb')
+
+        metadata = json.dumps({'resourceName': getattr(inst, 'resource_name', ''), 'timeout': inst.timeout, 'created': time.time()}).encode('utf-8')
+        self.log.write(LOG_MAGIC + struct.pack('<I', len(metadata)) + metadata)
+
+    def record(self, op, request, call, encode=None):
+        """Calls call(), records it with its request and response, and returns its result or raises its exception.
+
+        Args:
+            op (str): Operation name, one of OPS.
+            request (bytes): Request payload, e.g. the SCPI message.
+            call (function): Function that performs the operation on the wrapped resource.
+            encode (function): Converts the result to the response payload. [default is None, no response payload]
+        """
+
+        start = time.perf_counter()
+        flags = 0
+        try:
+            result = call()
+            response = encode(result) if encode is not None else b''
+            return result
+        except pyvisa.errors.VisaIOError as e:
+            flags = FLAG_ERROR | FLAG_VISA_ERROR
+            response = str(int(e.error_code)).encode('ascii')
+            raise
+        except Exception as e:
+            flags = FLAG_ERROR
+            response = f'{type(e).__name__}: {e}'.encode('utf-8', errors='replace')
+            raise
+        finally:
+            stop = time.perf_counter()
+            # Only writing the record is serialized, so a thread blocked in the instrument doesn't hold up the others
+            with self.lock:
+                if not self.log.closed:
+                    self.log.write(RECORD_HEADER.pack(OPS[op], flags, start - self.startTime, stop - start, len(request), len(response)) + request + response)
+
+    def write(self, message, termination=None, encoding=None):
+        return self.record('write', message.encode('utf-8'), lambda: self.inst.write(message, termination, encoding))
+
+    def write_raw(self, message):
+        return self.record('write_raw', bytes(message), lambda: self.inst.write_raw(message))
+
+    def query(self, message, delay=None):
+        return self.record('query', message.encode('utf-8'), lambda: self.inst.query(message, delay), lambda r: r.encode('utf-8'))
+
+    def read(self, termination=None, encoding=None):
+        return self.record('read', b'', lambda: self.inst.read(termination, encoding), lambda r: r.encode('utf-8'))
+
+    def read_raw(self, size=None):
+        return self.record('read_raw', b'' if size is None else str(size).encode('ascii'), lambda: self.inst.read_raw(size), bytes)
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        return self.record('read_bytes', str(count).encode('ascii'), lambda: self.inst.read_bytes(count, chunk_size, break_on_termchar), bytes)
+
+    def query_binary_values(self, message, *args, **kwargs):
+        return self.record('query_binary_values', message.encode('utf-8'), lambda: self.inst.query_binary_values(message, *args, **kwargs), encode_array)
+
+    def query_ascii_values(self, message, *args, **kwargs):
+        return self.record('query_ascii_values', message.encode('utf-8'), lambda: self.inst.query_ascii_values(message, *args, **kwargs), encode_array)
+
+    def read_stb(self):
+        return self.record('read_stb', b'', self.inst.read_stb, lambda r: str(int(r)).encode('ascii'))
+
+    def enable_event(self, event_type, mechanism, context=None):
+        return self.record('enable_event', f'{int(event_type)},{int(mechanism)}'.encode('ascii'), lambda: self.inst.enable_event(event_type, mechanism, context))
+
+    def disable_event(self, event_type, mechanism):
+        return self.record('disable_event', f'{int(event_type)},{int(mechanism)}'.encode('ascii'), lambda: self.inst.disable_event(event_type, mechanism))
+
+    def wait_on_event(self, in_event_type, in_timeout, capture_timeout=False):
+        return self.record('wait_on_event', str(int(in_event_type)).encode('ascii'), lambda: self.inst.wait_on_event(in_event_type, in_timeout, capture_timeout))
+
+    def clear(self):
+        return self.record('clear', b'', self.inst.clear)
+
+    def flush(self):
+        """Writes buffered records to the log file."""
+
+        with self.lock:
+            self.log.flush()
+
+    def close(self):
+        """Closes the resource and the log file."""
+
+        try:
+            self.record('close', b'', self.inst.close)
+        finally:
+            with self.lock:
+                self.log.close()
+
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        self.record('set', f'{name}={value!r}'.encode('utf-8'), lambda: setattr(self.inst, name, value))
+
+
+class RecordingResourceManager:
+    def __init__(self, logPath, resourceManager=None):
+        """Stand-in for pyvisa.ResourceManager that records every resource it opens.
+
+        Args:
+            logPath (str): Path of the log file. When more than one resource is opened, include '{name}' in the path, it is replaced by the resource name with special characters removed.
+            resourceManager (ResourceManager): Resource manager that opens the real resources. [default is None, creates a pyvisa.ResourceManager]
+        """
+
+        self.logPath = logPath
+        self.resourceManager = pyvisa.ResourceManager() if resourceManager is None else resourceManager
+
+    def open_resource(self, resource_name, **kwargs):
+        """Opens a resource with the wrapped resource manager and starts recording it."""
+
+        logPath = self.logPath.replace('{name}', re.sub(r'[^A-Za-z0-9_.-]+', '_', resource_name))
+        return RecordingResource(self.resourceManager.open_resource(resource_name, **kwargs), logPath)
+
+    def list_resources(self, query='?*::INSTR'):
+        return self.resourceManager.list_resources(query)
+
+    def close(self):
+        self.resourceManager.close()
+
+
+class ReplayResource:
+    def __init__(self, logPath, realTime=1, speed=1.0, waitTimeout=5.0):
+        """Stands in for a PyVISA resource by replaying a recorded session log.
+
+        Args:
+            logPath (str): Path of a log written by RecordingResource.
+            realTime (int): 1 takes as long as the recorded instrument did for every call, so host-side processing time is measured on top
+                of recorded I/O and instrument time. 0 returns recorded responses as fast as possible. [0, 1, default is 1]
+            speed (float): Playback speed factor used with realTime, e.g. 2.0 halves every recorded duration. [default is 1.0]
+            waitTimeout (float): Time in seconds a call waits for calls recorded before it (e.g. from another thread) before ReplayMismatchError is raised. [default is 5.0]
+
+        Attributes:
+            metadata (dict): Resource name, initial timeout, and time the recording started.
+            records (list): Recorded calls, see read_log().
+            position (int): Index of the next record to be replayed.
+        """
+
+        metadata, records = read_log(logPath)
+        self.__dict__.update({
+            'logPath': logPath,
+            'metadata': metadata,
+            'records': records,
+            'position': 0,
+            'realTime': realTime,
+            'speed': speed,
+            'waitTimeout': waitTimeout,
+            'condition': threading.Condition(),
+            'resource_name': metadata.get('resourceName', ''),
+            'timeout': metadata.get('timeout'),
+            'send_end': True,
+        })
+
+    def replay(self, op, request=b''):
+        """Waits for the next recorded call to match this one, then returns its response payload or raises its recorded error."""
+
+        deadline = time.perf_counter() + self.waitTimeout
+        with self.condition:
+            while True:
+                if self.position >= len(self.records):
+                    raise ReplayMismatchError(f'Recorded session ended before {op} {request[:80]!r}.')
+                record = self.records[self.position]
+                if record['op'] == op and record['request'] == request:
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise ReplayMismatchError(f"Call {self.position} is {op} {request[:80]!r}, recorded {record['op']} {record['request'][:80]!r}.")
+                self.condition.wait(remaining)
+            self.__dict__['position'] += 1
+            self.condition.notify_all()
+
+        if self.realTime:
+            time.sleep(record['duration'] / self.speed)
+
+        if record['error']:
+            if record['visaError']:
+                raise pyvisa.errors.VisaIOError(int(record['response']))
+            raise RuntimeError(f"Recorded error: {record['response'].decode('utf-8', errors='replace')}")
+        return record['response']
+
+    def write(self, message, termination=None, encoding=None):
+        self.replay('write', message.encode('utf-8'))
+        return len(message)
+
+    def write_raw(self, message):
+        self.replay('write_raw', bytes(message))
+        return len(message)
+
+    def query(self, message, delay=None):
+        return self.replay('query', message.encode('utf-8')).decode('utf-8')
+
+    def read(self, termination=None, encoding=None):
+        return self.replay('read').decode('utf-8')
+
+    def read_raw(self, size=None):
+        return self.replay('read_raw', b'' if size is None else str(size).encode('ascii'))
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        return self.replay('read_bytes', str(count).encode('ascii'))
+
+    def query_binary_values(self, message, datatype='f', is_big_endian=False, container=list, *args, **kwargs):
+        return decode_array(self.replay('query_binary_values', message.encode('utf-8')), container)
+
+    def query_ascii_values(self, message, converter='f', separator=',', container=list, *args, **kwargs):
+        return decode_array(self.replay('query_ascii_values', message.encode('utf-8')), container)
+
+    def read_stb(self):
+        return int(self.replay('read_stb'))
+
+    def enable_event(self, event_type, mechanism, context=None):
+        self.replay('enable_event', f'{int(event_type)},{int(mechanism)}'.encode('ascii'))
+
+    def disable_event(self, event_type, mechanism):
+        self.replay('disable_event', f'{int(event_type)},{int(mechanism)}'.encode('ascii'))
+
+    def wait_on_event(self, in_event_type, in_timeout, capture_timeout=False):
+        self.replay('wait_on_event', str(int(in_event_type)).encode('ascii'))
+
+    def clear(self):
+        self.replay('clear')
+
+    def close(self):
+        self.replay('close')
+
+    @property
+    def finished(self):
+        """True once every recorded call has been replayed."""
+
+        return self.position >= len(self.records)
+
+    def __setattr__(self, name, value):
+        self.replay('set', f'{name}={value!r}'.encode('utf-8'))
+        self.__dict__[name] = value
+
+
+class ReplayResourceManager:
+    def __init__(self, logPaths, realTime=1, speed=1.0, waitTimeout=5.0):
+        """Stand-in for pyvisa.ResourceManager that opens ReplayResources instead of instruments.
+
+        Args:
+            logPaths (str or dict): Path of a session log used for any resource name, or a dict of log paths keyed by resource name.
+            realTime (int): 1 replays at recorded speed, 0 as fast as possible, see ReplayResource. [0, 1, default is 1]
+            speed (float): Playback speed factor used with realTime. [default is 1.0]
+            waitTimeout (float): Time in seconds a call waits for its turn before ReplayMismatchError is raised. [default is 5.0]
+        """
+
+        self.logPaths = logPaths
+        self.realTime = realTime
+        self.speed = speed
+        self.waitTimeout = waitTimeout
+        self.resources = {}
+
+    def open_resource(self, resource_name, **kwargs):
+        """Starts replaying the session log recorded for a resource."""
+
+        logPath = self.logPaths[resource_name] if isinstance(self.logPaths, dict) else self.logPaths
+        self.resources[resource_name] = ReplayResource(logPath, realTime=self.realTime, speed=self.speed, waitTimeout=self.waitTimeout)
+        return self.resources[resource_name]
+
+    def list_resources(self, query='?*::INSTR'):
+        return tuple(self.logPaths) if isinstance(self.logPaths, dict) else ()
+
+    def close(self):
+        pass
@@ -0,0 +1,1065 @@
+"""
+Keysight VNA SCPI API - Simulated Instrument
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+NumPy 1.2x.x
+
+Offline stand-in for a PyVISA resource that answers the subset of SCPI used by pyvisaVNA.
+Pass a SimulatedResourceManager to pyvisaVNA to run scripts, benchmarks, and regression
+tests without tying up a real instrument:
+
+    from py_vna import pyvisaVNA
+    from sim_vna import SimulatedResourceManager
+
+    vna = pyvisaVNA('SIM::PNAX::INSTR', resourceManager=SimulatedResourceManager('lan'))
+
+Each write and read is charged against a LatencyModel so round trip counts, bytes moved,
+and modeled wall time can be compared across LAN, USB, and PXI connections.
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+from pyvisa import constants, errors, util
+
+from scpi_parse import normalize_header, split_arguments, split_compound
+
+
+class LatencyModel:
+    def __init__(self, writeLatency=0.0, readLatency=0.0, perByte=0.0, commandLatency=None):
+        """Cost model for the I/O link between the remote PC and the simulated VNA.
+
+        Args:
+            writeLatency (float): Fixed cost in seconds of a single write transaction. [default is 0.0]
+            readLatency (float): Fixed cost in seconds of a single read transaction, including instrument turnaround. [default is 0.0]
+            perByte (float): Transfer cost in seconds per byte in either direction. [default is 0.0]
+            commandLatency (dict or callable): Additional execution time in seconds per SCPI command. A dict maps command headers, e.g. 'sense:sweep:mode', to seconds and matches any command starting with that header. A callable takes the raw command string and returns seconds. [default is None]
+        """
+
+        self.writeLatency = writeLatency
+        self.readLatency = readLatency
+        self.perByte = perByte
+
+        if isinstance(commandLatency, dict):
+            # Normalize headers once so 'SENSe:SWEep:MODE' and 'sense:sweep:mode' match the same commands
+            self.commandLatency = {normalize_header(h)[0]: s for h, s in commandLatency.items()}
+        else:
+            self.commandLatency = commandLatency
+
+    def write_cost(self, numBytes):
+        """Returns the time in seconds needed to send numBytes to the instrument."""
+
+        return self.writeLatency + numBytes * self.perByte
+
+    def read_cost(self, numBytes):
+        """Returns the time in seconds needed to read numBytes from the instrument."""
+
+        return self.readLatency + numBytes * self.perByte
+
+    def command_cost(self, command, header):
+        """Returns the additional execution time in seconds of a single SCPI command.
+
+        Args:
+            command (str): Raw command string as sent by the user.
+            header (str): Normalized command header, see normalize_header().
+        """
+
+        if self.commandLatency is None:
+            return 0.0
+        if callable(self.commandLatency):
+            return self.commandLatency(command)
+
+        cost = 0.0
+        for h, s in self.commandLatency.items():
+            if header.startswith(h):
+                cost += s
+        return cost
+
+
+# Rough figures for a single VISA transaction on common connections to a VNA
+LATENCY_PROFILES = {
+    'ideal': dict(writeLatency=0.0, readLatency=0.0, perByte=0.0),
+    'lan': dict(writeLatency=150e-6, readLatency=450e-6, perByte=1 / 80e6),
+    'usb': dict(writeLatency=250e-6, readLatency=800e-6, perByte=1 / 25e6),
+    'pxi': dict(writeLatency=15e-6, readLatency=40e-6, perByte=1 / 600e6),
+}
+
+
+def get_latency_model(profile='lan', commandLatency=None):
+    """Builds a LatencyModel from one of the profiles in LATENCY_PROFILES.
+
+    Args:
+        profile (str or LatencyModel): Name of the latency profile. ['ideal', 'lan', 'usb', 'pxi', default is 'lan']. An existing LatencyModel is returned unchanged.
+        commandLatency (dict or callable): Additional execution time per SCPI command, see LatencyModel. [default is None]
+
+    Returns:
+        (LatencyModel): Latency model for the selected profile.
+    """
+
+    if isinstance(profile, LatencyModel):
+        return profile
+    if profile.lower() not in LATENCY_PROFILES:
+        raise ValueError(f"Invalid 'profile': {profile}, must be one of {list(LATENCY_PROFILES)}.")
+
+    return LatencyModel(commandLatency=commandLatency, **LATENCY_PROFILES[profile.lower()])
+
+
+class SimulatedVNA:
+    def __init__(self, resourceName='SIM::VNA::INSTR', latencyModel='lan', realTime=False, model='N5245B', serialNumber='MY00000001', firmware='A.17.20.07',
+                 numPorts=4, numSources=2, options='010,029,080,087,089,090,093,S93088A,S93090B', pointTime=20e-6, sweepOverhead=5e-3):
+        """Simulated Keysight VNA that can be used in place of a PyVISA resource.
+
+        Args:
+            resourceName (str): VISA address reported by the simulated resource. [default is 'SIM::VNA::INSTR']
+            latencyModel (str or LatencyModel): Latency model or name of a profile in LATENCY_PROFILES. [default is 'lan']
+            realTime (int): 1 sleeps for the modeled latency so wall time matches the model, 0 only accumulates modeled time. [0, 1, default is 0]
+            model (str): Model number reported by *idn?. [default is 'N5245B']
+            serialNumber (str): Serial number reported by *idn?. [default is 'MY00000001']
+            firmware (str): Firmware revision reported by *idn?. [default is 'A.17.20.07']
+            numPorts (int): Number of test ports. [default is 4]
+            numSources (int): Number of internal sources. [default is 2]
+            options (str): Comma-separated option string reported by *opt?. [default is x]
+            pointTime (float): Modeled measurement time in seconds per sweep point. [default is 20e-6]
+            sweepOverhead (float): Modeled fixed time in seconds per sweep. [default is 5e-3]
+
+        Attributes:
+            stats (dict): Number of writes, reads, and SCPI commands, bytes written and read, and modeled elapsed time in seconds.
+            files (dict): Simulated VNA hard drive, maps absolute file paths to file contents in bytes.
+            calSets (list): Names of the cal sets stored on the simulated VNA.
+        """
+
+        self.resource_name = resourceName
+        self.latencyModel = get_latency_model(latencyModel)
+        self.realTime = realTime
+        self.timeout = 10000
+        self.send_end = True
+
+        self.idn = f'Keysight Technologies,{model},{serialNumber},{firmware}'
+        self.options = options
+        self.portCatalog = [f'Port {p}' for p in range(1, numPorts + 1)]
+        self.sourceCatalog = [f'Port {p}' for p in range(1, numPorts + 1)] + [f'Src{s}' for s in range(2, numSources + 1)]
+        self.pointTime = pointTime
+        self.sweepOverhead = sweepOverhead
+
+        self.files = {}
+        self.calSets = ['CalSet_1', 'MyCal_STD']
+
+        # Modeled time in seconds since the session was opened
+        self.clock = 0.0
+        self.startTime = time.perf_counter()
+        self.stats = {}
+        self.reset_stats()
+
+        self._lock = threading.RLock()
+        self._outBuffer = bytearray()
+        self._inBuffer = bytearray()
+        self._handlers = self._build_handlers()
+        self._reset_state(defaultTrace=1)
+
+    # region Resource Interface
+    def close(self):
+        """Closes the simulated session."""
+
+        self._outBuffer = bytearray()
+        self._inBuffer = bytearray()
+
+    def clear(self):
+        """Device clear, discards any unread response and any partially received message."""
+
+        self._outBuffer = bytearray()
+        self._inBuffer = bytearray()
+
+    def write_raw(self, message):
+        """Sends raw bytes to the simulated instrument.
+
+        Args:
+            message (bytes): Complete message including any IEEE 488.2 binary block and termination.
+
+        Returns:
+            (int): Number of bytes written.
+        """
+
+        with self._lock:
+            self._sync_clock()
+            self._spend(self.latencyModel.write_cost(len(message)))
+            self.stats['writes'] += 1
+            self.stats['bytesWritten'] += len(message)
+
+            # Without END the instrument keeps collecting bytes until the rest of the message arrives
+            if not self.send_end:
+                self._inBuffer += message
+                return len(message)
+            numBytes = len(message)
+            message = bytes(self._inBuffer + message)
+            self._inBuffer = bytearray()
+
+            # A new message discards an unread response, just like the real instrument
+            if self._outBuffer:
+                self._outBuffer = bytearray()
+                self._push_error(-410, 'Query INTERRUPTED')
+
+            # Binary blocks can contain anything, including semicolons, so split them off before parsing text
+            block = None
+            blockMatch = re.search(rb',\s*#[1-9]', message)
+            if blockMatch:
+                hashPos = message.index(b'#', blockMatch.start())
+                offset, length = util.parse_ieee_block_header(message[hashPos:])
+                block = bytes(message[hashPos + offset:hashPos + offset + length])
+                text = message[:blockMatch.start()].decode('ascii', errors='replace')
+            else:
+                text = message.decode('ascii', errors='replace')
+
+            responses = []
+            for command in split_compound(text.strip()):
+                response = self._execute(command, block)
+                if response is not None:
+                    responses.append(response)
+
+            # Responses to a compound query are separated by semicolons and share one terminator, binary blocks included
+            if responses:
+                self._outBuffer += b';'.join(r[:-1] if r.endswith(b'\n') else r for r in responses) + b'\n'
+
+            return numBytes
+
+    def write(self, message, termination=None, encoding=None):
+        """Sends a SCPI command to the simulated instrument.
+
+        Args:
+            message (str): SCPI command or compound command.
+
+        Returns:
+            (int): Number of bytes written.
+        """
+
+        return self.write_raw(f'{message}\n'.encode('ascii'))
+
+    def write_binary_values(self, message, values, datatype='f', is_big_endian=False, termination=None, encoding=None, header_fmt='ieee'):
+        """Sends a SCPI command followed by an IEEE 488.2 definite length binary block."""
+
+        block = util.to_ieee_block(values, datatype, is_big_endian)
+        return self.write_raw(message.encode('ascii') + block + b'\n')
+
+    def read_raw(self, size=None):
+        """Reads the pending response from the simulated instrument.
+
+        Args:
+            size (int): Maximum number of bytes to read. None reads the whole response. [default is None]
+
+        Returns:
+            (bytes): Raw response bytes.
+        """
+
+        with self._lock:
+            if not self._outBuffer:
+                self._timeout_error()
+            if size is None:
+                size = len(self._outBuffer)
+            data = bytes(self._outBuffer[:size])
+            del self._outBuffer[:size]
+
+            self._spend(self.latencyModel.read_cost(len(data)))
+            self.stats['reads'] += 1
+            self.stats['bytesRead'] += len(data)
+
+            return data
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        """Reads exactly count bytes of the pending response."""
+
+        with self._lock:
+            if len(self._outBuffer) < count:
+                self._timeout_error()
+            return self.read_raw(count)
+
+    def read(self, termination=None, encoding=None):
+        """Reads the pending response as a string."""
+
+        return self.read_raw().decode('ascii', errors='replace')
+
+    def query(self, message, delay=None):
+        """Sends a SCPI query and returns the response as a string."""
+
+        self.write(message)
+        return self.read()
+
+    def query_binary_values(self, message, datatype='f', is_big_endian=False, container=list, delay=None, header_fmt='ieee', expect_termination=True, data_points=0, chunk_size=None):
+        """Sends a SCPI query and parses the IEEE 488.2 definite length binary block response."""
+
+        self.write(message)
+        return util.from_ieee_block(self.read_raw(), datatype, is_big_endian, container)
+
+    def query_ascii_values(self, message, converter='f', separator=',', container=list, delay=None):
+        """Sends a SCPI query and parses a comma-separated ASCII response."""
+
+        raw = self.query(message).strip()
+        values = [float(v) for v in raw.split(separator) if v]
+        return container(values)
+
+    def read_stb(self):
+        """Serial poll, reads the status byte without going through the message queue."""
+
+        with self._lock:
+            self._sync_clock()
+            self._spend(self.latencyModel.read_cost(1))
+            self.stats['reads'] += 1
+            self.stats['bytesRead'] += 1
+            return self._status_byte()
+
+    def enable_event(self, event_type, mechanism, context=None):
+        """Accepts service request events, they are delivered through wait_on_event()."""
+
+        pass
+
+    def disable_event(self, event_type, mechanism):
+        pass
+
+    def wait_on_event(self, in_event_type, in_timeout, capture_timeout=False):
+        """Waits for a service request. The modeled clock skips ahead to the moment the request is asserted.
+
+        Args:
+            in_event_type (EventType): Event to wait for, only service requests are modeled.
+            in_timeout (int): Timeout in ms.
+        """
+
+        with self._lock:
+            self._sync_clock()
+
+            # Pending operations finishing with *OPC armed are the only thing that can raise a request later
+            if self.opcPending:
+                remaining = self.busyUntil - self.clock
+                if in_timeout is not None and remaining > in_timeout / 1000:
+                    self._spend(in_timeout / 1000)
+                    raise errors.VisaIOError(constants.StatusCode.error_timeout)
+                self._spend(remaining)
+
+            if not self._status_byte() & (1 << 6):
+                if in_timeout is not None:
+                    self._spend(in_timeout / 1000)
+                raise errors.VisaIOError(constants.StatusCode.error_timeout)
+
+    # endregion
+
+    # region Statistics
+    def reset_stats(self):
+        """Resets the transaction counters and modeled elapsed time."""
+
+        self.stats = {'writes': 0, 'reads': 0, 'commands': 0, 'bytesWritten': 0, 'bytesRead': 0, 'elapsed': 0.0}
+
+    @property
+    def transactions(self):
+        """Total number of VISA transactions (writes + reads)."""
+
+        return self.stats['writes'] + self.stats['reads']
+
+    def _spend(self, seconds):
+        """Advances the modeled clock, and the real one if realTime is enabled."""
+
+        if seconds <= 0:
+            return
+        self.clock += seconds
+        self.stats['elapsed'] += seconds
+        if self.realTime:
+            time.sleep(seconds)
+
+    def _sync_clock(self):
+        """In real time mode, time spent by the caller between messages (e.g. sleeping while polling) also counts towards sweeps."""
+
+        if self.realTime:
+            self.clock = max(self.clock, time.perf_counter() - self.startTime)
+
+    def _timeout_error(self):
+        """Charges the full timeout and raises the same error PyVISA raises for a timeout."""
+
+        if self.timeout is not None:
+            self._spend(self.timeout / 1000)
+        raise errors.VisaIOError(constants.StatusCode.error_timeout)
+
+    # endregion
+
+    # region Instrument State
+    def _reset_state(self, defaultTrace=1):
+        """Returns the instrument to its preset state.
+
+        Args:
+            defaultTrace (int): 1 creates the S11 trace in channel 1 that *rst creates, 0 leaves the instrument empty like system:fpreset.
+        """
+
+        # Channels map channel numbers to stimulus settings and measurements
+        self.channels = {}
+        # Measurement numbers are unique across all channels
+        self.measurements = {}
+        self.nextMeasNum = 1
+        # Windows map window numbers to lists of trace numbers and measurement names
+        self.windows = {}
+        self.errorQueue = []
+        self.settings = {}
+
+        self.dataFormat = 'ascii'
+        self.byteOrder = 'normal'
+        self.snpFormat = 'auto'
+
+        self.esr = 0
+        self.ese = 0
+        self.sre = 0
+        self.opcPending = 0
+        self.busyUntil = 0.0
+
+        if defaultTrace:
+            self._define_measurement(1, 'CH1_S11_1', 'S11', 'Standard')
+            self.windows[1] = [(1, 'CH1_S11_1')]
+
+    def _channel(self, ch):
+        """Returns the state of a channel, creating it if needed."""
+
+        if ch not in self.channels:
+            self.channels[ch] = {'start': 10e6, 'stop': 50e9, 'points': 201, 'sweepCount': 0, 'selected': None, 'calSet': None, 'measurements': {}}
+        return self.channels[ch]
+
+    def _define_measurement(self, ch, measName, measParam, measClass):
+        chan = self._channel(ch)
+        # Measurement names are global on the VNA, so a name used in any channel is rejected
+        if any(name == measName for _, name in self.measurements.values()):
+            self._push_error(-224, f'Illegal parameter value; Measurement "{measName}" already exists')
+            return
+        measNum = self.nextMeasNum
+        self.nextMeasNum += 1
+        chan['measurements'][measName] = {'param': measParam, 'class': measClass, 'num': measNum}
+        self.measurements[measNum] = (ch, measName)
+        chan['selected'] = measName
+
+    def _selected(self, ch):
+        """Returns the name of the selected measurement in a channel, or None after queueing an error."""
+
+        chan = self.channels.get(ch)
+        if chan is None or chan['selected'] is None:
+            self._push_error(-221, 'Settings conflict; No measurement selected')
+            return None
+        return chan['selected']
+
+    def _meas_by_num(self, measNum):
+        if measNum not in self.measurements:
+            self._push_error(-114, f'Header suffix out of range; Measurement {measNum} does not exist')
+            return None, None
+        return self.measurements[measNum]
+
+    def _push_error(self, code, message):
+        """Adds an error to the error queue and sets the matching standard event status bit."""
+
+        self.errorQueue.append((code, message))
+        if -199 <= code <= -100:
+            self.esr |= 1 << 5
+        elif -299 <= code <= -200:
+            self.esr |= 1 << 4
+        elif -499 <= code <= -400:
+            self.esr |= 1 << 2
+        else:
+            self.esr |= 1 << 3
+
+    def inject_error(self, code, message):
+        """Adds an arbitrary error to the error queue, useful for exercising error handling."""
+
+        with self._lock:
+            self._push_error(code, message)
+
+    def sweep_time(self, ch=1):
+        """Returns the modeled time in seconds for a single sweep of a channel."""
+
+        return self._channel(ch)['points'] * self.pointTime + self.sweepOverhead
+
+    def _frequency(self, ch):
+        chan = self._channel(ch)
+        return np.linspace(chan['start'], chan['stop'], chan['points'])
+
+    def _sparam(self, ch, seed, i, j, freq):
+        """Generates repeatable S-parameter data for a single port pair. Reflection terms look like a matched DUT, transmission terms like a short cable."""
+
+        chan = self._channel(ch)
+        rng = np.random.default_rng(zlib.crc32(f'{ch}:{seed}:{i}:{j}'.encode()) + chan['sweepCount'])
+        span = max(freq[-1] - freq[0], 1.0)
+        x = (freq - freq[0]) / span
+        noise = 0.02 * (rng.standard_normal(freq.size) + 1j * rng.standard_normal(freq.size))
+        if i == j:
+            mag = 10 ** ((-18 + 4 * np.sin(2 * np.pi * 3 * x)) / 20)
+            phase = -2 * np.pi * freq * 50e-12
+        else:
+            mag = 10 ** ((-0.5 - 3 * x) / 20)
+            phase = -2 * np.pi * freq * 1e-9
+        return mag * np.exp(1j * phase) + noise * mag
+
+    def _trace_data(self, ch, measName, formatted):
+        """Returns formatted (log mag) or complex data for a measurement as a flat float array."""
+
+        meas = self._channel(ch)['measurements'][measName]
+        freq = self._frequency(ch)
+        match = re.fullmatch(r's(\d)(\d)', meas['param'].lower())
+        if match:
+            i, j = int(match.group(1)), int(match.group(2))
+        else:
+            # Non S-parameter measurements get repeatable data based on their name
+            i = j = zlib.crc32(meas['param'].encode()) % 4 + 1
+        data = self._sparam(ch, '', i, j, freq)
+
+        if formatted:
+            return 20 * np.log10(np.abs(data))
+        values = np.empty(2 * freq.size)
+        values[0::2] = data.real
+        values[1::2] = data.imag
+        return values
+
+    def _snp_blocks(self, ch, ports):
+        """Returns the frequency and S-parameter blocks of an SNP query/file in Touchstone order."""
+
+        freq = self._frequency(ch)
+        n = len(ports)
+        if n == 2:
+            # 2-port Touchstone files are column-major: S11, S21, S12, S22
+            pairs = [(ports[0], ports[0]), (ports[1], ports[0]), (ports[0], ports[1]), (ports[1], ports[1])]
+        else:
+            pairs = [(pi, pj) for pi in ports for pj in ports]
+
+        fmt = self.snpFormat if self.snpFormat != 'auto' else 'db'
+        blocks = []
+        for i, j in pairs:
+            data = self._sparam(ch, '', i, j, freq)
+            if fmt == 'ri':
+                blocks.append((data.real, data.imag))
+            elif fmt == 'ma':
+                blocks.append((np.abs(data), np.angle(data, deg=True)))
+            else:
+                blocks.append((20 * np.log10(np.abs(data)), np.angle(data, deg=True)))
+        return freq, blocks, fmt
+
+    def _encode_values(self, values):
+        """Encodes numeric data according to the current FORMat and FORMat:BORDer settings."""
+
+        values = np.asarray(values, dtype=float)
+        if self.dataFormat == 'real,64':
+            return util.to_ieee_block(values.tolist(), 'd', self.byteOrder == 'normal') + b'\n'
+        if self.dataFormat == 'real,32':
+            return util.to_ieee_block(values.tolist(), 'f', self.byteOrder == 'normal') + b'\n'
+        return (','.join(f'{v:+.12E}' for v in values) + '\n').encode('ascii')
+
+    def _text(self, value):
+        return f'{value}\n'.encode('ascii')
+
+    def _quoted(self, items):
+        return self._text('"' + ','.join(str(i) for i in items) + '"')
+
+    # endregion
+
+    # region Command Execution
+    def _execute(self, command, block=None):
+        """Executes a single SCPI command and returns the response bytes for queries."""
+
+        self.stats['commands'] += 1
+
+        parts = command.split(None, 1)
+        rawHeader = parts[0]
+        params = parts[1] if len(parts) > 1 else ''
+        isQuery = rawHeader.endswith('?')
+        header, suffixes = normalize_header(rawHeader)
+
+        self._spend(self.latencyModel.command_cost(command, header))
+
+        handler = self._handlers.get(header)
+        if handler is not None:
+            return handler(suffixes, params, isQuery, block)
+
+        # Anything not modeled explicitly is remembered so that it can be queried back
+        key = (header, suffixes)
+        if isQuery:
+            return self._text(self.settings.get(key, '0'))
+        self.settings[key] = params
+        return None
+
+    def _build_handlers(self):
+        return {
+            '*idn': lambda s, p, q, b: self._text(self.idn),
+            '*opt': lambda s, p, q, b: self._text(self.options),
+            '*cls': self._cmd_cls,
+            '*rst': lambda s, p, q, b: self._reset_state(defaultTrace=1),
+            '*opc': self._cmd_opc,
+            '*wai': self._cmd_wai,
+            '*esr': self._cmd_esr,
+            '*ese': self._cmd_ese,
+            '*stb': self._cmd_stb,
+            '*sre': self._cmd_sre,
+            'syst:err': self._cmd_error,
+            'syst:err:next': self._cmd_error,
+            'syst:fpr': lambda s, p, q, b: self._reset_state(defaultTrace=0),
+            'syst:cap:hard:port:coun': lambda s, p, q, b: self._text(f'+{len(self.portCatalog)}'),
+            'syst:cap:hard:port:cat': lambda s, p, q, b: self._quoted(self.portCatalog),
+            'syst:cap:hard:port:sour:coun': lambda s, p, q, b: self._text(f'+{len(self.sourceCatalog)}'),
+            'syst:cap:hard:port:sour:cat': lambda s, p, q, b: self._quoted(self.sourceCatalog),
+            'syst:chan:cat': lambda s, p, q, b: self._quoted(sorted(self.channels)),
+            'syst:chan:del': self._cmd_channel_delete,
+            'syst:meas:cat': self._cmd_meas_catalog,
+            'syst:meas:name': self._cmd_meas_name,
+            'syst:act:chan': self._cmd_active_channel,
+            'syst:act:mcl': self._cmd_active_mclass,
+            'calc:par:def:ext': self._cmd_define_extended,
+            'calc:par:def': self._cmd_define_extended,
+            'calc:cust:def': self._cmd_custom_define,
+            'calc:cust:mod': self._cmd_custom_modify,
+            'calc:par:sel': self._cmd_select,
+            'calc:par:mnum': self._cmd_mnumber,
+            'calc:par:cat:ext': self._cmd_catalog,
+            'calc:par:cat': self._cmd_catalog,
+            'calc:par:del': self._cmd_delete,
+            'calc:data': self._cmd_data,
+            'calc:x': self._cmd_x,
+            'calc:meas:data': self._cmd_data,
+            'calc:meas:x': self._cmd_x,
+            'calc:meas:data:snp:port': self._cmd_snp,
+            'calc:meas:data:snp:port:save': self._cmd_snp_save,
+            'calc:meas:mark:x': self._cmd_marker_x,
+            'calc:meas:mark:y': self._cmd_marker_y,
+            'disp:cat': lambda s, p, q, b: self._quoted(sorted(self.windows)) if self.windows else self._text('"EMPTY"'),
+            'disp:wind:stat': self._cmd_window_state,
+            'disp:wind:cat': self._cmd_window_catalog,
+            'disp:wind:trac:feed': self._cmd_feed,
+            'form': self._cmd_format,
+            'form:data': self._cmd_format,
+            'form:bord': self._cmd_border,
+            'mmem:stor:trac:form:snp': self._cmd_snp_format,
+            'sens:freq:star': self._cmd_stimulus('start'),
+            'sens:freq:stop': self._cmd_stimulus('stop'),
+            'sens:swe:poin': self._cmd_stimulus('points'),
+            'sens:freq:cent': self._cmd_center_span('center'),
+            'sens:freq:span': self._cmd_center_span('span'),
+            'sens:swe:mode': self._cmd_sweep_mode,
+            'init': self._cmd_initiate,
+            'init:imm': self._cmd_initiate,
+            'mmem:tran': self._cmd_transfer,
+            'mmem:stor:sscr': self._cmd_store_file,
+            'mmem:stor:csv:form': self._cmd_store_file,
+            'mmem:stor:csar': self._cmd_store_file,
+            'mmem:load:csar': self._cmd_load_state,
+            'cset:cat': lambda s, p, q, b: self._quoted(self.calSets),
+            'cset:del': self._cmd_cset_delete,
+            'sens:corr:cset:act': self._cmd_cset_activate,
+            'sens:corr:cset:flat': self._cmd_cset_create,
+            'sens:corr:coll:guid:save:cset': self._cmd_cset_create,
+            'sens:corr:coll:guid:conn:cat': lambda s, p, q, b: self._text('"APC 3.5 female, APC 3.5 male, 2.92 mm female, 2.92 mm male, 1.85 mm female, 1.85 mm male, Type N (50) female, Type N (50) male"'),
+            'sens:corr:coll:guid:ckit:cat': lambda s, p, q, b: self._text('"N4693D User 1 ECal MY62350179, N4691D User 1 ECal MY57450056, 85052D"'),
+            'sens:corr:coll:guid:step': lambda s, p, q, b: self._text('+4'),
+            'sens:corr:coll:guid:desc': lambda s, p, q, b: self._text('"Connect ECal Module A to Port 1 and B to Port 2"'),
+            'syst:cal:all:guid:chan': lambda s, p, q, b: self._text('+2'),
+            'sens:corr:ckit:ecal:list': lambda s, p, q, b: self._text('+1'),
+            'sens:corr:ckit:ecal:clis': lambda s, p, q, b: self._text('+0'),
+            'sens:corr:ckit:ecal:path:coun': lambda s, p, q, b: self._text('+4'),
+            'sens:corr:ckit:ecal:inf': lambda s, p, q, b: self._text('"ModelNumber: N4693D, SerialNumber: MY62350179, ConnectorA: 2.4 mm female, ConnectorB: 2.4 mm female, MinFreq: 10000000, MaxFreq: 50000000000, NumberOfPoints: 201"'),
+            'calc:fsim:draf:circ:next': lambda s, p, q, b: self._text('+1'),
+            'sour:mod:corr:coll:acq:stat': lambda s, p, q, b: self._text('"Calibration succeeded."'),
+            'syst:conf:edev:exis': lambda s, p, q, b: self._text('0'),
+            'sens:dist:tabl:data:val': lambda s, p, q, b: self._text('-1.050000000000E+01'),
+            'calc:meas:sa:mark:bpow:data': lambda s, p, q, b: self._text('-3.000000000000E+01'),
+        }
+
+    def _cmd_cls(self, suffixes, params, isQuery, block):
+        self.errorQueue = []
+        self.esr = 0
+        self.opcPending = 0
+
+    def _cmd_opc(self, suffixes, params, isQuery, block):
+        if isQuery:
+            # *OPC? blocks until all pending operations are finished, bounded by the I/O timeout
+            remaining = self.busyUntil - self.clock
+            if self.timeout is not None and remaining > self.timeout / 1000:
+                self._spend(self.timeout / 1000)
+                raise errors.VisaIOError(constants.StatusCode.error_timeout)
+            self._spend(remaining)
+            return self._text('+1')
+        # *OPC sets the operation complete bit of the ESR once pending operations finish
+        self.opcPending = 1
+
+    def _cmd_wai(self, suffixes, params, isQuery, block):
+        self._spend(self.busyUntil - self.clock)
+
+    def _update_opc(self):
+        if self.opcPending and self.clock >= self.busyUntil:
+            self.esr |= 1
+            self.opcPending = 0
+
+    def _cmd_esr(self, suffixes, params, isQuery, block):
+        self._update_opc()
+        value = self.esr
+        self.esr = 0
+        return self._text(f'+{value}')
+
+    def _cmd_ese(self, suffixes, params, isQuery, block):
+        if isQuery:
+            return self._text(f'+{self.ese}')
+        self.ese = int(float(params))
+
+    def _status_byte(self):
+        self._update_opc()
+        stb = 0
+        if self.errorQueue:
+            stb |= 1 << 2
+        if self._outBuffer:
+            stb |= 1 << 4
+        if self.esr & self.ese:
+            stb |= 1 << 5
+        if stb & self.sre:
+            stb |= 1 << 6
+        return stb
+
+    def _cmd_stb(self, suffixes, params, isQuery, block):
+        return self._text(f'+{self._status_byte()}')
+
+    def _cmd_sre(self, suffixes, params, isQuery, block):
+        if isQuery:
+            return self._text(f'+{self.sre}')
+        self.sre = int(float(params))
+
+    def _cmd_error(self, suffixes, params, isQuery, block):
+        if not self.errorQueue:
+            return self._text('+0,"No error"')
+        code, message = self.errorQueue.pop(0)
+        return self._text(f'{code:+d},"{message}"')
+
+    def _cmd_channel_delete(self, suffixes, params, isQuery, block):
+        ch = int(float(params))
+        if ch not in self.channels:
+            self._push_error(-224, f'Illegal parameter value; Channel {ch} does not exist')
+            return
+        for name, meas in self.channels.pop(ch)['measurements'].items():
+            self.measurements.pop(meas['num'], None)
+            self._remove_from_windows(name)
+
+    def _remove_from_windows(self, measName):
+        for w, traces in self.windows.items():
+            self.windows[w] = [t for t in traces if t[1] != measName]
+
+    def _cmd_meas_catalog(self, suffixes, params, isQuery, block):
+        if params:
+            chan = self.channels.get(int(float(params)), {'measurements': {}})
+            nums = [m['num'] for m in chan['measurements'].values()]
+        else:
+            nums = sorted(self.measurements)
+        return self._quoted(nums) if nums else self._text('"EMPTY"')
+
+    def _cmd_meas_name(self, suffixes, params, isQuery, block):
+        ch, measName = self._meas_by_num(suffixes[1])
+        return self._text(f'"{measName}"' if measName is not None else '""')
+
+    def _cmd_active_channel(self, suffixes, params, isQuery, block):
+        for ch, chan in sorted(self.channels.items()):
+            if chan['selected'] is not None:
+                return self._text(f'+{ch}')
+        return self._text('+0')
+
+    def _cmd_active_mclass(self, suffixes, params, isQuery, block):
+        for ch, chan in sorted(self.channels.items()):
+            if chan['selected'] is not None:
+                return self._text(f'"{chan["measurements"][chan["selected"]]["class"]}"')
+        return self._text('"Standard"')
+
+    def _cmd_define_extended(self, suffixes, params, isQuery, block):
+        args = split_arguments(params)
+        self._define_measurement(suffixes[0] or 1, args[0], args[1], 'Standard')
+
+    def _cmd_custom_define(self, suffixes, params, isQuery, block):
+        args = split_arguments(params)
+        self._define_measurement(suffixes[0] or 1, args[0], args[2], args[1])
+
+    def _cmd_custom_modify(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        measName = self._selected(ch)
+        if measName is not None:
+            self.channels[ch]['measurements'][measName]['param'] = split_arguments(params)[0]
+
+    def _cmd_select(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        measName = split_arguments(params)[0]
+        chan = self.channels.get(ch)
+        if chan is None or measName not in chan['measurements']:
+            self._push_error(-224, f'Illegal parameter value; Measurement "{measName}" not found in channel {ch}')
+            return
+        chan['selected'] = measName
+
+    def _cmd_mnumber(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        measName = self._selected(ch)
+        if measName is None:
+            return self._text('+0')
+        return self._text(f'+{self.channels[ch]["measurements"][measName]["num"]}')
+
+    def _cmd_catalog(self, suffixes, params, isQuery, block):
+        chan = self.channels.get(suffixes[0] or 1)
+        if chan is None or not chan['measurements']:
+            return self._text('"NO CATALOG"')
+        items = []
+        for name, meas in chan['measurements'].items():
+            items += [name, meas['param']]
+        return self._quoted(items)
+
+    def _cmd_delete(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        measName = split_arguments(params)[0]
+        chan = self.channels.get(ch)
+        if chan is None or measName not in chan['measurements']:
+            self._push_error(-224, f'Illegal parameter value; Measurement "{measName}" not found in channel {ch}')
+            return
+        meas = chan['measurements'].pop(measName)
+        self.measurements.pop(meas['num'], None)
+        self._remove_from_windows(measName)
+        if chan['selected'] == measName:
+            chan['selected'] = None
+
+    def _cmd_data(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        if len(suffixes) > 1 and suffixes[1] is not None:
+            # CALCulate:MEASure<n>:DATA? addresses the measurement by number
+            ch, measName = self._meas_by_num(suffixes[1])
+        else:
+            measName = self._selected(ch)
+        if measName is None:
+            return self._encode_values([])
+        return self._encode_values(self._trace_data(ch, measName, formatted=params.strip().lower() == 'fdata'))
+
+    def _cmd_x(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        if len(suffixes) > 1 and suffixes[1] is not None:
+            ch, measName = self._meas_by_num(suffixes[1])
+            if measName is None:
+                return self._encode_values([])
+        return self._encode_values(self._frequency(ch))
+
+    def _cmd_snp(self, suffixes, params, isQuery, block):
+        ch, measName = self._meas_by_num(suffixes[1])
+        if measName is None:
+            return self._encode_values([])
+        ports = [int(p) for p in split_arguments(params)[0].split(',')]
+        freq, blocks, fmt = self._snp_blocks(ch, ports)
+        return self._encode_values(np.concatenate([freq] + [np.concatenate(b) for b in blocks]))
+
+    def _cmd_snp_save(self, suffixes, params, isQuery, block):
+        ch, measName = self._meas_by_num(suffixes[1])
+        if measName is None:
+            return
+        args = split_arguments(params)
+        ports = [int(p) for p in args[0].split(',')]
+        freq, blocks, fmt = self._snp_blocks(ch, ports)
+
+        lines = [f'! Simulated {self.idn}', f'# Hz S {fmt.upper()} R 50']
+        n = len(ports)
+        for k, f in enumerate(freq):
+            pairs = [f'{a[k]:.9E} {b[k]:.9E}' for a, b in blocks]
+            if n <= 2:
+                lines.append(f'{f:.9E} ' + ' '.join(pairs))
+            else:
+                # Touchstone v1 puts each matrix row on its own line(s) with at most 4 pairs per line
+                for row in range(n):
+                    rowPairs = pairs[row * n:(row + 1) * n]
+                    for c in range(0, n, 4):
+                        prefix = f'{f:.9E} ' if row == 0 and c == 0 else ' ' * 16
+                        lines.append(prefix + ' '.join(rowPairs[c:c + 4]))
+        self.files[args[1]] = ('\n'.join(lines) + '\n').encode('ascii')
+
+    def _cmd_marker_x(self, suffixes, params, isQuery, block):
+        key = ('calc:meas:mark:x', suffixes[1:])
+        if isQuery:
+            ch, measName = self._meas_by_num(suffixes[1])
+            if measName is None:
+                return self._text('+0')
+            return self._text(self.settings.get(key, f'{self._frequency(ch)[0]:+.12E}'))
+        self.settings[key] = params
+
+    def _cmd_marker_y(self, suffixes, params, isQuery, block):
+        ch, measName = self._meas_by_num(suffixes[1])
+        if measName is None:
+            return self._text('+0,+0')
+        freq = self._frequency(ch)
+        x = float(self.settings.get(('calc:meas:mark:x', suffixes[1:]), freq[0]))
+        y = self._trace_data(ch, measName, formatted=1)[np.argmin(np.abs(freq - x))]
+        return self._text(f'{y:+.12E},+0.000000000000E+00')
+
+    def _cmd_window_state(self, suffixes, params, isQuery, block):
+        win = suffixes[1] or 1
+        if isQuery:
+            return self._text('1' if win in self.windows else '0')
+        if params.strip().lower() in ['on', '1']:
+            self.windows.setdefault(win, [])
+        else:
+            self.windows.pop(win, None)
+
+    def _cmd_window_catalog(self, suffixes, params, isQuery, block):
+        win = suffixes[1] or 1
+        if not self.windows.get(win):
+            return self._text('"EMPTY"')
+        return self._quoted([t[0] for t in self.windows[win]])
+
+    def _cmd_feed(self, suffixes, params, isQuery, block):
+        win = suffixes[1] or 1
+        trace = suffixes[2] or 1
+        measName = split_arguments(params)[0]
+        if win not in self.windows:
+            self._push_error(-221, f'Settings conflict; Window {win} does not exist')
+            return
+        if not any(measName in c['measurements'] for c in self.channels.values()):
+            self._push_error(-224, f'Illegal parameter value; Measurement "{measName}" not found')
+            return
+        self.windows[win] = [t for t in self.windows[win] if t[0] != trace] + [(trace, measName)]
+
+    def _cmd_format(self, suffixes, params, isQuery, block):
+        if isQuery:
+            return self._text(self.dataFormat.upper().replace('ASCII', 'ASC,+0').replace('REAL,', 'REAL,+'))
+        fmt = params.replace(' ', '').lower()
+        if fmt.startswith('asc'):
+            self.dataFormat = 'ascii'
+        elif fmt in ['real,64', 'real,32']:
+            self.dataFormat = fmt
+        else:
+            self._push_error(-224, f'Illegal parameter value; {params}')
+
+    def _cmd_border(self, suffixes, params, isQuery, block):
+        if isQuery:
+            return self._text('NORM' if self.byteOrder == 'normal' else 'SWAP')
+        order = params.strip().lower()
+        if order.startswith('swap'):
+            self.byteOrder = 'swapped'
+        elif order.startswith('norm'):
+            self.byteOrder = 'normal'
+        else:
+            self._push_error(-224, f'Illegal parameter value; {params}')
+
+    def _cmd_snp_format(self, suffixes, params, isQuery, block):
+        if isQuery:
+            return self._text(self.snpFormat.upper())
+        self.snpFormat = params.strip().lower()
+
+    def _cmd_stimulus(self, name):
+        def handler(suffixes, params, isQuery, block):
+            chan = self._channel(suffixes[0] or 1)
+            if isQuery:
+                return self._text(f'{chan[name]:+.12E}' if name != 'points' else f'+{chan[name]}')
+            value = float(params)
+            chan[name] = int(value) if name == 'points' else value
+        return handler
+
+    def _cmd_center_span(self, name):
+        def handler(suffixes, params, isQuery, block):
+            chan = self._channel(suffixes[0] or 1)
+            center = (chan['start'] + chan['stop']) / 2
+            span = chan['stop'] - chan['start']
+            if isQuery:
+                return self._text(f'{center if name == "center" else span:+.12E}')
+            if name == 'center':
+                center = float(params)
+            else:
+                span = float(params)
+            chan['start'] = center - span / 2
+            chan['stop'] = center + span / 2
+        return handler
+
+    def _start_sweep(self, ch):
+        chan = self._channel(ch)
+        chan['sweepCount'] += 1
+        self.busyUntil = max(self.busyUntil, self.clock) + self.sweep_time(ch)
+
+    def _cmd_sweep_mode(self, suffixes, params, isQuery, block):
+        ch = suffixes[0] or 1
+        if isQuery:
+            return self._text(self.settings.get(('sens:swe:mode', suffixes), 'CONT'))
+        mode = params.strip().lower()
+        self.settings[('sens:swe:mode', suffixes)] = mode.upper()
+        if mode.startswith('sing'):
+            self._start_sweep(ch)
+        elif mode.startswith('gro'):
+            for _ in range(int(float(self.settings.get(('sens:swe:gro:coun', suffixes), '1')))):
+                self._start_sweep(ch)
+
+    def _cmd_initiate(self, suffixes, params, isQuery, block):
+        if suffixes[0] is not None:
+            self._start_sweep(suffixes[0])
+        else:
+            for ch in sorted(self.channels):
+                self._start_sweep(ch)
+
+    def _cmd_transfer(self, suffixes, params, isQuery, block):
+        if isQuery:
+            path = split_arguments(params)[0]
+            if path not in self.files:
+                self._push_error(-256, f'File name not found; {path}')
+                return b'#10\n'
+            return util.to_ieee_block(self.files[path], 's') + b'\n'
+        path = split_arguments(params.rstrip(','))[0]
+        self.files[path] = block if block is not None else b''
+
+    def _cmd_store_file(self, suffixes, params, isQuery, block):
+        path = split_arguments(params)[0]
+        self.files[path] = f'Simulated file created by {self.idn}\n'.encode('ascii')
+
+    def _cmd_load_state(self, suffixes, params, isQuery, block):
+        path = split_arguments(params)[0]
+        if path not in self.files:
+            self._push_error(-256, f'File name not found; {path}')
+            return
+        self._reset_state(defaultTrace=1)
+
+    def _cmd_cset_delete(self, suffixes, params, isQuery, block):
+        name = split_arguments(params)[0]
+        if name in self.calSets:
+            self.calSets.remove(name)
+
+    def _cmd_cset_activate(self, suffixes, params, isQuery, block):
+        chan = self._channel(suffixes[0] or 1)
+        if isQuery:
+            return self._text(f'"{chan["calSet"] or "No Calset Selected"}"')
+        name = split_arguments(params)[0]
+        if name not in self.calSets:
+            self._push_error(-256, f'File name not found; Cal set "{name}" does not exist')
+        else:
+            chan['calSet'] = name
+
+    def _cmd_cset_create(self, suffixes, params, isQuery, block):
+        name = split_arguments(params)[0]
+        if name not in self.calSets:
+            self.calSets.append(name)
+
+    # endregion
+
+
+class SimulatedResourceManager:
+    def __init__(self, latencyModel='lan', realTime=False, **instKwargs):
+        """Stand-in for pyvisa.ResourceManager that opens SimulatedVNA resources.
+
+        Args:
+            latencyModel (str or LatencyModel): Latency model or name of a profile in LATENCY_PROFILES used by every opened resource. [default is 'lan']
+            realTime (int): 1 sleeps for the modeled latency so wall time matches the model. [0, 1, default is 0]
+            instKwargs: Additional keyword arguments passed to SimulatedVNA, e.g. model or numPorts.
+        """
+
+        self.latencyModel = latencyModel
+        self.realTime = realTime
+        self.instKwargs = instKwargs
+        self.resources = {}
+
+    def open_resource(self, resource_name, open_timeout=None, **kwargs):
+        """Opens (or reopens) a simulated VNA at the given address. Each address keeps its own instrument state."""
+
+        if resource_name not in self.resources:
+            self.resources[resource_name] = SimulatedVNA(resource_name, latencyModel=self.latencyModel, realTime=self.realTime, **self.instKwargs)
+        return self.resources[resource_name]
+
+    def list_resources(self, query='?*::INSTR'):
+        """Returns the addresses of all simulated VNAs opened so far."""
+
+        return tuple(self.resources)
+
+    def close(self):
+        """Closes all simulated sessions."""
+
+        for r in self.resources.values():
+            r.close()
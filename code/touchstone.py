@@ -0,0 +1,300 @@
+"""
+Keysight VNA SCPI API - Touchstone Files
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+NumPy 1.2x.x
+
+Vectorized reader and writer for Touchstone 1.x and 2.0 (.sNp) files with any number of ports in
+RI, MA, or DB format. Data is parsed in large chunks straight into NumPy arrays, and files can be
+read from a path, from bytes (e.g. pyvisaVNA.get_file() into an io.BytesIO), or from any binary
+file object:
+
+    import io
+    import touchstone
+
+    buffer = io.BytesIO()
+    vna.save_s2p('S21', 'C:/temp/dut.s2p')
+    vna.get_file('C:/temp/dut.s2p', buffer)
+    freq, sParams, z0 = touchstone.read_touchstone(buffer.getvalue())
+
+    touchstone.write_touchstone('dut_ri.s2p', freq, sParams, dataFormat='ri')
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import io
+import re
+
+import numpy as np
+
+FREQ_UNITS = {'hz': 1.0, 'khz': 1e3, 'mhz': 1e6, 'ghz': 1e9}
+
+
+def open_source(source):
+    """Returns a binary file object for a path, bytes, or an existing binary file object, and whether the caller should close it."""
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), True
+    if hasattr(source, 'read'):
+        return source, False
+    return open(source, 'rb'), True
+
+
+def ports_from_name(name):
+    """Returns the port count from a .sNp file name, or None if the name doesn't have that form."""
+
+    match = re.search(r'\.s(\d+)p$', str(name), flags=re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def to_complex(a, b, dataFormat):
+    """Converts pairs of values in RI, MA (linear magnitude/degrees), or DB (dB/degrees) format to complex numbers."""
+
+    if dataFormat == 'ri':
+        return a + 1j * b
+    if dataFormat == 'ma':
+        return a * np.exp(1j * np.deg2rad(b))
+    return 10 ** (a / 20) * np.exp(1j * np.deg2rad(b))
+
+
+def from_complex(values, dataFormat):
+    """Converts complex numbers to pairs of values in RI, MA, or DB format."""
+
+    if dataFormat == 'ri':
+        return values.real, values.imag
+    if dataFormat == 'ma':
+        return np.abs(values), np.angle(values, deg=True)
+    return 20 * np.log10(np.abs(values)), np.angle(values, deg=True)
+
+
+def read_touchstone(source, numPorts=None, chunkSize=1 << 24):
+    """Reads a Touchstone 1.x or 2.0 file.
+
+    Args:
+        source (str, bytes, or file object): Path of an .sNp file, the contents of one, or a binary file object.
+        numPorts (int): Number of ports. Only needed for Touchstone 1.x data without a .sNp file name, otherwise it is taken from the file. [default is None, inferred]
+        chunkSize (int): Number of bytes of network data parsed at a time, which bounds temporary memory for large files. [default is 16 MiB]
+
+    Returns:
+        freq (NumPy ndArray): Frequencies in Hz.
+        sParams (NumPy ndArray): Complex network parameters with shape (points, N, N), where sParams[:, i, j] is S(i+1, j+1).
+        z0 (float or NumPy ndArray): Reference impedance, one value per port if the file specifies more than one.
+    """
+
+    f, shouldClose = open_source(source)
+    try:
+        if numPorts is None and not isinstance(source, (bytes, bytearray, memoryview)):
+            numPorts = ports_from_name(getattr(f, 'name', source))
+
+        freqUnit = 'ghz'
+        dataFormat = 'ma'
+        parameter = 's'
+        z0 = 50.0
+        version = 1
+        twoPortOrder = '21_12'
+        matrixFormat = 'full'
+        referenceLines = 0
+
+        # Header, read line by line up to the first line of network data
+        firstData = b''
+        for line in f:
+            text = line.split(b'!', 1)[0].strip()
+            if not text:
+                continue
+            lowered = text.decode('ascii', errors='replace').lower()
+
+            if referenceLines:
+                # [Reference] values can continue on the lines that follow the keyword
+                values = [float(v) for v in lowered.split()]
+                z0 = np.append(np.atleast_1d(z0), values) if isinstance(z0, np.ndarray) else np.array(values)
+                referenceLines = max(0, referenceLines - len(values))
+                continue
+
+            if lowered.startswith('#'):
+                for option in lowered[1:].split():
+                    if option in FREQ_UNITS:
+                        freqUnit = option
+                    elif option in ['ri', 'ma', 'db']:
+                        dataFormat = option
+                    elif option in ['s', 'y', 'z', 'h', 'g']:
+                        parameter = option
+                parts = lowered[1:].split()
+                if 'r' in parts:
+                    z0 = float(parts[parts.index('r') + 1])
+            elif lowered.startswith('['):
+                keyword, _, value = lowered[1:].partition(']')
+                value = value.strip()
+                if keyword == 'version':
+                    version = 2
+                elif keyword == 'number of ports':
+                    numPorts = int(value)
+                elif keyword == 'two-port data order':
+                    twoPortOrder = value
+                elif keyword == 'matrix format':
+                    matrixFormat = value
+                elif keyword == 'reference':
+                    values = [float(v) for v in value.split()]
+                    z0 = np.array(values)
+                    referenceLines = (numPorts or 0) - len(values)
+                elif keyword == 'network data':
+                    continue
+            else:
+                firstData = line
+                break
+
+        if parameter != 's':
+            raise ValueError(f"Unsupported Touchstone parameter type '{parameter.upper()}', only S-parameters are supported.")
+        if isinstance(z0, np.ndarray) and np.all(z0 == z0[0]):
+            z0 = float(z0[0])
+
+        # Network data, parsed a chunk at a time. Comments are stripped and anything after the next keyword (e.g. [Noise Data] or [End]) is ignored
+        chunks = []
+        carry = firstData
+        lineTokens = []
+        done = False
+        while not done:
+            block = f.read(chunkSize)
+            if not block:
+                done = True
+                data, carry = carry, b''
+            else:
+                data = carry + block
+                cut = data.rfind(b'\n') + 1
+                data, carry = data[:cut], data[cut:]
+
+            if b'!' in data:
+                data = re.sub(rb'!.*', b'', data)
+            keyword = data.find(b'[')
+            if keyword >= 0:
+                data = data[:keyword]
+                done = True
+
+            # Per-line token counts of the first lines are enough to find the number of ports of Touchstone 1.x data
+            if numPorts is None and len(lineTokens) < 64:
+                lineTokens += [len(l.split()) for l in data.splitlines()[:64] if l.strip()]
+
+            tokens = data.split()
+            if tokens:
+                chunks.append(np.array(tokens).astype(np.float64))
+    finally:
+        if shouldClose:
+            f.close()
+
+    values = np.concatenate(chunks) if chunks else np.empty(0)
+
+    if numPorts is None:
+        # Lines that start with a frequency have an odd number of tokens, the tokens between two of them are one frequency point
+        starts = [i for i, n in enumerate(lineTokens) if n % 2 == 1]
+        blockSize = sum(lineTokens[starts[0]:starts[1]]) if len(starts) > 1 else values.size
+        numPorts = int(round(np.sqrt((blockSize - 1) / 2)))
+
+    if matrixFormat == 'full':
+        numValues = numPorts ** 2
+    else:
+        numValues = numPorts * (numPorts + 1) // 2
+    rowSize = 1 + 2 * numValues
+    if values.size % rowSize:
+        raise ValueError(f'Network data has {values.size} values, which is not a whole number of {numPorts}-port frequency points.')
+
+    rows = values.reshape(-1, rowSize)
+    freq = rows[:, 0] * FREQ_UNITS[freqUnit]
+    pairs = to_complex(rows[:, 1::2], rows[:, 2::2], dataFormat)
+
+    sParams = np.empty((rows.shape[0], numPorts, numPorts), dtype=complex)
+    if matrixFormat == 'full':
+        sParams[:] = pairs.reshape(-1, numPorts, numPorts)
+        if numPorts == 2 and twoPortOrder == '21_12':
+            # 2-port data is S11, S21, S12, S22 unless a 2.0 file says otherwise
+            sParams[:] = sParams.transpose(0, 2, 1)
+    else:
+        rowIdx, colIdx = np.tril_indices(numPorts) if matrixFormat == 'lower' else np.triu_indices(numPorts)
+        sParams[:, rowIdx, colIdx] = pairs
+        sParams[:, colIdx, rowIdx] = pairs
+
+    return freq, sParams, z0
+
+
+def write_touchstone(target, freq, sParams, dataFormat='ri', freqUnit='hz', z0=50.0, version=1, comments=None, precision=12, chunkPoints=65536):
+    """Writes a Touchstone 1.x or 2.0 file.
+
+    Args:
+        target (str or file object): Path of the file to be written, or a binary file object, e.g. io.BytesIO for pyvisaVNA.send_file().
+        freq (list or NumPy ndArray): Frequencies in Hz.
+        sParams (NumPy ndArray): Complex S-parameters with shape (points, N, N).
+        dataFormat (str): Data format. ['ri', 'ma', 'db', default is 'ri']
+        freqUnit (str): Frequency unit used in the file. ['hz', 'khz', 'mhz', 'ghz', default is 'hz']
+        z0 (float or list): Reference impedance in ohms. A list gives one value per port and requires version 2. [default is 50.0]
+        version (int): Touchstone version. [1, 2, default is 1]
+        comments (list): Comment lines written at the top of the file. [default is None]
+        precision (int): Number of significant digits. [default is 12]
+        chunkPoints (int): Number of frequency points formatted at a time, which bounds temporary memory for large files. [default is 65536]
+    """
+
+    dataFormat = dataFormat.lower()
+    freqUnit = freqUnit.lower()
+    if dataFormat not in ['ri', 'ma', 'db']:
+        raise ValueError("Invalid 'dataFormat', must be 'ri', 'ma', or 'db'.")
+    if freqUnit not in FREQ_UNITS:
+        raise ValueError("Invalid 'freqUnit', must be 'hz', 'khz', 'mhz', or 'ghz'.")
+    if version not in [1, 2]:
+        raise ValueError("Invalid 'version', must be 1 or 2.")
+
+    freq = np.asarray(freq, dtype=float)
+    sParams = np.asarray(sParams, dtype=complex)
+    if sParams.ndim != 3 or sParams.shape[1] != sParams.shape[2] or sParams.shape[0] != freq.size:
+        raise ValueError('sParams must have shape (points, N, N) with one point per frequency.')
+    numPoints, numPorts = sParams.shape[0], sParams.shape[1]
+
+    z0 = np.atleast_1d(np.asarray(z0, dtype=float))
+    if z0.size > 1 and version == 1:
+        raise ValueError('Per-port reference impedances require version 2.')
+
+    # One line per matrix row with at most 4 pairs per line, the frequency starts the first line of each point
+    number = f'%.{precision}g'
+    if numPorts <= 2:
+        pointFormat = ' '.join([number] * (1 + 2 * numPorts ** 2))
+    else:
+        lines = []
+        for row in range(numPorts):
+            for start in range(0, numPorts, 4):
+                pairs = ['  '.join([number, number])] * min(4, numPorts - start)
+                lines.append(('' if row == 0 and start == 0 else ' ') + '  '.join(pairs))
+        pointFormat = number + ' ' + '\n'.join(lines)
+
+    header = [f'! {line}' for line in (comments or [])]
+    if version == 2:
+        header.append('[Version] 2.0')
+    header.append(f'# {freqUnit.upper() if freqUnit != "hz" else "Hz"} S {dataFormat.upper()} R {z0[0]:g}')
+    if version == 2:
+        header.append(f'[Number of Ports] {numPorts}')
+        if numPorts == 2:
+            header.append('[Two-Port Data Order] 21_12')
+        header.append(f'[Number of Frequencies] {numPoints}')
+        if z0.size > 1:
+            header.append('[Reference] ' + ' '.join(f'{z:g}' for z in z0))
+        header.append('[Network Data]')
+
+    f = target if hasattr(target, 'write') else open(target, 'wb')
+    try:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        # Network data is converted, formatted, and written a block of points at a time, so no full-size table is built
+        table = np.empty((min(chunkPoints, numPoints), 1 + 2 * numPorts ** 2))
+        for first in range(0, numPoints, chunkPoints):
+            block = sParams[first:first + chunkPoints]
+            rows = table[:block.shape[0]]
+
+            # 2-port data is written as S11, S21, S12, S22 (the 1.x convention, declared as 21_12 in 2.0 files)
+            ordered = block.transpose(0, 2, 1) if numPorts == 2 else block
+            a, b = from_complex(ordered.reshape(block.shape[0], -1), dataFormat)
+            rows[:, 0] = freq[first:first + chunkPoints] / FREQ_UNITS[freqUnit]
+            rows[:, 1::2] = a
+            rows[:, 2::2] = b
+            np.savetxt(f, rows, fmt=pointFormat, newline='\n', encoding='ascii')
+        if version == 2:
+            f.write(b'[End]\n')
+    finally:
+        if f is not target:
+            f.close()
@@ -0,0 +1,309 @@
+"""
+Keysight VNA SCPI API - Memory-Mapped Trace Archive
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+NumPy 1.2x.x
+
+Append-only on-disk store for large numbers of sweeps. Trace data lives in fixed-width binary
+segment files (one per dtype and number of points) that are read back through memory maps, so
+reopening millions of sweeps costs no parsing and no copies. Identical frequency axes are stored
+once. A small SQLite index finds records by timestamp, DUT serial number, and measurement name:
+
+    from trace_archive import TraceArchive
+
+    with TraceArchive('C:/data/drift_study') as archive:
+        for timestamp, freq, data in vna.stream_traces(['S21', 'S11'], n=1000):
+            archive.append_frame(timestamp, freq, data, ['S21', 'S11'], serial='DUT0042')
+
+        freq, sweeps, timestamps = archive.query_array(measName='S21', serial='DUT0042')
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+
+class TraceArchive:
+    def __init__(self, directory, commitEvery=256):
+        """Opens (or creates) a trace archive in a directory.
+
+        Args:
+            directory (str): Directory that holds the archive files. Created if it doesn't exist.
+            commitEvery (int): Number of appended records after which the index is committed to disk. close() and flush() always commit. [default is 256]
+
+        Attributes:
+            directory (str): Directory that holds the archive files.
+            index (sqlite3.Connection): Connection to the record index.
+        """
+
+        self.directory = directory
+        self.commitEvery = commitEvery
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = sqlite3.connect(os.path.join(directory, 'index.sqlite'))
+        self.index.execute('pragma journal_mode=wal')
+        self.index.execute('pragma synchronous=normal')
+        self.index.executescript("""
+            create table if not exists segments (id integer primary key, kind text not null, dtype text not null, numPoints integer not null, numRows integer not null, unique (kind, dtype, numPoints));
+            create table if not exists freqs (id integer primary key, digest text not null unique, segment integer not null, row integer not null);
+            create table if not exists records (id integer primary key, timestamp real not null, serial text, measName text not null, channel integer,
+                                                segment integer not null, row integer not null, freq integer not null);
+            create index if not exists recordsByTime on records (timestamp);
+            create index if not exists recordsBySerial on records (serial, measName, timestamp);
+            create index if not exists recordsByMeas on records (measName, timestamp);
+        """)
+        self.index.commit()
+
+        # Segment id -> (kind, dtype, numPoints, numRows), kept in memory so appends don't need to query the index
+        self.segments = {}
+        for segmentId, kind, dtype, numPoints, numRows in self.index.execute('select id, kind, dtype, numPoints, numRows from segments'):
+            self.segments[segmentId] = (kind, dtype, numPoints, numRows)
+            self.reconcile_segment(segmentId)
+        self.index.commit()
+
+        self.freqIds = dict(self.index.execute('select digest, id from freqs'))
+        self.maps = {}
+        self.files = {}
+        self.pending = 0
+
+    def segment_path(self, segmentId):
+        """Returns the path of the binary file of a segment."""
+
+        kind, dtype, numPoints, numRows = self.segments[segmentId]
+        return os.path.join(self.directory, f'{kind}_{segmentId}_{dtype}_{numPoints}.bin')
+
+    def reconcile_segment(self, segmentId):
+        """Sets the row count of a segment from its file size.
+
+        Rows are written before the index is committed, so after a crash the file can hold more rows than the index
+        knows about. Those rows are kept (no record points at them) and new rows are numbered after them. A partially
+        written last row is cut off.
+        """
+
+        kind, dtype, numPoints, numRows = self.segments[segmentId]
+        path = self.segment_path(segmentId)
+        rowBytes = np.dtype(dtype).itemsize * numPoints
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % rowBytes:
+            with open(path, 'r+b') as f:
+                f.truncate(size - size % rowBytes)
+        if size // rowBytes != numRows:
+            self.segments[segmentId] = (kind, dtype, numPoints, size // rowBytes)
+            self.index.execute('update segments set numRows = ? where id = ?', (size // rowBytes, segmentId))
+
+    def get_segment(self, kind, dtype, numPoints):
+        """Returns the id of the segment that stores rows of numPoints values of dtype, creating it if needed.
+
+        Frequency axes ('freq') and trace data ('data') are kept in separate segments so consecutive sweeps stay in consecutive rows.
+        """
+
+        for segmentId, (k, d, n, numRows) in self.segments.items():
+            if k == kind and d == dtype and n == numPoints:
+                return segmentId
+
+        segmentId = self.index.execute('insert into segments (kind, dtype, numPoints, numRows) values (?, ?, ?, 0)', (kind, dtype, numPoints)).lastrowid
+        self.segments[segmentId] = (kind, dtype, numPoints, 0)
+
+        # A session that crashed before committing its new segment can leave a file at the same path, its rows are skipped like other orphan rows
+        self.reconcile_segment(segmentId)
+
+        # Committed before any row is written, so a crash can't leave rows in a file the index doesn't know about
+        self.flush()
+        return segmentId
+
+    def write_row(self, segmentId, values):
+        """Appends one row to a segment file and returns its row number."""
+
+        kind, dtype, numPoints, numRows = self.segments[segmentId]
+
+        # Segment files stay open for appending until flush() or close()
+        f = self.files.get(segmentId)
+        if f is None:
+            f = self.files[segmentId] = open(self.segment_path(segmentId), 'ab')
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self.segments[segmentId] = (kind, dtype, numPoints, numRows + 1)
+        self.index.execute('update segments set numRows = ? where id = ?', (numRows + 1, segmentId))
+        return numRows
+
+    def append(self, freq, data, measName, serial=None, ch=1, timestamp=None):
+        """Appends one trace to the archive.
+
+        Args:
+            freq (list or NumPy ndArray): Frequency (x-axis) values.
+            data (list or NumPy ndArray): Measurement values, real (stored as float64) or complex (stored as complex128).
+            measName (str): Measurement name.
+            serial (str): Serial number of the DUT. [default is None]
+            ch (int): Channel of the measurement. [default is 1]
+            timestamp (float): Time of the sweep in seconds since the epoch. [default is None, uses the current time]
+
+        Returns:
+            (int): Record id.
+        """
+
+        freq = np.ascontiguousarray(freq, dtype='f8')
+        data = np.asarray(data)
+        if data.ndim != 1 or data.size != freq.size:
+            raise ValueError('data must be one-dimensional and have the same number of points as freq.')
+        dtype = 'c16' if np.iscomplexobj(data) else 'f8'
+
+        # Frequency axes are stored once and shared by every record that uses them
+        digest = hashlib.sha1(freq.tobytes()).hexdigest()
+        freqId = self.freqIds.get(digest)
+        if freqId is None:
+            freqSegment = self.get_segment('freq', 'f8', freq.size)
+            freqRow = self.write_row(freqSegment, freq)
+            freqId = self.index.execute('insert into freqs (digest, segment, row) values (?, ?, ?)', (digest, freqSegment, freqRow)).lastrowid
+            self.freqIds[digest] = freqId
+
+        segmentId = self.get_segment('data', dtype, data.size)
+        row = self.write_row(segmentId, data)
+        recordId = self.index.execute('insert into records (timestamp, serial, measName, channel, segment, row, freq) values (?, ?, ?, ?, ?, ?, ?)',
+                                      (timestamp if timestamp is not None else time.time(), serial, measName, ch, segmentId, row, freqId)).lastrowid
+
+        self.pending += 1
+        if self.pending >= self.commitEvery:
+            self.flush()
+
+        return recordId
+
+    def append_frame(self, timestamp, freq, data, measNames, serial=None, ch=1):
+        """Appends one frame from pyvisaVNA.stream_traces(), one record per measurement.
+
+        Args:
+            timestamp (float): Time of the sweep in seconds since the epoch.
+            freq (NumPy ndArray): Frequency (x-axis) values.
+            data (NumPy ndArray): Measurement data with shape (len(measNames), points).
+            measNames (list): Measurement names in the order of the rows of data.
+            serial (str): Serial number of the DUT. [default is None]
+            ch (int): Channel of the measurements. [default is 1]
+        """
+
+        for measName, values in zip(measNames, data):
+            self.append(freq, values, measName, serial=serial, ch=ch, timestamp=timestamp)
+
+    def flush(self):
+        """Writes appended rows to the segment files and commits all appended records to the index."""
+
+        # Rows reach the files before the index refers to them
+        for f in self.files.values():
+            f.flush()
+        self.index.commit()
+        self.pending = 0
+
+    def segment_map(self, segmentId):
+        """Returns a read-only memory map of a whole segment with shape (rows, points)."""
+
+        kind, dtype, numPoints, numRows = self.segments[segmentId]
+        segmentMap = self.maps.get(segmentId)
+
+        # Remapped only when rows were appended since the map was made
+        if segmentMap is None or segmentMap.shape[0] != numRows:
+            if numRows == 0:
+                return np.empty((0, numPoints), dtype=dtype)
+            if segmentId in self.files:
+                self.files[segmentId].flush()
+            segmentMap = np.memmap(self.segment_path(segmentId), dtype=dtype, mode='r', shape=(numRows, numPoints))
+            self.maps[segmentId] = segmentMap
+        return segmentMap
+
+    def find(self, startTime=None, stopTime=None, serial=None, measName=None):
+        """Looks up records in the index.
+
+        Args:
+            startTime (float): Earliest timestamp to include in seconds since the epoch. [default is None, no lower limit]
+            stopTime (float): Latest timestamp to include in seconds since the epoch. [default is None, no upper limit]
+            serial (str): Only include records of this DUT. [default is None, all DUTs]
+            measName (str): Only include records of this measurement. [default is None, all measurements]
+
+        Returns:
+            (list): (recordId, timestamp, serial, measName, channel, segment, row, freqId) tuples in timestamp order.
+        """
+
+        conditions = []
+        params = []
+        for condition, value in [('timestamp >= ?', startTime), ('timestamp <= ?', stopTime), ('serial = ?', serial), ('measName = ?', measName)]:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f'where {" and ".join(conditions)}' if conditions else ''
+
+        return self.index.execute(f'select id, timestamp, serial, measName, channel, segment, row, freq from records {where} order by timestamp, id', params).fetchall()
+
+    def get_freq(self, freqId):
+        """Returns a read-only view of a stored frequency axis."""
+
+        segment, row = self.index.execute('select segment, row from freqs where id = ?', (freqId,)).fetchone()
+        return self.segment_map(segment)[row]
+
+    def query(self, startTime=None, stopTime=None, serial=None, measName=None):
+        """Returns matching records with their frequency and data arrays as read-only views of the archive files. See find() for the arguments.
+
+        Returns:
+            (list): {'id', 'timestamp', 'serial', 'measName', 'channel', 'freq', 'data'} dicts in timestamp order.
+        """
+
+        freqs = {}
+        records = []
+        for recordId, timestamp, recordSerial, recordMeasName, channel, segment, row, freqId in self.find(startTime, stopTime, serial, measName):
+            if freqId not in freqs:
+                freqs[freqId] = self.get_freq(freqId)
+            records.append({'id': recordId, 'timestamp': timestamp, 'serial': recordSerial, 'measName': recordMeasName, 'channel': channel,
+                            'freq': freqs[freqId], 'data': self.segment_map(segment)[row]})
+        return records
+
+    def query_array(self, startTime=None, stopTime=None, serial=None, measName=None):
+        """Returns matching records as one 2D array. See find() for the arguments.
+
+        All matching records must share one frequency axis. When they are stored in evenly spaced rows (e.g. a set of
+        measurements streamed together from one DUT) the result is a view of the archive file, otherwise it is a copy.
+
+        Returns:
+            freq (NumPy ndArray): Shared frequency (x-axis) values.
+            data (NumPy ndArray): Measurement data with shape (records, points) in timestamp order.
+            timestamps (NumPy ndArray): Timestamp of each record in seconds since the epoch.
+        """
+
+        records = self.find(startTime, stopTime, serial, measName)
+        if not records:
+            return np.empty(0), np.empty((0, 0)), np.empty(0)
+
+        freqIds = {r[7] for r in records}
+        segments = {r[5] for r in records}
+        if len(freqIds) > 1 or len(segments) > 1:
+            raise ValueError('Matching records have different frequency axes or data types, narrow the query or use query().')
+
+        segmentMap = self.segment_map(records[0][5])
+        rows = np.array([r[6] for r in records])
+        timestamps = np.array([r[1] for r in records])
+
+        steps = np.diff(rows)
+        if rows.size == 1 or (steps[0] > 0 and np.all(steps == steps[0])):
+            data = segmentMap[rows[0]:rows[-1] + 1:steps[0] if rows.size > 1 else 1]
+        else:
+            data = segmentMap[rows]
+
+        return self.get_freq(records[0][7]), data, timestamps
+
+    def close(self):
+        """Commits the index and closes the archive."""
+
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+        self.maps = {}
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -0,0 +1,379 @@
+"""
+Keysight VNA SCPI API - Latency Instrumentation
+Author: Morgan Allison
+Updated: 10/2026
+Windows 10
+Python 3.10.x
+PyVISA 1.12.x
+
+Opt-in profiler that times every VISA transaction made by pyvisaVNA and every public method
+call, keeps HDR-style latency histograms per SCPI command header and per method, counts bytes
+in and out, and exports the results as JSON or as a Chrome trace (chrome://tracing, Perfetto,
+or speedscope) for flame graph viewing:
+
+    profiler = vna.enable_profiling()
+    vna.deembed_calset('MyCal_STD', 'Deembedded', 'C:/fixtures/left.s2p', 'C:/fixtures/right.s2p')
+    vna.disable_profiling()
+
+    print(profiler.snapshot()['methods']['deembed_calset'])
+    profiler.export_chrome_trace('C:/logs/deembed_trace.json')
+
+Copyright 2018-2026 Keysight Technologies
+All rights reserved
+"""
+
+import inspect
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from scpi_parse import normalize_header, split_compound
+
+
+class LatencyHistogram:
+    def __init__(self, precisionBits=5):
+        """Log-linear (HDR-style) histogram of durations in nanoseconds.
+
+        Values up to 2**(precisionBits + 1) ns get their own bucket, above that every power of two is split into
+        2**precisionBits buckets, so the relative error of any percentile is below 2**-precisionBits (about 3%
+        by default) at any scale, and recording a value costs one dict update.
+
+        Args:
+            precisionBits (int): Number of sub-bucket bits per power of two. [default is 5]
+
+        Attributes:
+            count (int): Number of recorded values.
+            total (int): Sum of recorded values in ns.
+            min (int): Smallest recorded value in ns.
+            max (int): Largest recorded value in ns.
+            buckets (dict): Number of values keyed by bucket index.
+        """
+
+        self.precisionBits = precisionBits
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def bucket_index(self, value):
+        """Returns the index of the bucket that holds a value in ns."""
+
+        if value < (1 << (self.precisionBits + 1)):
+            return value
+        shift = value.bit_length() - (self.precisionBits + 1)
+        return ((shift + 1) << self.precisionBits) + (value >> shift) - (1 << self.precisionBits)
+
+    def bucket_range(self, index):
+        """Returns the smallest and largest value in ns that fall into a bucket."""
+
+        if index < (1 << (self.precisionBits + 1)):
+            return index, index
+        shift = (index >> self.precisionBits) - 1
+        mantissa = (index & ((1 << self.precisionBits) - 1)) + (1 << self.precisionBits)
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """Adds a duration in ns."""
+
+        value = max(int(value), 0)
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Returns the duration in ns below which the given percentage of values fall, accurate to the bucket width.
+
+        Args:
+            percent (float): Percentile from 0 to 100.
+        """
+
+        if not self.count:
+            return 0
+        target = max(1, int(np.ceil(self.count * percent / 100)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                low, high = self.bucket_range(index)
+                return min(max((low + high) // 2, self.min), self.max)
+        return self.max
+
+    def merge(self, other):
+        """Adds all values of another histogram with the same precision to this one."""
+
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def summary(self):
+        """Returns count, total, mean, min, max, and percentiles in seconds as a dict."""
+
+        if not self.count:
+            return {'count': 0, 'total': 0.0, 'mean': 0.0, 'min': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'count': self.count,
+            'total': self.total / 1e9,
+            'mean': self.total / self.count / 1e9,
+            'min': self.min / 1e9,
+            'p50': self.percentile(50) / 1e9,
+            'p90': self.percentile(90) / 1e9,
+            'p99': self.percentile(99) / 1e9,
+            'max': self.max / 1e9,
+        }
+
+
+def command_header(message):
+    """Returns the short-form header of the first command in a SCPI message, e.g. 'calc:meas:data?' for 'CALCulate1:MEASure3:DATA? SDATA'."""
+
+    commands = split_compound(message)
+    if not commands:
+        return ''
+    command = commands[0].split(None, 1)[0]
+    return normalize_header(command)[0] + ('?' if command.endswith('?') else '')
+
+
+class VNAProfiler:
+    def __init__(self, maxEvents=100000, precisionBits=5):
+        """Collects latency histograms, byte counters, and trace events for one or more pyvisaVNA objects.
+
+        Args:
+            maxEvents (int): Number of most recent events kept for export_chrome_trace(). 0 disables event collection. [default is 100000]
+            precisionBits (int): Histogram precision, see LatencyHistogram. [default is 5]
+
+        Attributes:
+            commands (dict): {header: {'latency': LatencyHistogram, 'bytesOut': int, 'bytesIn': int}} per SCPI command header.
+            methods (dict): {name: {'latency': LatencyHistogram, 'transactions': int, 'ioTime': int, 'bytesOut': int, 'bytesIn': int}} per pyvisaVNA method.
+                Transactions, I/O time in ns, and bytes are attributed to the innermost public method that made them.
+            events (deque): Chrome trace events of recent transactions and method calls.
+        """
+
+        self.maxEvents = maxEvents
+        self.precisionBits = precisionBits
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Clears all histograms, counters, and events."""
+
+        with self.lock:
+            self.commands = {}
+            self.methods = {}
+            self.events = deque(maxlen=self.maxEvents) if self.maxEvents else None
+            self.startTime = time.perf_counter_ns()
+
+    def method_stack(self):
+        """Returns the stack of public pyvisaVNA methods being executed by the current thread."""
+
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def method_entry(self, name):
+        """Returns the counters of a method, creating them if needed. Call with the lock held."""
+
+        entry = self.methods.get(name)
+        if entry is None:
+            entry = self.methods[name] = {'latency': LatencyHistogram(self.precisionBits), 'transactions': 0, 'ioTime': 0, 'bytesOut': 0, 'bytesIn': 0}
+        return entry
+
+    def record_transaction(self, op, header, start, duration, bytesOut, bytesIn):
+        """Records one VISA transaction.
+
+        Args:
+            op (str): Resource method, e.g. 'query' or 'read_raw'.
+            header (str): Normalized SCPI command header.
+            start (int): Start time from time.perf_counter_ns().
+            duration (int): Duration in ns.
+            bytesOut (int): Bytes sent to the instrument.
+            bytesIn (int): Bytes received from the instrument.
+        """
+
+        stack = self.method_stack()
+        method = stack[-1] if stack else '<none>'
+        with self.lock:
+            entry = self.commands.get(header)
+            if entry is None:
+                entry = self.commands[header] = {'latency': LatencyHistogram(self.precisionBits), 'bytesOut': 0, 'bytesIn': 0}
+            entry['latency'].record(duration)
+            entry['bytesOut'] += bytesOut
+            entry['bytesIn'] += bytesIn
+
+            methodEntry = self.method_entry(method)
+            methodEntry['transactions'] += 1
+            methodEntry['ioTime'] += duration
+            methodEntry['bytesOut'] += bytesOut
+            methodEntry['bytesIn'] += bytesIn
+
+            if self.events is not None:
+                self.events.append({'name': header or op, 'cat': 'scpi', 'ph': 'X', 'ts': (start - self.startTime) / 1e3, 'dur': duration / 1e3,
+                                    'pid': 1, 'tid': threading.get_ident(), 'args': {'op': op, 'method': method, 'bytesOut': bytesOut, 'bytesIn': bytesIn}})
+
+    def record_method(self, name, start, duration):
+        """Records one call of a pyvisaVNA method, see record_transaction() for the arguments."""
+
+        with self.lock:
+            self.method_entry(name)['latency'].record(duration)
+            if self.events is not None:
+                self.events.append({'name': name, 'cat': 'method', 'ph': 'X', 'ts': (start - self.startTime) / 1e3, 'dur': duration / 1e3,
+                                    'pid': 1, 'tid': threading.get_ident()})
+
+    def wrap_method(self, name, method):
+        """Returns a wrapper of a bound method that times every call and makes it the owner of the transactions it makes."""
+
+        def wrapper(*args, **kwargs):
+            stack = self.method_stack()
+            stack.append(name)
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stop = time.perf_counter_ns()
+                stack.pop()
+                self.record_method(name, start, stop - start)
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        wrapper.__wrapped__ = method
+        return wrapper
+
+    def snapshot(self):
+        """Returns the current statistics as a JSON serializable dict. Times are in seconds.
+
+        Returns:
+            (dict): {'commands': {header: {count, total, mean, min, p50, p90, p99, max, bytesOut, bytesIn}},
+                     'methods': {name: {count, total, mean, min, p50, p90, p99, max, transactions, ioTime, bytesOut, bytesIn}}}
+        """
+
+        with self.lock:
+            commands = {header: {**entry['latency'].summary(), 'bytesOut': entry['bytesOut'], 'bytesIn': entry['bytesIn']}
+                        for header, entry in self.commands.items()}
+            methods = {name: {**entry['latency'].summary(), 'transactions': entry['transactions'], 'ioTime': entry['ioTime'] / 1e9,
+                              'bytesOut': entry['bytesOut'], 'bytesIn': entry['bytesIn']}
+                       for name, entry in self.methods.items()}
+        return {'commands': commands, 'methods': methods}
+
+    def export_json(self, filePath):
+        """Writes snapshot() to a JSON file."""
+
+        with open(filePath, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+
+    def export_chrome_trace(self, filePath):
+        """Writes the collected events as a Chrome trace-event file, which shows method calls and the transactions inside them as a flame graph."""
+
+        with self.lock:
+            events = list(self.events) if self.events is not None else []
+        with open(filePath, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class ProfiledResource:
+    def __init__(self, inst, profiler):
+        """Wraps a PyVISA resource and reports the duration and size of every transaction to a VNAProfiler.
+
+        Args:
+            inst (base class for the connected resource): PyVISA resource to be timed.
+            profiler (VNAProfiler): Profiler that receives the measurements.
+        """
+
+        self.__dict__['inst'] = inst
+        self.__dict__['profiler'] = profiler
+        # Bare reads are attributed to the header of the last command written by the same thread, so a status poll
+        # from another thread (e.g. the arm_opc_event() monitor) can't take over a read in progress
+        self.__dict__['written'] = threading.local()
+
+    def timed(self, op, header, call, bytesOut, responseSize=len):
+        """Calls call() and records it as one transaction.
+
+        Args:
+            op (str): Resource method name.
+            header (str): Command header the transaction is attributed to, see command_header().
+            call (function): Function that performs the transaction.
+            bytesOut (int): Number of bytes sent.
+            responseSize (function): Returns the number of bytes received from the result of call. [default is len, None if nothing is received]
+        """
+
+        start = time.perf_counter_ns()
+        result = call()
+        duration = time.perf_counter_ns() - start
+        bytesIn = responseSize(result) if responseSize is not None else 0
+        self.profiler.record_transaction(op, header, start, duration, bytesOut, bytesIn)
+        return result
+
+    def sent_header(self, message):
+        """Returns the command header of a message being sent and remembers it for the reads that follow in this thread."""
+
+        header = command_header(message)
+        self.written.header = header
+        return header
+
+    def read_header(self):
+        """Returns the header of the last command written by this thread."""
+
+        return getattr(self.written, 'header', '')
+
+    def write(self, message, *args, **kwargs):
+        return self.timed('write', self.sent_header(message), lambda: self.inst.write(message, *args, **kwargs), len(message), None)
+
+    def write_raw(self, message):
+        # Only the text before a binary block is parsed for the header
+        header = bytes(message[:256]).decode('ascii', errors='replace').split('#', 1)[0]
+        return self.timed('write_raw', self.sent_header(header), lambda: self.inst.write_raw(message), len(message), None)
+
+    def query(self, message, *args, **kwargs):
+        return self.timed('query', self.sent_header(message), lambda: self.inst.query(message, *args, **kwargs), len(message))
+
+    def query_binary_values(self, message, *args, **kwargs):
+        return self.timed('query_binary_values', self.sent_header(message), lambda: self.inst.query_binary_values(message, *args, **kwargs), len(message), lambda r: np.asarray(r).nbytes)
+
+    def query_ascii_values(self, message, *args, **kwargs):
+        return self.timed('query_ascii_values', self.sent_header(message), lambda: self.inst.query_ascii_values(message, *args, **kwargs), len(message), lambda r: np.asarray(r).nbytes)
+
+    def read(self, *args, **kwargs):
+        return self.timed('read', self.read_header(), lambda: self.inst.read(*args, **kwargs), 0)
+
+    def read_raw(self, *args, **kwargs):
+        return self.timed('read_raw', self.read_header(), lambda: self.inst.read_raw(*args, **kwargs), 0)
+
+    def read_bytes(self, *args, **kwargs):
+        return self.timed('read_bytes', self.read_header(), lambda: self.inst.read_bytes(*args, **kwargs), 0)
+
+    def read_stb(self):
+        return self.timed('read_stb', '*stb?', self.inst.read_stb, 0, lambda r: 1)
+
+    def wait_on_event(self, *args, **kwargs):
+        return self.timed('wait_on_event', 'srq', lambda: self.inst.wait_on_event(*args, **kwargs), 0, None)
+
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.inst, name, value)
+
+
+def profiled_method_names(cls):
+    """Returns the names of the public methods of a class that are timed by the profiler. Generators and context managers are left out, their calls return before any work is done."""
+
+    names = []
+    for name, func in inspect.getmembers(cls, inspect.isfunction):
+        if name.startswith('_') or name in ['enable_profiling', 'disable_profiling']:
+            continue
+        if inspect.isgeneratorfunction(getattr(func, '__wrapped__', func)):
+            continue
+        names.append(name)
+    return names